@@ -3,6 +3,7 @@ Keira - Configuration
 Regis Architecture v2.9.0
 """
 
+import os
 import tempfile
 from pathlib import Path
 
@@ -10,12 +11,117 @@ from pathlib import Path
 WORK_DIR = Path(tempfile.gettempdir()) / "keira_web"
 UPLOADS_DIR = WORK_DIR / "uploads"
 JOBS_DIR = WORK_DIR / "jobs"
+# Upload contents by hash, each upload directory hard-links its blob
+BLOBS_DIR = UPLOADS_DIR / "blobs"
+# Finished outputs keyed by source, mask and output-affecting settings
+RESULTS_DIR = WORK_DIR / "results"
 WORKER_DIR = Path(__file__).parent.parent / "worker"
+# KEIRA_MODELS_DIR and KEIRA_WORKER_PYTHON point the API at another model
+# directory and worker interpreter, e.g. the stand-in model of the
+# end-to-end benchmark; the worker venv is used by default
+MODELS_DIR = Path(os.environ.get("KEIRA_MODELS_DIR", WORKER_DIR / "models"))
+WORKER_PYTHON = os.environ.get("KEIRA_WORKER_PYTHON")
 
 # Create directories
 WORK_DIR.mkdir(parents=True, exist_ok=True)
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 JOBS_DIR.mkdir(parents=True, exist_ok=True)
+RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# LaMa model variants, built by worker/quantize_model.py from the fp32 export
+MODEL_VARIANTS = {
+    "fp32": "lama_fp32.onnx",
+    "int8": "lama_int8.onnx",
+    "fp16": "lama_fp16.onnx",
+}
+DEFAULT_MODEL = "fp32"
+
+# ONNX Runtime execution providers, in priority order, unless a job overrides
+ORT_PROVIDERS = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+
+# Frame transport between ffmpeg and the worker:
+#   frames  PNG files extracted to disk, inpainted, then encoded
+#   roi     only a padded crop around the ROI is extracted and inpainted,
+#           then overlaid on the original video while encoding
+#   stream  rawvideo piped decoder -> worker -> encoder, nothing on disk
+PIPELINES = ("frames", "roi", "stream")
+DEFAULT_PIPELINE = "frames"
+
+# Intermediate frame store for the frames and roi pipelines:
+#   png  one file per frame, PNG_COMPRESSION is the zlib level (0-9)
+#   bmp  one uncompressed file per frame
+#   raw  one memory-mapped bgr24 file per directory, no per-frame files
+# Jobs may override both through ExportSettings
+FRAME_FORMATS = ("png", "bmp", "raw")
+FRAME_FORMAT = "png"
+PNG_COMPRESSION = 1
+
+# Warm inpainting service processes kept alive between jobs, 0 spawns a
+# fresh worker per job instead
+WORKER_POOL_SIZE = 2
+
+# Jobs running at once, later ones queue by priority then arrival. Each
+# stage has its own limit on top, inpainting matches the warm worker pool
+MAX_CONCURRENT_JOBS = 4
+STAGE_LIMITS = {
+    "extract": 2,
+    "inpaint": max(1, WORKER_POOL_SIZE),
+    "encode": 2,
+}
+
+# Job and video state backend:
+#   memory  in this process only, lost on restart
+#   sqlite  STATE_DB in WAL mode, kept across restarts and shared by every
+#           API worker process (uvicorn --workers N)
+# Set KEIRA_STATE_BACKEND to override
+STATE_BACKEND = os.environ.get("KEIRA_STATE_BACKEND", "memory")
+STATE_DB = WORK_DIR / "state.db"
+
+# Seconds between batched progress writes to the state backend
+STATE_FLUSH_INTERVAL = 1.0
+
+# Seconds between progress checkpoints to a job's manifest
+MANIFEST_CHECKPOINT_INTERVAL = 5.0
+
+# Job event streams (SSE / WebSocket): at most EVENTS_MAX_RATE updates a
+# second per stream, the job re-read every EVENTS_POLL_INTERVAL seconds to
+# catch changes from other API processes, a ping after EVENTS_HEARTBEAT
+# seconds without an event
+EVENTS_MAX_RATE = 4.0
+EVENTS_POLL_INTERVAL = 2.0
+EVENTS_HEARTBEAT = 15.0
+
+# /api/metrics histogram buckets: pipeline stage and upload durations
+# (seconds), per-job inpainting throughput (frames per second) and model
+# load time (seconds)
+METRICS_DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+METRICS_FPS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+METRICS_MODEL_LOAD_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Seconds a measurement of disk usage under WORK_DIR is reused for, the
+# directory walk is too slow to repeat on every scrape
+METRICS_DISK_INTERVAL = 30.0
+
+# Uploads are read and hashed in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Largest accepted upload, larger ones are rejected with 413
+MAX_UPLOAD_BYTES = 20 * 1024**3
+
+# Allowance for multipart boundaries and part headers when a multipart
+# upload is rejected up front on its Content-Length
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Disk budget for cached results, least recently used ones are evicted
+RESULT_CACHE_BYTES = 20 * 1024**3
+
+# Frame previews: requested times snap to this grid (seconds), results are
+# kept in memory within both budgets, and at most PREVIEW_CONCURRENCY
+# ffmpeg extractions run at once
+PREVIEW_TIME_STEP = 0.1
+PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+PREVIEW_CACHE_COUNT = 512
+PREVIEW_CONCURRENCY = 4
 
 # Supported formats
 SUPPORTED_VIDEO_FORMATS = [".mp4", ".mkv", ".mov", ".webm", ".avi"]
@@ -4,17 +4,23 @@ Regis Architecture v2.9.0
 """
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .routes import (
+    events_router,
     frame_router,
     health_router,
+    metrics_router,
     process_router,
     upload_router,
     video_router,
 )
+from .services.manifest import interrupt_orphans, restore_jobs
+from .services.worker_pool import worker_pool
+from .state import jobs, videos
 
 # Configure logging
 logging.basicConfig(
@@ -22,11 +28,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Jobs from before a restart, interrupted ones can be resumed
+    interrupt_orphans(jobs)
+    restore_jobs(jobs, videos)
+    yield
+    # Stop the warm inpainting service processes
+    await worker_pool.shutdown()
+    # Write progress still waiting for the next batch
+    jobs.flush()
+
+
 # App
 app = FastAPI(
     title="Keira API",
     description="AI-powered video watermark removal",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -43,6 +63,8 @@ app.include_router(upload_router, prefix="/api", tags=["upload"])
 app.include_router(frame_router, prefix="/api", tags=["frame"])
 app.include_router(process_router, prefix="/api", tags=["process"])
 app.include_router(video_router, prefix="/api", tags=["video"])
+app.include_router(events_router, prefix="/api", tags=["process"])
+app.include_router(metrics_router, prefix="/api", tags=["health"])
 
 
 if __name__ == "__main__":
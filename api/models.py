@@ -3,12 +3,14 @@ Keira - Pydantic Models
 Regis Architecture v2.9.0
 """
 
+import asyncio
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ProcessingStage(str, Enum):
@@ -16,11 +18,13 @@ class ProcessingStage(str, Enum):
 
     IDLE = "idle"
     UPLOADING = "uploading"
+    QUEUED = "queued"
     EXTRACTING = "extracting"
     INPAINTING = "inpainting"
     ENCODING = "encoding"
     COMPLETE = "complete"
     ERROR = "error"
+    CANCELLED = "cancelled"
 
 
 class ROI(BaseModel):
@@ -32,12 +36,40 @@ class ROI(BaseModel):
     height: int
 
 
+class SessionSettings(BaseModel):
+    """ONNX Runtime session tuning for the inpainting worker."""
+
+    intraOpThreads: int = 0
+    interOpThreads: int = 0
+    executionMode: str = "sequential"
+    graphOptimization: str = "all"
+    memArena: bool = True
+    memPattern: bool = True
+    providers: list[str] = Field(default_factory=list)
+    cacheOptimizedModel: bool = True
+
+
 class ExportSettings(BaseModel):
     """Video export settings."""
 
     quality: str = "high"
+    model: str = "fp32"
+    pipeline: str = "frames"
+    # Intermediate frame store, None uses the server's configured default
+    frameFormat: Optional[str] = None
+    pngCompression: Optional[int] = Field(default=None, ge=0, le=9)
     batchSize: int = 8
     ioWorkers: int = 4
+    decodeWorkers: int = 2
+    prefetchDepth: int = 16
+    writeQueueDepth: int = 16
+    shards: int = 1
+    inferenceMode: str = "crop"
+    cropPadding: int = 64
+    featherRadius: int = 0
+    temporalDedup: bool = True
+    dedupTolerance: float = 0.0
+    session: SessionSettings = Field(default_factory=SessionSettings)
 
 
 class VideoInfo(BaseModel):
@@ -51,6 +83,14 @@ class VideoInfo(BaseModel):
     width: int
     height: int
     size: int
+    frameCount: int = 0
+    codec: str = ""
+    pixFmt: str = ""
+    # Degrees; width and height are already the rotated display size
+    rotation: int = 0
+    hasAudio: bool = False
+    # Average frames between keyframes near the start, None if unknown
+    keyframeInterval: Optional[int] = None
 
 
 class ProcessingProgress(BaseModel):
@@ -63,6 +103,14 @@ class ProcessingProgress(BaseModel):
     fps: float = 0.0
     eta: str = "--:--"
     message: str = ""
+    cacheHitRate: float = 0.0
+
+
+class TimeRange(BaseModel):
+    """Span of the video in seconds, end exclusive."""
+
+    start: float
+    end: float
 
 
 class StartProcessingRequest(BaseModel):
@@ -72,6 +120,17 @@ class StartProcessingRequest(BaseModel):
     roi: ROI
     maskDataUrl: str
     settings: ExportSettings
+    # Only these spans are inpainted, empty means the whole video
+    segments: list[TimeRange] = Field(default_factory=list)
+    # Higher runs first when jobs are queued
+    priority: int = 0
+
+
+class UploadInitRequest(BaseModel):
+    """Request to start a resumable upload."""
+
+    filename: str
+    size: int = Field(ge=1)
 
 
 # In-memory state dataclasses
@@ -81,6 +140,8 @@ class VideoData:
 
     info: VideoInfo
     path: Path
+    # SHA-256 of the file, None for videos restored without one
+    content_hash: Optional[str] = None
 
 
 @dataclass
@@ -99,3 +160,25 @@ class JobData:
     output_path: Optional[Path] = None
     error: Optional[str] = None
     cancelled: bool = False
+    segments: list[TimeRange] = field(default_factory=list)
+    # Extracted frames are complete on disk, a resume can skip extraction
+    frames_extracted: bool = False
+    # Result cache entry the output is stored under once complete
+    cache_key: Optional[str] = None
+    priority: int = 0
+    created_at: float = field(default_factory=time.time)
+    # Latest worker stage breakdown, see parse_telemetry
+    telemetry: Optional[dict] = None
+
+
+@dataclass
+class UploadSession:
+    """Resumable upload in progress."""
+
+    id: str
+    filename: str
+    size: int
+    offset: int = 0
+    # Running SHA-256 of bytes before offset, None when restored from disk
+    digest: Optional[Any] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
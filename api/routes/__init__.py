@@ -3,8 +3,10 @@ Keira - API Routes
 Regis Architecture v2.9.0
 """
 
+from .events import router as events_router
 from .frame import router as frame_router
 from .health import router as health_router
+from .metrics import router as metrics_router
 from .process import router as process_router
 from .upload import router as upload_router
 from .video import router as video_router
@@ -15,4 +17,6 @@ __all__ = [
     "frame_router",
     "process_router",
     "video_router",
+    "events_router",
+    "metrics_router",
 ]
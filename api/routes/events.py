@@ -0,0 +1,58 @@
+"""
+Keira - Job Events Route
+Regis Architecture v2.9.0
+
+Job progress pushed to the browser instead of polled:
+
+  GET /process/events/{job_id}   Server-Sent Events, one ``event:`` per
+                                 stage / progress / end, ``: ping``
+                                 comments keep idle connections open
+  WS  /process/ws/{job_id}       the same events as JSON messages
+                                 {"event": ..., "data": ...}
+"""
+
+import json
+from contextlib import aclosing
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from ..services.events import stream_job
+from ..state import jobs
+
+router = APIRouter()
+
+
+@router.get("/process/events/{job_id}")
+async def job_events_stream(job_id: str):
+    """Stream a job's progress as Server-Sent Events."""
+    if job_id not in jobs:
+        raise HTTPException(404, "Job not found")
+
+    async def body():
+        async for event, data in stream_job(job_id, jobs):
+            if event == "ping":
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/process/ws/{job_id}")
+async def job_events_socket(websocket: WebSocket, job_id: str):
+    """Stream a job's progress over a WebSocket."""
+    await websocket.accept()
+    try:
+        async with aclosing(stream_job(job_id, jobs)) as events:
+            async for event, data in events:
+                if event != "ping":
+                    await websocket.send_json({"event": event, "data": data})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        # The client went away, sending to a closed socket raises either
+        return
@@ -4,10 +4,10 @@ Regis Architecture v2.9.0
 """
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 
-from ..config import UPLOADS_DIR
-from ..services.ffmpeg import extract_frame
+from ..config import PREVIEW_TIME_STEP
+from ..services.previews import preview_cache, snap_time
 from ..state import videos
 
 router = APIRouter()
@@ -20,13 +20,17 @@ async def get_frame(video_id: str, time: float = 0):
         raise HTTPException(404, "Video not found")
 
     video_data = videos[video_id]
-    frame_path = UPLOADS_DIR / video_id / f"frame_{time:.2f}.jpg"
+    info = video_data.info
+    # Nearby scrub positions share one extracted frame
+    snapped = snap_time(time, info.duration, info.fps, PREVIEW_TIME_STEP)
 
-    # Extract frame if not cached
-    if not frame_path.exists():
-        extract_frame(video_data.path, time, frame_path)
-
-    if not frame_path.exists():
+    try:
+        data = await preview_cache.get(video_id, video_data.path, snapped)
+    except RuntimeError:
         raise HTTPException(500, "Failed to extract frame")
 
-    return FileResponse(frame_path, media_type="image/jpeg")
+    return Response(
+        data,
+        media_type="image/jpeg",
+        headers={"X-Frame-Time": f"{snapped:.3f}", "Cache-Control": "max-age=3600"},
+    )
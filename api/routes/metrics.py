@@ -0,0 +1,18 @@
+"""
+Keira - Metrics Route
+Regis Architecture v2.9.0
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from ..services.metrics import CONTENT_TYPE, collect
+from ..state import jobs
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    """Pipeline metrics in the Prometheus text format."""
+    return Response(await collect(jobs), media_type=CONTENT_TYPE)
@@ -4,20 +4,34 @@ Regis Architecture v2.9.0
 """
 
 import base64
+import hashlib
 import logging
 import uuid
+from typing import Optional
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from fastapi.responses import FileResponse
 
-from ..config import JOBS_DIR
+from ..config import (
+    DEFAULT_MODEL,
+    FRAME_FORMATS,
+    JOBS_DIR,
+    MODEL_VARIANTS,
+    MODELS_DIR,
+    PIPELINES,
+)
 from ..models import (
     JobData,
     ProcessingProgress,
     ProcessingStage,
     StartProcessingRequest,
+    TimeRange,
 )
-from ..services.processing import run_processing
+from ..services.content_cache import link_or_copy, result_cache, result_key
+from ..services.events import job_events, job_status
+from ..services.manifest import TERMINAL_STAGES, create_manifest, update_manifest
+from ..services.processing import active_jobs, normalize_segments, run_processing
+from ..services.scheduler import scheduler
 from ..state import jobs, videos
 
 logger = logging.getLogger(__name__)
@@ -32,6 +46,28 @@ async def start_processing(
     if request.videoId not in videos:
         raise HTTPException(404, "Video not found")
 
+    if request.settings.model not in MODEL_VARIANTS:
+        raise HTTPException(400, f"Unknown model: {request.settings.model}")
+
+    if request.settings.pipeline not in PIPELINES:
+        raise HTTPException(400, f"Unknown pipeline: {request.settings.pipeline}")
+
+    frame_format = request.settings.frameFormat
+    if frame_format is not None and frame_format not in FRAME_FORMATS:
+        raise HTTPException(400, f"Unknown frame format: {frame_format}")
+
+    segments = []
+    if request.segments:
+        if request.settings.pipeline == "stream":
+            raise HTTPException(400, "Segments are not supported in stream pipeline")
+        try:
+            spans = normalize_segments(
+                request.segments, videos[request.videoId].info.duration
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        segments = [TimeRange(start=start, end=end) for start, end in spans]
+
     job_id = str(uuid.uuid4())
 
     # Create job directory
@@ -54,41 +90,112 @@ async def start_processing(
         roi=request.roi,
         mask_path=mask_path,
         settings=request.settings,
-        status=ProcessingStage.EXTRACTING,
-        progress=ProcessingProgress(
-            stage=ProcessingStage.EXTRACTING, message="Starting..."
-        ),
+        segments=segments,
+        priority=request.priority,
+        status=ProcessingStage.QUEUED,
+        progress=ProcessingProgress(stage=ProcessingStage.QUEUED, message="Queued"),
     )
+    video = videos[request.videoId]
+    if video.content_hash:
+        mask_hash = hashlib.sha256(mask_bytes).hexdigest()
+        job.cache_key = result_key(video.content_hash, mask_hash, job)
+
+    # Same source, mask and output settings as an earlier job
+    cached = result_cache.lookup(job.cache_key) if job.cache_key else None
+    if cached:
+        output_path = job_dir / "output.mp4"
+        link_or_copy(cached, output_path)
+        job.status = ProcessingStage.COMPLETE
+        job.output_path = output_path
+        job.progress = ProcessingProgress(
+            stage=ProcessingStage.COMPLETE, percent=100, message="Complete!"
+        )
+
     jobs[job_id] = job
+    create_manifest(job, video)
+
+    if cached:
+        logger.info(f"Job {job_id} served from result cache")
+        return {"jobId": job_id, "cached": True}
 
     # Start processing in background
     background_tasks.add_task(run_processing, job_id, jobs, videos)
 
     logger.info(f"Started job: {job_id}")
-    return {"jobId": job_id}
+    return {"jobId": job_id, "cached": False}
 
 
-@router.get("/process/status/{job_id}")
-async def get_processing_status(job_id: str):
-    """Get job status."""
+@router.post("/process/resume/{job_id}")
+async def resume_processing(job_id: str, background_tasks: BackgroundTasks):
+    """Resume a failed, cancelled or interrupted job from its checkpoint."""
     if job_id not in jobs:
         raise HTTPException(404, "Job not found")
 
     job = jobs[job_id]
+    if job.status == ProcessingStage.COMPLETE:
+        raise HTTPException(400, "Job already complete")
+    # A cancelled job's pipeline may still be winding down
+    if job_id in active_jobs or job.status not in TERMINAL_STAGES:
+        raise HTTPException(409, "Job is still running")
+    if job.video_id not in videos:
+        raise HTTPException(404, "Video not found")
+
+    jobs.set_cancelled(job_id, False)
+    job.error = None
+    job.status = ProcessingStage.QUEUED
+    job.progress = ProcessingProgress(
+        stage=ProcessingStage.QUEUED, message="Queued to resume"
+    )
+    jobs.save(job)
+    update_manifest(job)
+    job_events.notify(job_id)
+
+    background_tasks.add_task(run_processing, job_id, jobs, videos, True)
+
+    logger.info(f"Resumed job: {job_id}")
+    return {"jobId": job_id}
 
-    response = {
-        "jobId": job_id,
-        "status": job.status.value,
-        "progress": job.progress.model_dump(),
+
+@router.get("/process/models")
+async def list_models():
+    """List LaMa model variants and whether they are installed."""
+    return {
+        "default": DEFAULT_MODEL,
+        "models": [
+            {"name": name, "available": (MODELS_DIR / filename).exists()}
+            for name, filename in MODEL_VARIANTS.items()
+        ],
     }
 
-    if job.output_path:
-        response["outputUrl"] = f"/api/process/download/{job_id}"
 
-    if job.error:
-        response["error"] = job.error
+@router.get("/process/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """Most recent jobs first, optionally only those in one stage."""
+    if status is not None:
+        try:
+            ProcessingStage(status)
+        except ValueError:
+            raise HTTPException(400, f"Unknown status: {status}")
+
+    return [
+        {
+            "jobId": job.id,
+            "videoId": job.video_id,
+            "status": job.status.value,
+            "createdAt": job.created_at,
+            "progress": job.progress.model_dump(),
+        }
+        for job in jobs.query(status, max(1, limit))
+    ]
+
+
+@router.get("/process/status/{job_id}")
+async def get_processing_status(job_id: str):
+    """Get job status."""
+    if job_id not in jobs:
+        raise HTTPException(404, "Job not found")
 
-    return response
+    return job_status(jobs[job_id])
 
 
 @router.post("/process/cancel/{job_id}")
@@ -97,7 +204,10 @@ async def cancel_processing(job_id: str):
     if job_id not in jobs:
         raise HTTPException(404, "Job not found")
 
-    jobs[job_id].cancelled = True
+    jobs.set_cancelled(job_id, True)
+    # A queued job gives up its place at once instead of waiting for a slot
+    scheduler.withdraw(job_id)
+    job_events.notify(job_id)
     logger.info(f"Cancelled job: {job_id}")
     return {"status": "cancelled"}
 
@@ -1,63 +1,384 @@
 """
 Keira - Upload Route
 Regis Architecture v2.9.0
+
+Uploads are streamed to disk as they arrive and hashed on the way, never
+held in memory or spooled whole; a multipart POST is parsed here rather
+than by the framework so its file part goes straight to the upload
+directory. Large files can use the resumable protocol instead:
+
+  POST   /upload/init                 {filename, size} -> {uploadId, offset}
+  PUT    /upload/{id}?offset=N        raw bytes appended at N, 409 if N is
+                                      not the current offset
+  GET    /upload/{id}                 current offset, to continue after an
+                                      interrupted PUT
+  POST   /upload/{id}/finalize        probe and register the video
+  DELETE /upload/{id}                 abandon the upload
 """
 
+import asyncio
+import hashlib
+import json
 import logging
 import shutil
+import time
 import uuid
 from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, HTTPException, Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
 
-from ..config import SUPPORTED_VIDEO_FORMATS, UPLOADS_DIR
-from ..models import VideoData, VideoInfo
-from ..services.ffmpeg import get_video_info
-from ..state import videos
+from ..config import (
+    MAX_UPLOAD_BYTES,
+    SUPPORTED_VIDEO_FORMATS,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_FORM_OVERHEAD,
+    UPLOADS_DIR,
+)
+from ..models import UploadInitRequest, UploadSession, VideoData, VideoInfo
+from ..services.content_cache import hash_file, prune_blob, store_blob
+from ..services.ffmpeg import probe_video
+from ..services.metrics import upload_bytes, upload_duration
+from ..state import upload_sessions, videos
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+PART_FILE = "upload.part"
+SESSION_FILE = "session.json"
 
-@router.post("/upload", response_model=VideoInfo)
-async def upload_video(file: UploadFile = File(...)):
-    """Upload a video file."""
-    if not file.filename:
-        raise HTTPException(400, "No filename provided")
-
-    video_id = str(uuid.uuid4())
-    ext = Path(file.filename).suffix.lower()
 
+def upload_ext(filename: str) -> str:
+    """Lowercase extension of a supported video file name."""
+    ext = Path(filename).suffix.lower()
     if ext not in SUPPORTED_VIDEO_FORMATS:
         raise HTTPException(400, f"Unsupported format: {ext}")
+    return ext
+
+
+async def save_chunks(
+    chunks: AsyncIterator[bytes], f: BinaryIO, digest, limit: int
+) -> int:
+    """
+    Write chunks to an open file, hashing them as they go. Hashing and
+    writing run in the default executor, off the event loop.
+
+    Raises:
+        HTTPException: 413 once more than ``limit`` bytes arrive; the
+            chunk that crosses the limit is not written
+    """
+
+    def write(chunk: bytes) -> None:
+        digest.update(chunk)
+        f.write(chunk)
+
+    loop = asyncio.get_event_loop()
+    written = 0
+    start = time.monotonic()
+    try:
+        async for chunk in chunks:
+            if written + len(chunk) > limit:
+                raise HTTPException(413, f"Upload larger than {limit} bytes")
+            await loop.run_in_executor(None, write, chunk)
+            written += len(chunk)
+    finally:
+        upload_bytes.inc(written)
+        upload_duration.observe(time.monotonic() - start)
+    return written
+
+
+class FormFile:
+    """
+    The file in one field of a multipart request body, parsed while the
+    body streams in. Other fields and anything after the file are ignored.
+    """
+
+    def __init__(self, request: Request, field: str):
+        _, params = parse_options_header(request.headers.get("content-type", ""))
+        if b"boundary" not in params:
+            raise HTTPException(400, "Expected a multipart/form-data body")
+
+        self.field = field
+        self.filename: Optional[str] = None
+        self.done = False
+        self._body = request.stream().__aiter__()
+        self._data: list[bytes] = []
+        self._in_file = False
+        self._header = b""
+        self._value = b""
+        self._disposition = b""
+        self._parser = MultipartParser(
+            params[b"boundary"],
+            {
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
 
+    def _on_header_end(self) -> None:
+        if self._header.lower() == b"content-disposition":
+            self._disposition = self._value
+        self._header = self._value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._disposition = b""
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        if self.filename is None and name == self.field and filename:
+            self.filename = filename
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._data.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self.done = True
+
+    async def _feed(self) -> bool:
+        """Parse the next piece of the body, False once there is none."""
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            return False
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError as e:
+            raise HTTPException(400, f"Malformed multipart body: {e}")
+        return True
+
+    async def open(self) -> str:
+        """Read up to the start of the file and return its name."""
+        while self.filename is None and await self._feed():
+            pass
+        if self.filename is None:
+            raise HTTPException(422, f"No file in field '{self.field}'")
+        return self.filename
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """The file's bytes as they arrive."""
+        while True:
+            while self._data:
+                yield self._data.pop(0)
+            if self.done:
+                return
+            if not await self._feed():
+                raise HTTPException(400, "Upload ended before the file did")
+
+
+async def finish_upload(
+    video_id: str, filename: str, tmp_path: Path, content_hash: str, size: int
+) -> VideoInfo:
+    """Store a complete upload by hash, probe it and register the video."""
+    ext = upload_ext(filename)
     video_dir = UPLOADS_DIR / video_id
-    video_dir.mkdir(parents=True, exist_ok=True)
     video_path = video_dir / f"video{ext}"
 
-    # Save uploaded file
-    content = await file.read()
-    video_path.write_bytes(content)
+    # Identical uploads share one file on disk
+    if store_blob(tmp_path, content_hash, ext, video_path):
+        logger.info(f"Upload {video_id} matches stored blob {content_hash[:12]}")
 
     # Get video info
     try:
-        info = get_video_info(video_path)
+        info = await probe_video(video_path)
     except Exception as e:
         shutil.rmtree(video_dir, ignore_errors=True)
+        prune_blob(content_hash, ext)
         raise HTTPException(400, f"Invalid video file: {e}")
 
     video_info = VideoInfo(
         id=video_id,
-        name=file.filename,
+        name=filename,
         path=str(video_path),
         duration=info["duration"],
         fps=info["fps"],
         width=info["width"],
         height=info["height"],
-        size=len(content),
+        size=size,
+        frameCount=info["frameCount"],
+        codec=info["codec"],
+        pixFmt=info["pixFmt"],
+        rotation=info["rotation"],
+        hasAudio=info["hasAudio"],
+        keyframeInterval=info["keyframeInterval"],
     )
 
-    videos[video_id] = VideoData(info=video_info, path=video_path)
-    logger.info(f"Uploaded video: {video_id} - {file.filename}")
+    videos[video_id] = VideoData(
+        info=video_info, path=video_path, content_hash=content_hash
+    )
+    logger.info(f"Uploaded video: {video_id} - {filename}")
 
     return video_info
+
+
+@router.post("/upload", response_model=VideoInfo)
+async def upload_video(request: Request):
+    """Upload a video file, sent as the ``file`` field of a multipart form."""
+    # Refuse what can only be too large before reading any of it
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD:
+        raise HTTPException(413, f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+
+    file = FormFile(request, "file")
+    filename = await file.open()
+    video_id = str(uuid.uuid4())
+    upload_ext(filename)
+
+    video_dir = UPLOADS_DIR / video_id
+    video_dir.mkdir(parents=True, exist_ok=True)
+
+    # Stream the upload to disk, hashing it on the way
+    digest = hashlib.sha256()
+    tmp_path = video_dir / PART_FILE
+    try:
+        with open(tmp_path, "wb") as f:
+            size = await save_chunks(file.chunks(), f, digest, MAX_UPLOAD_BYTES)
+    except BaseException:
+        shutil.rmtree(video_dir, ignore_errors=True)
+        raise
+
+    return await finish_upload(video_id, filename, tmp_path, digest.hexdigest(), size)
+
+
+def get_session(upload_id: str) -> UploadSession:
+    """An upload session, reloaded from disk after a restart."""
+    session = upload_sessions.get(upload_id)
+    if session is not None:
+        return session
+
+    try:
+        uuid.UUID(upload_id)
+        upload_dir = UPLOADS_DIR / upload_id
+        meta = json.loads((upload_dir / SESSION_FILE).read_text())
+        offset = (upload_dir / PART_FILE).stat().st_size
+    except (ValueError, OSError):
+        raise HTTPException(404, "Upload not found")
+
+    # The running hash is gone, finalize hashes the file instead
+    session = UploadSession(
+        id=upload_id, filename=meta["filename"], size=meta["size"], offset=offset
+    )
+    upload_sessions[upload_id] = session
+    return session
+
+
+def session_status(session: UploadSession) -> dict:
+    return {
+        "uploadId": session.id,
+        "offset": session.offset,
+        "size": session.size,
+        "chunkSize": UPLOAD_CHUNK_SIZE,
+    }
+
+
+@router.post("/upload/init")
+async def init_upload(request: UploadInitRequest):
+    """Start a resumable upload."""
+    upload_ext(request.filename)
+    if request.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+
+    upload_id = str(uuid.uuid4())
+    upload_dir = UPLOADS_DIR / upload_id
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    (upload_dir / PART_FILE).touch()
+    (upload_dir / SESSION_FILE).write_text(
+        json.dumps({"filename": request.filename, "size": request.size})
+    )
+
+    session = UploadSession(
+        id=upload_id,
+        filename=request.filename,
+        size=request.size,
+        digest=hashlib.sha256(),
+    )
+    upload_sessions[upload_id] = session
+    logger.info(f"Started upload: {upload_id} - {request.filename}")
+    return session_status(session)
+
+
+@router.get("/upload/{upload_id}")
+async def get_upload_status(upload_id: str):
+    """Bytes received so far, where the next chunk must start."""
+    return session_status(get_session(upload_id))
+
+
+@router.put("/upload/{upload_id}")
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """Append the request body at ``offset``."""
+    session = get_session(upload_id)
+
+    async with session.lock:
+        if offset != session.offset:
+            raise HTTPException(
+                409, f"Offset mismatch: expected {session.offset}, got {offset}"
+            )
+
+        part_path = UPLOADS_DIR / upload_id / PART_FILE
+        if session.digest is None and session.offset == 0:
+            session.digest = hashlib.sha256()
+
+        # Without a running hash the bytes are still stored, finalize
+        # hashes the whole file
+        digest = session.digest or hashlib.sha256()
+        with open(part_path, "r+b") as f:
+            f.seek(offset)
+            try:
+                await save_chunks(request.stream(), f, digest, session.size - offset)
+            finally:
+                # Whatever arrived is kept, even if the client went away
+                session.offset = f.tell()
+                f.truncate()
+
+    return session_status(session)
+
+
+@router.post("/upload/{upload_id}/finalize", response_model=VideoInfo)
+async def finalize_upload(upload_id: str):
+    """Register a fully received upload as a video."""
+    session = get_session(upload_id)
+
+    async with session.lock:
+        if session.offset != session.size:
+            raise HTTPException(
+                400, f"Upload incomplete: {session.offset}/{session.size} bytes"
+            )
+
+        upload_dir = UPLOADS_DIR / upload_id
+        part_path = upload_dir / PART_FILE
+        if session.digest is not None:
+            content_hash = session.digest.hexdigest()
+        else:
+            loop = asyncio.get_event_loop()
+            content_hash = await loop.run_in_executor(None, hash_file, part_path)
+
+        upload_sessions.pop(upload_id, None)
+        (upload_dir / SESSION_FILE).unlink(missing_ok=True)
+        return await finish_upload(
+            upload_id, session.filename, part_path, content_hash, session.size
+        )
+
+
+@router.delete("/upload/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abandon a resumable upload and delete what was received."""
+    session = get_session(upload_id)
+    async with session.lock:
+        upload_sessions.pop(upload_id, None)
+        shutil.rmtree(UPLOADS_DIR / upload_id, ignore_errors=True)
+    return {"status": "deleted"}
@@ -9,6 +9,8 @@ import shutil
 from fastapi import APIRouter
 
 from ..config import UPLOADS_DIR
+from ..services.content_cache import prune_blob
+from ..services.previews import preview_cache
 from ..state import videos
 
 logger = logging.getLogger(__name__)
@@ -21,7 +23,10 @@ async def delete_video(video_id: str):
     if video_id in videos:
         video_dir = UPLOADS_DIR / video_id
         shutil.rmtree(video_dir, ignore_errors=True)
-        del videos[video_id]
+        video = videos.pop(video_id)
+        preview_cache.forget(video_id)
+        if video.content_hash:
+            prune_blob(video.content_hash, video.path.suffix)
         logger.info(f"Deleted video: {video_id}")
 
     return {"status": "deleted"}
@@ -3,13 +3,22 @@ Keira - Services
 Regis Architecture v2.9.0
 """
 
-from .ffmpeg import encode_video, extract_all_frames, extract_frame, get_video_info
+from .ffmpeg import (
+    encode_overlay,
+    encode_video,
+    extract_all_frames,
+    extract_crop_frames,
+    extract_segment_frames,
+    probe_video,
+)
 from .processing import run_processing
 
 __all__ = [
-    "get_video_info",
-    "extract_frame",
+    "probe_video",
     "extract_all_frames",
+    "extract_crop_frames",
+    "extract_segment_frames",
     "encode_video",
+    "encode_overlay",
     "run_processing",
 ]
@@ -0,0 +1,164 @@
+"""
+Keira - Content Cache
+Regis Architecture v2.9.0
+
+Content-addressed storage for uploads and finished results. Uploads are
+stored once per SHA-256 in BLOBS_DIR and hard-linked into their upload
+directory, so re-uploading the same file costs no extra disk. Finished
+outputs are cached under a key built from the video and mask hashes and
+every setting that changes the output pixels, so a repeated job can be
+answered without running it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from ..config import BLOBS_DIR, RESULT_CACHE_BYTES, RESULTS_DIR
+
+if TYPE_CHECKING:
+    from ..models import JobData
+
+logger = logging.getLogger(__name__)
+
+# ExportSettings fields that change the encoded output. I/O tuning and
+# the intermediate format only change how fast it is produced; the
+# pipeline does change pixels (roi crop windows are clamped differently)
+RESULT_SETTINGS = (
+    "quality",
+    "model",
+    "pipeline",
+    "inferenceMode",
+    "cropPadding",
+    "featherRadius",
+    "temporalDedup",
+    "dedupTolerance",
+)
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link ``src`` to ``dst``, copying across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_blob(tmp_path: Path, digest: str, ext: str, dest: Path) -> bool:
+    """
+    Move a hashed upload into the blob store and link it to ``dest``.
+
+    Returns:
+        True if an identical blob was already stored
+    """
+    BLOBS_DIR.mkdir(parents=True, exist_ok=True)
+    blob = BLOBS_DIR / f"{digest}{ext}"
+    existed = blob.exists()
+    if existed:
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, blob)
+    link_or_copy(blob, dest)
+    return existed
+
+
+def prune_blob(digest: str, ext: str) -> None:
+    """Remove a blob once no upload directory links to it anymore."""
+    blob = BLOBS_DIR / f"{digest}{ext}"
+    try:
+        if blob.stat().st_nlink <= 1:
+            blob.unlink()
+    except OSError:
+        pass
+
+
+def result_key(video_hash: str, mask_hash: str, job: "JobData") -> str:
+    """Cache key of a job's output."""
+    settings = job.settings.model_dump()
+    parts = {
+        "video": video_hash,
+        "mask": mask_hash,
+        "roi": job.roi.model_dump(),
+        "segments": [s.model_dump() for s in job.segments],
+        "settings": {name: settings[name] for name in RESULT_SETTINGS},
+    }
+    encoded = json.dumps(parts, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """
+    Finished outputs on disk, least recently used evicted over a byte budget.
+
+    Recency is the file's mtime, refreshed on every hit, so the LRU order
+    survives restarts without a separate index.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}.mp4"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Cached output for a key, None on a miss."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def store(self, key: str, output: Path) -> None:
+        """Add a finished output, then evict down to the budget."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / f".{key}.tmp"
+        tmp_path.unlink(missing_ok=True)
+        link_or_copy(output, tmp_path)
+        os.replace(tmp_path, self.path(key))
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until within budget."""
+        entries = []
+        for path in self.root.glob("*.mp4"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+
+        if evicted:
+            logger.info(f"Evicted {evicted} cached results")
+        return evicted
+
+
+result_cache = ResultCache(RESULTS_DIR, RESULT_CACHE_BYTES)
@@ -0,0 +1,152 @@
+"""
+Keira - Job Events
+Regis Architecture v2.9.0
+
+Push-based job progress for /process/events (SSE) and /process/ws. A
+stream starts with the job's full status, then sends progress deltas and
+stage changes as they happen, at most EVENTS_MAX_RATE times a second, and
+ends with a terminal event. Changes made in this process wake streams
+directly; the job is also re-read every EVENTS_POLL_INTERVAL so changes
+written by another API process (sqlite state backend) still arrive.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Iterator
+
+from ..config import EVENTS_HEARTBEAT, EVENTS_MAX_RATE, EVENTS_POLL_INTERVAL
+from .manifest import TERMINAL_STAGES
+from .scheduler import scheduler
+
+if TYPE_CHECKING:
+    from ..models import JobData
+    from .state_store import StateStore
+
+
+class JobEvents:
+    """Wakes event streams when a job changes in this process."""
+
+    def __init__(self):
+        self._changed: dict[str, asyncio.Event] = {}
+        self._watchers: dict[str, int] = {}
+
+    @contextmanager
+    def watch(self, job_id: str) -> Iterator[None]:
+        """Keep a job's event while a stream uses it, drop it after the last."""
+        self._watchers[job_id] = self._watchers.get(job_id, 0) + 1
+        try:
+            yield
+        finally:
+            self._watchers[job_id] -= 1
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+                self._changed.pop(job_id, None)
+
+    def changed(self, job_id: str) -> asyncio.Event:
+        """Event set by the next notify(); take it before reading the job."""
+        return self._changed.setdefault(job_id, asyncio.Event())
+
+    def notify(self, job_id: str) -> None:
+        # Waiters keep the set event, later ones get a fresh one
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+
+job_events = JobEvents()
+
+
+def job_status(job: "JobData") -> dict:
+    """Status of a job as returned by /process/status."""
+    response = {
+        "jobId": job.id,
+        "status": job.status.value,
+        "progress": job.progress.model_dump(),
+    }
+
+    if job.output_path:
+        response["outputUrl"] = f"/api/process/download/{job.id}"
+
+    if job.error:
+        response["error"] = job.error
+
+    if job.telemetry:
+        response["telemetry"] = job.telemetry
+
+    position = scheduler.queue_position(job.id)
+    if position is not None:
+        response["queuePosition"] = position
+        estimated_start = scheduler.estimated_start(job.id)
+        if estimated_start is not None:
+            response["estimatedStart"] = estimated_start
+
+    return response
+
+
+def progress_delta(last: dict, status: dict) -> dict:
+    """Progress fields and queue position that changed since ``last``."""
+    delta = {
+        key: value
+        for key, value in status["progress"].items()
+        if last["progress"].get(key) != value
+    }
+    if status.get("queuePosition") != last.get("queuePosition"):
+        delta["queuePosition"] = status.get("queuePosition")
+    return delta
+
+
+async def stream_job(
+    job_id: str,
+    jobs: "StateStore",
+    max_rate: float = EVENTS_MAX_RATE,
+    poll_interval: float = EVENTS_POLL_INTERVAL,
+    heartbeat: float = EVENTS_HEARTBEAT,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Events of one job until it finishes.
+
+    Yields:
+        ("stage", status) first and on every stage change,
+        ("progress", delta) for changed progress fields,
+        ("ping", {}) after ``heartbeat`` seconds without an event,
+        ("end", status) once the job completed, failed, settled as
+        cancelled or no longer exists
+    """
+    with job_events.watch(job_id):
+        last = None
+        last_sent = time.monotonic()
+        while True:
+            changed = job_events.changed(job_id)
+            job = jobs.get(job_id)
+            if job is None:
+                yield "end", {"jobId": job_id, "error": "Job not found"}
+                return
+
+            # A cancelled job ends once its pipeline has stopped and the
+            # status says so, not as soon as the flag is set
+            status = job_status(job)
+            if job.status in TERMINAL_STAGES:
+                yield "end", {**status, "cancelled": job.cancelled}
+                return
+
+            if last is None or status["status"] != last["status"]:
+                event = ("stage", status)
+            else:
+                delta = progress_delta(last, status)
+                event = ("progress", delta) if delta else None
+
+            if event is not None:
+                yield event
+                last = status
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= heartbeat:
+                yield "ping", {}
+                last_sent = time.monotonic()
+
+            # Updates in between are coalesced into the next delta
+            await asyncio.sleep(1 / max_rate)
+            try:
+                await asyncio.wait_for(changed.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -3,82 +3,177 @@ Keira - FFmpeg Utilities
 Regis Architecture v2.9.0
 """
 
+import asyncio
+import json
 import subprocess
 import sys
+from collections import OrderedDict
 from pathlib import Path
+from typing import Optional
 
+# Only the start of the file is read for keyframe positions
+KEYFRAME_PROBE_SECONDS = 30
 
-def run_ffprobe(args: list[str]) -> str:
-    """Run ffprobe command and return output."""
-    cmd = ["ffprobe", "-v", "error"] + args
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(f"ffprobe failed: {result.stderr}")
-    return result.stdout.strip()
-
-
-def get_video_info(path: Path) -> dict:
-    """Extract video metadata using ffprobe."""
-    duration = float(
-        run_ffprobe(
-            [
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "default=noprint_wrappers=1:nokey=1",
-                str(path),
-            ]
-        )
-    )
+PROBE_CACHE_SIZE = 64
 
-    fps_str = run_ffprobe(
-        [
-            "-select_streams",
-            "v:0",
-            "-show_entries",
-            "stream=r_frame_rate",
-            "-of",
-            "default=noprint_wrappers=1:nokey=1",
-            str(path),
-        ]
+# Last lines of ffmpeg's stderr kept in error messages
+STDERR_TAIL_LINES = 5
+
+# File identity -> probe result, least recently used first
+_probe_cache: OrderedDict[tuple[int, int, int, int], dict] = OrderedDict()
+
+
+def probe_command(path: Path) -> list[str]:
+    """One ffprobe run: container, streams and early video packet flags."""
+    return [
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        "-show_entries",
+        "packet=stream_index,pts_time,flags",
+        "-read_intervals",
+        f"%+{KEYFRAME_PROBE_SECONDS}",
+        str(path),
+    ]
+
+
+def parse_rate(rate: Optional[str]) -> float:
+    """ffprobe frame rate ("30000/1001" or "25"), 0 when unknown."""
+    if not rate:
+        return 0.0
+    num, _, den = rate.partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def stream_rotation(stream: dict) -> int:
+    """Display rotation in degrees, 0-359."""
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            return int(float(side_data["rotation"])) % 360
+    return int(float(stream.get("tags", {}).get("rotate", 0))) % 360
+
+
+def keyframe_interval(packets: list[dict], fps: float) -> Optional[int]:
+    """Average frames between keyframes, None with fewer than two seen."""
+    times = sorted(
+        float(p["pts_time"])
+        for p in packets
+        if "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A")
     )
-    if "/" in fps_str:
-        num, den = fps_str.split("/")
-        fps = float(num) / float(den)
-    else:
-        fps = float(fps_str) if fps_str else 30.0
-
-    dims = run_ffprobe(
-        [
-            "-select_streams",
-            "v:0",
-            "-show_entries",
-            "stream=width,height",
-            "-of",
-            "csv=p=0:s=x",
-            str(path),
-        ]
+    if len(times) < 2 or fps <= 0:
+        return None
+    return max(1, round((times[-1] - times[0]) / (len(times) - 1) * fps))
+
+
+def parse_probe(data: dict) -> dict:
+    """Video metadata from ffprobe JSON output."""
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise RuntimeError("ffprobe found no video stream")
+
+    fps = parse_rate(video.get("r_frame_rate")) or parse_rate(
+        video.get("avg_frame_rate")
     )
-    width, height = map(int, dims.split("x"))
+    fps = fps or 30.0
+    duration = float(data.get("format", {}).get("duration") or video["duration"])
+    frame_count = int(video.get("nb_frames") or 0) or round(duration * fps)
 
+    # ffmpeg applies the rotation when decoding, frames come out rotated
+    rotation = stream_rotation(video)
+    width, height = int(video["width"]), int(video["height"])
+    if rotation in (90, 270):
+        width, height = height, width
+
+    packets = [
+        p for p in data.get("packets", []) if p.get("stream_index") == video["index"]
+    ]
     return {
         "duration": duration,
         "fps": fps,
         "width": width,
         "height": height,
+        "frameCount": frame_count,
+        "codec": video.get("codec_name", ""),
+        "pixFmt": video.get("pix_fmt", ""),
+        "rotation": rotation,
+        "hasAudio": any(s.get("codec_type") == "audio" for s in streams),
+        "keyframeInterval": keyframe_interval(packets, fps),
     }
 
 
-def extract_frame(video_path: Path, time: float, output_path: Path) -> None:
-    """Extract a single frame from video."""
-    cmd = [
+def file_identity(path: Path) -> tuple[int, int, int, int]:
+    """
+    Changes whenever the file's content can have changed.
+
+    Hard links to one file share it, so deduplicated uploads are one entry.
+    """
+    stat = path.stat()
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+async def probe_video(path: Path) -> dict:
+    """
+    Extract video metadata with a single ffprobe run, without blocking.
+
+    Results are cached by file identity, so identical uploads and later
+    stages never probe the same file twice.
+    """
+    key = file_identity(path)
+    cached = _probe_cache.get(key)
+    if cached is not None:
+        _probe_cache.move_to_end(key)
+        return dict(cached)
+
+    process = await asyncio.create_subprocess_exec(
+        *probe_command(path),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {stderr.decode()}")
+
+    info = parse_probe(json.loads(stdout))
+    _probe_cache[key] = info
+    while len(_probe_cache) > PROBE_CACHE_SIZE:
+        _probe_cache.popitem(last=False)
+    return dict(info)
+
+
+def run_ffmpeg(cmd: list[str]) -> None:
+    """
+    Run an ffmpeg command to completion.
+
+    Raises:
+        RuntimeError: If ffmpeg exits non-zero, with the end of its stderr
+    """
+    # The version banner would crowd the error out of the tail
+    result = subprocess.run(
+        [cmd[0], "-hide_banner", *cmd[1:]],
+        capture_output=True,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+    )
+    if result.returncode != 0:
+        lines = result.stderr.decode(errors="replace").strip().splitlines()
+        tail = "\n".join(lines[-STDERR_TAIL_LINES:])
+        raise RuntimeError(f"ffmpeg failed (code {result.returncode}): {tail}")
+
+
+def frame_preview_command(video_path: Path, time: float) -> list[str]:
+    """ffmpeg command writing one JPEG frame at ``time`` to stdout."""
+    return [
         "ffmpeg",
-        "-y",
+        "-v",
+        "error",
         "-ss",
         str(time),
         "-i",
@@ -87,29 +182,131 @@ def extract_frame(video_path: Path, time: float, output_path: Path) -> None:
         "1",
         "-q:v",
         "2",
-        str(output_path),
+        "-f",
+        "image2pipe",
+        "-c:v",
+        "mjpeg",
+        "pipe:1",
     ]
-    subprocess.run(
-        cmd,
-        capture_output=True,
-        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-    )
 
 
-def extract_all_frames(video_path: Path, output_dir: Path) -> None:
+RAW_FILE = "frames.raw"
+RAW_SIDECAR = "frames.json"
+
+
+def frame_output_args(
+    output_dir: Path, fmt: str = "png", png_compression: Optional[int] = None
+) -> list[str]:
+    """ffmpeg output arguments writing frames in an intermediate format."""
+    if fmt == "raw":
+        return ["-f", "rawvideo", "-pix_fmt", "bgr24", str(output_dir / RAW_FILE)]
+    args = []
+    if fmt == "png" and png_compression is not None:
+        args += ["-compression_level", str(png_compression)]
+    return args + [str(output_dir / f"%06d.{fmt}")]
+
+
+def frame_input_args(
+    frames_dir: Path,
+    fps: float,
+    fmt: str = "png",
+    size: Optional[tuple[int, int]] = None,
+) -> list[str]:
+    """ffmpeg input arguments reading frames in an intermediate format."""
+    if fmt == "raw":
+        width, height = size
+        return [
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-s",
+            f"{width}x{height}",
+            "-framerate",
+            str(fps),
+            "-i",
+            str(frames_dir / RAW_FILE),
+        ]
+    return ["-framerate", str(fps), "-i", str(frames_dir / f"%06d.{fmt}")]
+
+
+def write_raw_sidecar(frames_dir: Path, width: int, height: int) -> int:
+    """
+    Describe an extracted raw frame file for the worker.
+
+    Returns:
+        Number of frames in the file
+    """
+    raw_path = frames_dir / RAW_FILE
+    count = raw_path.stat().st_size // (width * height * 3) if raw_path.exists() else 0
+    meta = {"count": count, "height": height, "width": width, "pix_fmt": "bgr24"}
+    (frames_dir / RAW_SIDECAR).write_text(json.dumps(meta))
+    return count
+
+
+def extract_all_frames(
+    video_path: Path,
+    output_dir: Path,
+    fmt: str = "png",
+    png_compression: Optional[int] = None,
+) -> None:
     """Extract all frames from video."""
     cmd = [
         "ffmpeg",
         "-y",
         "-i",
         str(video_path),
-        str(output_dir / "%06d.png"),
+        *frame_output_args(output_dir, fmt, png_compression),
     ]
-    subprocess.run(
-        cmd,
-        capture_output=True,
-        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-    )
+    run_ffmpeg(cmd)
+
+
+def extract_crop_frames(
+    video_path: Path,
+    output_dir: Path,
+    crop: tuple[int, int, int, int],
+    fmt: str = "png",
+    png_compression: Optional[int] = None,
+) -> None:
+    """Extract only a (x, y, width, height) region of every frame."""
+    x, y, width, height = crop
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(video_path),
+        "-vf",
+        f"crop={width}:{height}:{x}:{y}",
+        *frame_output_args(output_dir, fmt, png_compression),
+    ]
+    run_ffmpeg(cmd)
+
+
+def extract_segment_frames(
+    video_path: Path,
+    output_dir: Path,
+    start: float,
+    frame_count: int,
+    crop: Optional[tuple[int, int, int, int]] = None,
+    fmt: str = "png",
+    png_compression: Optional[int] = None,
+) -> None:
+    """Extract ``frame_count`` frames from ``start`` seconds, optionally cropped."""
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        str(start),
+        "-i",
+        str(video_path),
+        "-frames:v",
+        str(frame_count),
+    ]
+    if crop:
+        x, y, width, height = crop
+        cmd += ["-vf", f"crop={width}:{height}:{x}:{y}"]
+    cmd += frame_output_args(output_dir, fmt, png_compression)
+    run_ffmpeg(cmd)
 
 
 def encode_video(
@@ -119,15 +316,14 @@ def encode_video(
     output: Path,
     crf: int = 18,
     preset: str = "medium",
+    fmt: str = "png",
+    size: Optional[tuple[int, int]] = None,
 ) -> None:
-    """Encode frames back to video."""
+    """Encode frames back to video. Raw frames need their (width, height)."""
     cmd = [
         "ffmpeg",
         "-y",
-        "-framerate",
-        str(fps),
-        "-i",
-        str(frames_dir / "%06d.png"),
+        *frame_input_args(frames_dir, fps, fmt, size),
         "-i",
         str(audio_source),
         "-map",
@@ -146,8 +342,74 @@ def encode_video(
         "copy",
         str(output),
     ]
-    subprocess.run(
-        cmd,
-        capture_output=True,
-        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-    )
+    run_ffmpeg(cmd)
+
+
+def overlay_filter(
+    overlays: list[tuple[Path, float]], position: tuple[int, int]
+) -> str:
+    """
+    Filtergraph overlaying each frame sequence on input 0 from its start time.
+
+    Overlay input ``i + 1`` is shifted to start at its offset; outside the
+    sequence the original frames pass through untouched.
+    """
+    x, y = position
+    chains = []
+    main = "0:v"
+    for i, (_, start) in enumerate(overlays, start=1):
+        out = "v" if i == len(overlays) else f"v{i}"
+        chains.append(f"[{i}:v]setpts=PTS-STARTPTS+{start}/TB[s{i}]")
+        chains.append(f"[{main}][s{i}]overlay={x}:{y}:eof_action=pass[{out}]")
+        main = out
+    return ";".join(chains)
+
+
+def encode_overlay(
+    video_path: Path,
+    overlays: list[tuple[Path, float]],
+    position: tuple[int, int],
+    fps: float,
+    output: Path,
+    crf: int = 18,
+    preset: str = "medium",
+    fmt: str = "png",
+    size: Optional[tuple[int, int]] = None,
+) -> None:
+    """
+    Encode the original video with processed frames overlaid at ``position``.
+
+    Args:
+        video_path: Original video, also the audio source
+        overlays: (frames directory, start time in seconds) per sequence
+        position: Top-left of the processed frames in the original
+        fps: Frame rate of the processed frame sequences
+        output: Output video path
+        crf: x264 CRF
+        preset: x264 preset
+        fmt: Intermediate frame format of the sequences
+        size: (width, height) of the processed frames, needed for raw
+    """
+    cmd = ["ffmpeg", "-y", "-i", str(video_path)]
+    for frames_dir, _ in overlays:
+        cmd += frame_input_args(frames_dir, fps, fmt, size)
+    cmd += [
+        "-filter_complex",
+        overlay_filter(overlays, position),
+        "-map",
+        "[v]",
+        "-map",
+        "0:a?",
+        "-c:v",
+        "libx264",
+        "-crf",
+        str(crf),
+        "-preset",
+        preset,
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "copy",
+        str(output),
+    ]
+    run_ffmpeg(cmd)
@@ -0,0 +1,233 @@
+"""
+Keira - Job Manifest
+Regis Architecture v2.9.0
+
+Checkpoints each job to JOBS_DIR/<job_id>/manifest.json: its settings,
+whether frame extraction finished and how far inpainting got. Jobs are
+restored from their manifests when the API starts, so a job interrupted
+by a crash or restart can be resumed instead of started over.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from ..config import JOBS_DIR, MANIFEST_CHECKPOINT_INTERVAL
+from ..models import (
+    ROI,
+    ExportSettings,
+    JobData,
+    ProcessingProgress,
+    ProcessingStage,
+    TimeRange,
+    VideoData,
+    VideoInfo,
+)
+
+if TYPE_CHECKING:
+    from .state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+TERMINAL_STAGES = (
+    ProcessingStage.COMPLETE,
+    ProcessingStage.ERROR,
+    ProcessingStage.CANCELLED,
+)
+
+# job id -> time of the last throttled checkpoint
+_last_checkpoint: dict[str, float] = {}
+
+
+def manifest_path(job_id: str) -> Path:
+    return JOBS_DIR / job_id / MANIFEST_FILE
+
+
+def write_manifest(job_id: str, data: dict) -> None:
+    """Replace a manifest atomically, a crash never leaves half a file."""
+    path = manifest_path(job_id)
+    tmp_path = path.with_name(f".{MANIFEST_FILE}.tmp")
+    tmp_path.write_text(json.dumps(data, indent=2))
+    os.replace(tmp_path, path)
+
+
+def load_manifest(job_id: str) -> Optional[dict]:
+    """A job's manifest, None if missing or unreadable."""
+    try:
+        return json.loads(manifest_path(job_id).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def job_state(job: JobData) -> dict:
+    """The parts of a job that change while it runs."""
+    return {
+        "status": job.status.value,
+        "extracted": job.frames_extracted,
+        "framesDone": job.progress.currentFrame,
+        "totalFrames": job.progress.totalFrames,
+        "outputPath": str(job.output_path) if job.output_path else None,
+        "error": job.error,
+        "updatedAt": time.time(),
+    }
+
+
+def create_manifest(job: JobData, video: VideoData) -> None:
+    """Write the manifest for a new job."""
+    _last_checkpoint.pop(job.id, None)
+    write_manifest(
+        job.id,
+        {
+            "version": MANIFEST_VERSION,
+            "id": job.id,
+            "video": {
+                "path": str(video.path),
+                "info": video.info.model_dump(),
+                "hash": video.content_hash,
+            },
+            "roi": job.roi.model_dump(),
+            "maskPath": str(job.mask_path),
+            "settings": job.settings.model_dump(),
+            "segments": [s.model_dump() for s in job.segments],
+            "cacheKey": job.cache_key,
+            "priority": job.priority,
+            "createdAt": job.created_at,
+            **job_state(job),
+        },
+    )
+
+
+def update_manifest(job: JobData) -> None:
+    """Record the job's current state in its manifest."""
+    data = load_manifest(job.id)
+    if data is None:
+        return
+    data.update(job_state(job))
+    try:
+        write_manifest(job.id, data)
+    except OSError as e:
+        logger.warning(f"Could not update manifest for {job.id}: {e}")
+
+    if job.status in TERMINAL_STAGES:
+        _last_checkpoint.pop(job.id, None)
+    else:
+        _last_checkpoint[job.id] = time.monotonic()
+
+
+def checkpoint(job: JobData) -> None:
+    """update_manifest, at most once per checkpoint interval."""
+    last = _last_checkpoint.get(job.id)
+    if last is None or time.monotonic() - last >= MANIFEST_CHECKPOINT_INTERVAL:
+        update_manifest(job)
+
+
+def job_from_manifest(data: dict) -> JobData:
+    """Rebuild a job; one that was still running is marked interrupted."""
+    status = ProcessingStage(data["status"])
+    error = data.get("error")
+    if status not in TERMINAL_STAGES:
+        status = ProcessingStage.ERROR
+        error = "Interrupted by server restart"
+
+    output_path = data.get("outputPath")
+    if output_path and not Path(output_path).exists():
+        output_path = None
+
+    done = status == ProcessingStage.COMPLETE
+    return JobData(
+        id=data["id"],
+        video_id=data["video"]["info"]["id"],
+        roi=ROI(**data["roi"]),
+        mask_path=Path(data["maskPath"]),
+        settings=ExportSettings(**data["settings"]),
+        status=status,
+        progress=ProcessingProgress(
+            stage=status,
+            percent=100 if done else 0,
+            currentFrame=data.get("framesDone", 0),
+            totalFrames=data.get("totalFrames", 0),
+            message="Complete!" if done else (error or ""),
+        ),
+        output_path=Path(output_path) if output_path else None,
+        error=error,
+        segments=[TimeRange(**s) for s in data.get("segments", [])],
+        frames_extracted=data.get("extracted", False),
+        cache_key=data.get("cacheKey"),
+        priority=data.get("priority", 0),
+        created_at=data.get("createdAt", data.get("updatedAt", 0.0)),
+    )
+
+
+def restore_jobs(jobs: "StateStore", videos: "StateStore") -> int:
+    """
+    Load every job manifest under JOBS_DIR the state store doesn't have.
+
+    Source videos that still exist are restored too, so interrupted jobs
+    can be resumed.
+
+    Returns:
+        Number of jobs restored
+    """
+    restored = 0
+    for manifest in sorted(JOBS_DIR.glob(f"*/{MANIFEST_FILE}")):
+        job_id = manifest.parent.name
+        if job_id in jobs:
+            continue
+        data = load_manifest(job_id)
+        try:
+            job = job_from_manifest(data)
+        except (TypeError, KeyError, ValueError) as e:
+            logger.warning(f"Skipping unreadable manifest {manifest}: {e}")
+            continue
+
+        video = data["video"]
+        video_path = Path(video["path"])
+        if job.video_id not in videos and video_path.exists():
+            videos[job.video_id] = VideoData(
+                info=VideoInfo(**video["info"]),
+                path=video_path,
+                content_hash=video.get("hash"),
+            )
+
+        jobs[job_id] = job
+        if job.status.value != data["status"]:
+            update_manifest(job)
+        restored += 1
+
+    if restored:
+        logger.info(f"Restored {restored} jobs from manifests")
+    return restored
+
+
+def interrupt_orphans(jobs: "StateStore") -> int:
+    """
+    Mark jobs whose API process exited mid-run as interrupted.
+
+    Only the sqlite backend outlives a process; with it a job another worker
+    process is still running is left alone.
+
+    Returns:
+        Number of jobs marked
+    """
+    orphans = jobs.orphaned()
+    for job in orphans:
+        job.status = ProcessingStage.ERROR
+        job.error = "Interrupted by server restart"
+        job.progress = ProcessingProgress(
+            stage=ProcessingStage.ERROR,
+            currentFrame=job.progress.currentFrame,
+            totalFrames=job.progress.totalFrames,
+            message=job.error,
+        )
+        jobs.save(job)
+        update_manifest(job)
+
+    if orphans:
+        logger.info(f"Marked {len(orphans)} orphaned jobs interrupted")
+    return len(orphans)
@@ -0,0 +1,313 @@
+"""
+Keira - Metrics
+Regis Architecture v2.9.0
+
+Operational metrics served by /api/metrics in the Prometheus text format
+(version 0.0.4), kept in process without a client library. Counters and
+histograms are updated where the work happens; gauges for jobs per stage,
+queue depths, cache hit rates and disk usage are read on each scrape.
+With several API worker processes every process reports its own counters.
+"""
+
+import asyncio
+import math
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from ..config import (
+    METRICS_DISK_INTERVAL,
+    METRICS_DURATION_BUCKETS,
+    METRICS_FPS_BUCKETS,
+    METRICS_MODEL_LOAD_BUCKETS,
+    WORK_DIR,
+)
+from ..models import ProcessingStage
+from .content_cache import result_cache
+from .previews import preview_cache
+from .scheduler import scheduler
+
+if TYPE_CHECKING:
+    from .state_store import StateStore
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """One metric family, a value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for key, value in sorted(self._values.items()):
+            yield self.name, dict(zip(self.labels, key)), value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        """Mirror a count kept elsewhere, e.g. a cache's hit counter."""
+        self._values[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...],
+        labels: tuple[str, ...] = (),
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+        self._values[key] = self._values.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the body, unless it raises."""
+        start = time.monotonic()
+        yield
+        self.observe(time.monotonic() - start, **labels)
+
+    def count(self, **labels) -> int:
+        counts = self._counts.get(self._key(labels))
+        return counts[-1] if counts else 0
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for key, counts in sorted(self._counts.items()):
+            labels = dict(zip(self.labels, key))
+            for bound, count in zip(self.buckets, counts):
+                yield (
+                    f"{self.name}_bucket",
+                    {**labels, "le": format_value(bound)},
+                    count,
+                )
+            yield f"{self.name}_sum", labels, self._values[key]
+            yield f"{self.name}_count", labels, counts[-1]
+
+
+class Registry:
+    """The metric families of this process, rendered in definition order."""
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = [line for metric in self.metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_duration = registry.register(
+    Histogram(
+        "keira_stage_duration_seconds",
+        "Time a job spent in a pipeline stage, after its slot was granted.",
+        METRICS_DURATION_BUCKETS,
+        labels=("stage",),
+    )
+)
+job_fps = registry.register(
+    Histogram(
+        "keira_job_fps",
+        "Average inpainting throughput of a job in frames per second.",
+        METRICS_FPS_BUCKETS,
+    )
+)
+model_load = registry.register(
+    Histogram(
+        "keira_model_load_seconds",
+        "Time a worker took to load a model it did not have cached.",
+        METRICS_MODEL_LOAD_BUCKETS,
+    )
+)
+upload_bytes = registry.register(
+    Counter("keira_upload_bytes_total", "Upload bytes written to disk.")
+)
+upload_duration = registry.register(
+    Histogram(
+        "keira_upload_duration_seconds",
+        "Time to receive one upload body, a whole file or a resumable chunk.",
+        METRICS_DURATION_BUCKETS,
+    )
+)
+jobs_by_stage = registry.register(
+    Gauge("keira_jobs", "Jobs known to the API by stage.", labels=("stage",))
+)
+queue_depth = registry.register(
+    Gauge(
+        "keira_queue_depth",
+        "Jobs waiting for a job or stage slot.",
+        labels=("queue",),
+    )
+)
+slots_active = registry.register(
+    Gauge(
+        "keira_slots_active",
+        "Job and stage slots in use.",
+        labels=("queue",),
+    )
+)
+cache_requests = registry.register(
+    Counter(
+        "keira_cache_requests_total",
+        "Preview and result cache lookups.",
+        labels=("cache", "result"),
+    )
+)
+cache_hit_ratio = registry.register(
+    Gauge(
+        "keira_cache_hit_ratio",
+        "Fraction of cache lookups served from the cache.",
+        labels=("cache",),
+    )
+)
+work_dir_bytes = registry.register(
+    Gauge(
+        "keira_work_dir_bytes",
+        "Disk used by uploads, jobs and results under WORK_DIR.",
+    )
+)
+
+
+def disk_usage(root: Path) -> int:
+    """Bytes of the files under ``root``, hard links counted once."""
+    total = 0
+    seen: set[tuple[int, int]] = set()
+    pending = [root]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.st_nlink > 1 and stat.st_ino:
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in seen:
+                    continue
+                seen.add(inode)
+            total += stat.st_size
+    return total
+
+
+class DiskUsage:
+    """Disk usage of a directory, measured at most once per ``interval``."""
+
+    def __init__(self, root: Path, interval: float = METRICS_DISK_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.bytes = 0
+        self._measured: Optional[float] = None
+
+    async def get(self) -> int:
+        now = time.monotonic()
+        if self._measured is None or now - self._measured >= self.interval:
+            self._measured = now
+            loop = asyncio.get_event_loop()
+            self.bytes = await loop.run_in_executor(None, disk_usage, self.root)
+        return self.bytes
+
+
+work_dir_usage = DiskUsage(WORK_DIR)
+
+
+def record_cache(name: str, hits: int, misses: int) -> None:
+    cache_requests.set(hits, cache=name, result="hit")
+    cache_requests.set(misses, cache=name, result="miss")
+    lookups = hits + misses
+    cache_hit_ratio.set(hits / lookups if lookups else 0.0, cache=name)
+
+
+async def collect(jobs: "StateStore") -> str:
+    """Read the scrape-time gauges and render every metric."""
+    counts = jobs.count_by_status()
+    for stage in ProcessingStage:
+        jobs_by_stage.set(counts.get(stage.value, 0), stage=stage.value)
+
+    limiters = {"jobs": scheduler.jobs, **scheduler.stages}
+    for name, limiter in limiters.items():
+        queue_depth.set(limiter.waiting, queue=name)
+        slots_active.set(limiter.active, queue=name)
+
+    record_cache("preview", preview_cache.hits, preview_cache.misses)
+    record_cache("result", result_cache.hits, result_cache.misses)
+
+    work_dir_bytes.set(await work_dir_usage.get())
+    return registry.render()
@@ -0,0 +1,113 @@
+"""
+Keira - Frame Previews
+Regis Architecture v2.9.0
+
+JPEG frames for scrubbing in the ROI selector. Requested times snap to a
+PREVIEW_TIME_STEP grid so nearby scrub positions share one frame.
+Concurrent requests for the same frame share one ffmpeg run, at most
+PREVIEW_CONCURRENCY run at once, and results stay in an in-memory LRU
+bounded by both bytes and entry count.
+"""
+
+import asyncio
+import logging
+import subprocess
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+from ..config import (
+    PREVIEW_CACHE_BYTES,
+    PREVIEW_CACHE_COUNT,
+    PREVIEW_CONCURRENCY,
+)
+from .ffmpeg import frame_preview_command
+
+logger = logging.getLogger(__name__)
+
+
+def snap_time(time: float, duration: float, fps: float, step: float) -> float:
+    """Nearest grid time inside the video, before its last frame."""
+    last = max(0.0, duration - 1 / fps) if fps > 0 else max(0.0, duration)
+    snapped = round(min(max(time, 0.0), last) / step) * step
+    return round(min(snapped, last), 3)
+
+
+class PreviewCache:
+    """Single-flight, bounded cache of preview JPEGs by (video, time)."""
+
+    def __init__(
+        self,
+        max_bytes: int = PREVIEW_CACHE_BYTES,
+        max_count: int = PREVIEW_CACHE_COUNT,
+        concurrency: int = PREVIEW_CONCURRENCY,
+    ):
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, int], bytes] = OrderedDict()
+        self._inflight: dict[tuple[str, int], asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def get(self, video_id: str, video_path: Path, time: float) -> bytes:
+        """JPEG bytes of the frame at ``time`` (already snapped)."""
+        key = (video_id, round(time * 1000))
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._extract(key, video_path, time))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+
+        # One waiter going away must not cancel the others
+        return await asyncio.shield(task)
+
+    async def _extract(self, key: tuple[str, int], video_path: Path, time: float):
+        async with self._slots:
+            process = await asyncio.create_subprocess_exec(
+                *frame_preview_command(video_path, time),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                creationflags=(
+                    subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+                ),
+            )
+            data, stderr = await process.communicate()
+
+        if process.returncode != 0 or not data:
+            raise RuntimeError(f"Failed to extract frame: {stderr.decode().strip()}")
+
+        self._store(key, data)
+        return data
+
+    def _finished(self, key: tuple[str, int], task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Every waiter may have gone before a failure, retrieve it here so
+        # asyncio does not report it as never retrieved
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Preview {key} failed: {task.exception()}")
+
+    def _store(self, key: tuple[str, int], data: bytes) -> None:
+        self._entries[key] = data
+        self.bytes += len(data)
+        while self._entries and (
+            self.bytes > self.max_bytes or len(self._entries) > self.max_count
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def forget(self, video_id: str) -> None:
+        """Drop every cached frame of a deleted video."""
+        for key in [k for k in self._entries if k[0] == video_id]:
+            self.bytes -= len(self._entries.pop(key))
+
+
+preview_cache = PreviewCache()
@@ -4,182 +4,697 @@ Regis Architecture v2.9.0
 """
 
 import asyncio
+import json
 import logging
-import subprocess
-import sys
 from concurrent.futures import ThreadPoolExecutor
-from typing import TYPE_CHECKING
-
-from ..config import CRF_MAP, JOBS_DIR, PRESET_MAP, WORKER_DIR
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from ..config import (
+    CRF_MAP,
+    DEFAULT_MODEL,
+    FRAME_FORMAT,
+    JOBS_DIR,
+    MODEL_VARIANTS,
+    MODELS_DIR,
+    ORT_PROVIDERS,
+    PNG_COMPRESSION,
+    PRESET_MAP,
+    WORKER_DIR,
+    WORKER_POOL_SIZE,
+)
 from ..models import ProcessingProgress, ProcessingStage
-from .ffmpeg import encode_video, extract_all_frames
+from .content_cache import result_cache
+from .events import job_events
+from .ffmpeg import (
+    encode_overlay,
+    encode_video,
+    extract_all_frames,
+    extract_crop_frames,
+    extract_segment_frames,
+    write_raw_sidecar,
+)
+from .manifest import TERMINAL_STAGES, checkpoint, update_manifest
+from .metrics import job_fps, model_load, stage_duration
+from .scheduler import Withdrawn, scheduler
+from .worker_pool import (
+    CREATION_FLAGS,
+    StderrDrain,
+    find_worker_python,
+    worker_pool,
+)
 
 if TYPE_CHECKING:
-    from ..models import JobData, VideoData
+    from ..models import ROI, JobData, TimeRange, VideoData
+    from .state_store import StateStore
 
 logger = logging.getLogger(__name__)
 executor = ThreadPoolExecutor(max_workers=4)
 
+# Worker stderr of a job, in its job directory
+WORKER_LOG = "worker.log"
+
+# Jobs with a run_processing call still running in this process
+active_jobs: set[str] = set()
+
+
+def build_worker_args(
+    job: "JobData",
+    frames_dir: Path,
+    frames_out: Path,
+    model_path: Path,
+    origin: tuple[int, int] = (0, 0),
+    resume: bool = False,
+) -> list[str]:
+    """
+    Build the inpaint_worker.py command line arguments for a job.
+
+    ``origin`` is the top-left of the extracted frames in the source video,
+    non-zero when only a crop around the ROI was extracted. With ``resume``
+    the worker skips frames already written to ``frames_out``.
+    """
+    fmt, png_compression = frame_format(job)
+    resume_args = ["--skip-existing"] if resume else []
+    return [
+        "--frames",
+        str(frames_dir),
+        "--out",
+        str(frames_out),
+        "--ext",
+        f".{fmt}",
+        "--png-compression",
+        str(png_compression),
+        *resume_args,
+        *build_model_args(job, model_path, origin),
+    ]
+
+
+def frame_format(job: "JobData") -> tuple[str, int]:
+    """(intermediate frame format, PNG level) for a job, config as fallback."""
+    settings = job.settings
+    fmt = settings.frameFormat or FRAME_FORMAT
+    level = settings.pngCompression
+    return fmt, PNG_COMPRESSION if level is None else level
+
+
+def build_stream_args(
+    job: "JobData", video_data: "VideoData", output_path: Path, model_path: Path
+) -> list[str]:
+    """Build worker arguments that pipe the video through ffmpeg end to end."""
+    info = video_data.info
+    quality = job.settings.quality
+    return [
+        "--input-video",
+        str(video_data.path),
+        "--output-video",
+        str(output_path),
+        "--size",
+        f"{info.width}x{info.height}",
+        "--fps",
+        str(info.fps),
+        "--total-frames",
+        str(info.frameCount or round(info.duration * info.fps)),
+        "--crf",
+        str(CRF_MAP.get(quality, 18)),
+        "--preset",
+        PRESET_MAP.get(quality, "medium"),
+        *build_model_args(job, model_path),
+    ]
+
+
+def build_model_args(
+    job: "JobData", model_path: Path, origin: tuple[int, int] = (0, 0)
+) -> list[str]:
+    """Worker arguments for the mask, model and inference settings."""
+    roi = job.roi
+    settings = job.settings
+    session = settings.session
+
+    return [
+        "--roi",
+        f"{roi.x - origin[0]},{roi.y - origin[1]},{roi.width},{roi.height}",
+        "--model",
+        str(model_path),
+        "--mask",
+        str(job.mask_path),
+        "--batch-size",
+        str(settings.batchSize),
+        "--io-workers",
+        str(settings.ioWorkers),
+        "--decode-workers",
+        str(settings.decodeWorkers),
+        "--prefetch",
+        str(settings.prefetchDepth),
+        "--write-queue",
+        str(settings.writeQueueDepth),
+        "--shards",
+        str(settings.shards),
+        "--inference-mode",
+        settings.inferenceMode,
+        "--crop-padding",
+        str(settings.cropPadding),
+        "--feather",
+        str(settings.featherRadius),
+        "--dedup" if settings.temporalDedup else "--no-dedup",
+        "--dedup-tolerance",
+        str(settings.dedupTolerance),
+        "--intra-op-threads",
+        str(session.intraOpThreads),
+        "--inter-op-threads",
+        str(session.interOpThreads),
+        "--execution-mode",
+        session.executionMode,
+        "--graph-opt-level",
+        session.graphOptimization,
+        "--mem-arena" if session.memArena else "--no-mem-arena",
+        "--mem-pattern" if session.memPattern else "--no-mem-pattern",
+        "--providers",
+        ",".join(session.providers or ORT_PROVIDERS),
+        "--optimized-cache" if session.cacheOptimizedModel else "--no-optimized-cache",
+    ]
+
+
+def compute_roi_crop(
+    roi: "ROI", width: int, height: int, padding: int
+) -> tuple[int, int, int, int]:
+    """
+    Region of the frame to extract for ROI-only processing.
+
+    The ROI is padded with ``padding`` pixels of context for the model and
+    clamped to the frame. Edges are aligned to even pixels so the crop
+    overlays cleanly on 4:2:0 chroma.
+
+    Returns:
+        (x, y, width, height) of the crop
+    """
+    x1 = max(0, roi.x - padding) & ~1
+    y1 = max(0, roi.y - padding) & ~1
+    x2 = min(width, roi.x + roi.width + padding)
+    y2 = min(height, roi.y + roi.height + padding)
+    # Round the far edges up to even, unless that leaves the frame
+    x2 = min(width, x2 + (x2 - x1) % 2)
+    y2 = min(height, y2 + (y2 - y1) % 2)
+    return x1, y1, x2 - x1, y2 - y1
+
+
+def normalize_segments(
+    segments: list["TimeRange"], duration: float
+) -> list[tuple[float, float]]:
+    """
+    Clamp segments to the video, sort them and merge overlaps.
+
+    Raises:
+        ValueError: If a segment is empty or outside the video
+    """
+    spans = []
+    for segment in segments:
+        start = max(0.0, segment.start)
+        end = min(duration, segment.end)
+        if end <= start:
+            raise ValueError(
+                f"Invalid segment {segment.start}-{segment.end}s "
+                f"for a {duration:.1f}s video"
+            )
+        spans.append((start, end))
+
+    merged: list[tuple[float, float]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def segment_frames(segments: list["TimeRange"], fps: float) -> list[tuple[float, int]]:
+    """
+    Snap segments to frame boundaries.
+
+    Returns:
+        (start time of the first frame, frame count) per segment
+    """
+    spans = []
+    for segment in segments:
+        first = round(segment.start * fps)
+        count = round(segment.end * fps) - first
+        if count > 0:
+            spans.append((first / fps, count))
+    return spans
+
+
+def parse_event(line: str) -> Optional[dict]:
+    """A worker JSON-lines event, None for any other output."""
+    if not line.startswith("{"):
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) and "event" in event else None
 
-async def run_processing(
-    job_id: str,
-    jobs: dict[str, "JobData"],
-    videos: dict[str, "VideoData"],
+
+def parse_progress(
+    line: str, base: int = 25, span: float = 0.65
+) -> Optional[ProcessingProgress]:
+    """
+    Parse a worker progress event into overall job progress.
+
+    Worker percent is mapped to ``base + pct * span`` of the whole job, the
+    25-90% band by default, between frame extraction and encoding.
+    """
+    event = parse_event(line)
+    if event is None or event["event"] != "progress":
+        return None
+
+    try:
+        pct = int(event["percent"])
+        current = int(event["processed"])
+        total = int(event["total"])
+        fps = float(event["fps"])
+        eta = str(event["eta"])
+        hit_rate = float(event.get("hitRate") or 0.0)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    message = f"AI painting: {current}/{total} frames"
+    if hit_rate > 0:
+        message += f" ({hit_rate * 100:.0f}% reused)"
+
+    return ProcessingProgress(
+        stage=ProcessingStage.INPAINTING,
+        percent=base + int(pct * span),
+        currentFrame=current,
+        totalFrames=total,
+        fps=fps,
+        eta=eta,
+        message=message,
+        cacheHitRate=hit_rate,
+    )
+
+
+def parse_telemetry(line: str) -> Optional[dict]:
+    """
+    Parse a worker telemetry event into the job's stage breakdown.
+
+    Each stage gets ``share``, its fraction of the summed busy time.
+    """
+    event = parse_event(line)
+    if event is None or event["event"] != "telemetry":
+        return None
+
+    stages = event.get("stages")
+    if not isinstance(stages, dict):
+        return None
+    busy = sum(stage.get("busy", 0) for stage in stages.values())
+    return {
+        "elapsed": event.get("elapsed", 0.0),
+        "rss": event.get("rss"),
+        "final": event.get("final", False),
+        "stages": {
+            name: {**stage, "share": round(stage.get("busy", 0) / busy, 3)}
+            if busy
+            else {**stage, "share": 0.0}
+            for name, stage in stages.items()
+        },
+    }
+
+
+def save_job(jobs: "StateStore", job: "JobData") -> None:
+    """Persist a stage change to the state store and the job's manifest."""
+    jobs.save(job)
+    update_manifest(job)
+    job_events.notify(job.id)
+
+
+def record_progress(
+    jobs: "StateStore", job: "JobData", progress: ProcessingProgress
 ) -> None:
-    """Run the inpainting pipeline."""
-    if job_id not in jobs:
-        return
+    """Update a job's progress; the store and manifest write it batched."""
+    job.progress = progress
+    jobs.touch(job)
+    checkpoint(job)
+    job_events.notify(job.id)
 
-    job = jobs[job_id]
-    video_data = videos.get(job.video_id)
 
-    if not video_data:
-        job.status = ProcessingStage.ERROR
-        job.error = "Video not found"
+def handle_worker_line(
+    jobs: "StateStore", job: "JobData", line: str, band: tuple[int, float]
+) -> None:
+    """Apply one line of worker output to the job."""
+    progress = parse_progress(line, *band)
+    if progress:
+        record_progress(jobs, job, progress)
         return
 
-    job_dir = JOBS_DIR / job_id
-    frames_dir = job_dir / "frames"
-    frames_out = job_dir / "frames_out"
-
-    try:
-        # Stage 1: Extract frames
-        job.status = ProcessingStage.EXTRACTING
-        job.progress = ProcessingProgress(
-            stage=ProcessingStage.EXTRACTING,
-            percent=0,
-            message="Extracting frames...",
-        )
+    telemetry = parse_telemetry(line)
+    if telemetry:
+        job.telemetry = telemetry
+        jobs.touch(job)
+        return
 
-        frames_dir.mkdir(parents=True, exist_ok=True)
-        frames_out.mkdir(parents=True, exist_ok=True)
+    event = parse_event(line)
+    if event and event["event"] == "model" and not event.get("cached"):
+        model_load.observe(float(event.get("load", 0.0)))
 
-        # Run extraction in thread pool
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            executor, extract_all_frames, video_data.path, frames_dir
-        )
 
-        if job.cancelled:
-            return
+async def run_pooled_worker(
+    job_id: str,
+    job: "JobData",
+    jobs: "StateStore",
+    args: list[str],
+    band: tuple[int, float],
+) -> None:
+    """Run the inpainting stage on a warm service process."""
+    async with worker_pool.worker() as worker:
+        log_path = JOBS_DIR / job_id / WORKER_LOG
+        async for line in worker.run(job_id, args, log_path):
+            if job.cancelled:
+                worker.kill()
+                return
 
-        job.progress.percent = 25
-        job.progress.message = "Frames extracted"
+            handle_worker_line(jobs, job, line, band)
 
-        # Stage 2: Inpainting
-        job.status = ProcessingStage.INPAINTING
-        job.progress.stage = ProcessingStage.INPAINTING
-        job.progress.message = "Running AI inpainting..."
 
-        # Find worker python
-        worker_py = WORKER_DIR / ".venv" / "Scripts" / "python.exe"
-        if not worker_py.exists():
-            worker_py = WORKER_DIR / ".venv" / "bin" / "python"
-
-        if not worker_py.exists():
-            raise RuntimeError("Worker venv not found")
-
-        model_path = WORKER_DIR / "models" / "lama_fp32.onnx"
-        if not model_path.exists():
-            raise RuntimeError("Model not found")
-
-        # Build inpainting command
-        roi = job.roi
-        cmd = [
-            str(worker_py),
-            str(WORKER_DIR / "inpaint_worker.py"),
-            "--frames",
-            str(frames_dir),
-            "--out",
-            str(frames_out),
-            "--roi",
-            f"{roi.x},{roi.y},{roi.width},{roi.height}",
-            "--model",
-            str(model_path),
-            "--mask",
-            str(job.mask_path),
-            "--ext",
-            ".png",
-            "--batch-size",
-            str(job.settings.batchSize),
-            "--io-workers",
-            str(job.settings.ioWorkers),
-        ]
-
-        # Run inpainting with progress parsing
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-        )
+async def run_worker_process(
+    job: "JobData", jobs: "StateStore", args: list[str], band: tuple[int, float]
+) -> None:
+    """Run the inpainting stage in a fresh worker process."""
+    cmd = [
+        str(find_worker_python()),
+        str(WORKER_DIR / "inpaint_worker.py"),
+        *args,
+    ]
+
+    # Run inpainting, reading events and stderr side by side
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        creationflags=CREATION_FLAGS,
+    )
+    stderr = StderrDrain(process.stderr)
+    stderr.attach(JOBS_DIR / job.id / WORKER_LOG)
 
+    try:
         async for line in process.stdout:
             if job.cancelled:
                 process.terminate()
                 return
 
-            line_str = line.decode().strip()
-            if line_str.startswith("PROGRESS:"):
-                try:
-                    parts = line_str.split(":")
-                    if len(parts) >= 7:
-                        pct = int(parts[1])
-                        current = int(parts[2])
-                        total = int(parts[3])
-                        fps = float(parts[4])
-                        eta = parts[5]
-
-                        # Map 0-100% to 25-90%
-                        overall_pct = 25 + int(pct * 0.65)
-                        job.progress = ProcessingProgress(
-                            stage=ProcessingStage.INPAINTING,
-                            percent=overall_pct,
-                            currentFrame=current,
-                            totalFrames=total,
-                            fps=fps,
-                            eta=eta,
-                            message=f"AI painting: {current}/{total} frames",
-                        )
-                except Exception:
-                    pass
+            handle_worker_line(jobs, job, line.decode().strip(), band)
 
         await process.wait()
+        await stderr.wait()
+    finally:
+        stderr.detach()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Inpainting failed: {stderr.text}")
+
+
+def resolve_model(job: "JobData") -> Path:
+    """Path of the job's LaMa model variant."""
+    model_path = MODELS_DIR / MODEL_VARIANTS.get(
+        job.settings.model, MODEL_VARIANTS[DEFAULT_MODEL]
+    )
+    if not model_path.exists():
+        raise RuntimeError(f"Model not found: {job.settings.model}")
+    return model_path
+
+
+async def run_inpainting(
+    job_id: str,
+    job: "JobData",
+    jobs: "StateStore",
+    args: list[str],
+    band: tuple[int, float] = (25, 0.65),
+) -> None:
+    """Run the worker on a warm service process, or a fresh one if pooling is off."""
+    async with scheduler.stage("inpaint", job_id, job.priority):
+        job.status = ProcessingStage.INPAINTING
+        job.progress.stage = ProcessingStage.INPAINTING
+        job.progress.message = "Running AI inpainting..."
+        save_job(jobs, job)
+
+        with stage_duration.time(stage="inpaint"):
+            if WORKER_POOL_SIZE > 0:
+                await run_pooled_worker(job_id, job, jobs, args, band)
+            else:
+                await run_worker_process(job, jobs, args, band)
+
+    if not job.cancelled and job.progress.fps:
+        job_fps.observe(job.progress.fps)
+
+
+async def extract_job_frames(
+    job: "JobData",
+    jobs: "StateStore",
+    video_data: "VideoData",
+    frames_dir: Path,
+    spans: list[tuple[float, int]],
+    crop: Optional[tuple[int, int, int, int]],
+    size: tuple[int, int],
+) -> None:
+    """Extract the frames a job inpaints, one subdirectory per segment."""
+    fmt, png_compression = frame_format(job)
+
+    job.status = ProcessingStage.EXTRACTING
+    job.progress = ProcessingProgress(
+        stage=ProcessingStage.EXTRACTING,
+        percent=0,
+        message="Extracting frames...",
+    )
+    save_job(jobs, job)
+
+    frames_dir.mkdir(parents=True, exist_ok=True)
+
+    # Run extraction in thread pool
+    loop = asyncio.get_event_loop()
+    if spans:
+        for i, (start, count) in enumerate(spans):
+            segment_dir = frames_dir / f"seg_{i:03d}"
+            segment_dir.mkdir(exist_ok=True)
+            await loop.run_in_executor(
+                executor,
+                extract_segment_frames,
+                video_data.path,
+                segment_dir,
+                start,
+                count,
+                crop,
+                fmt,
+                png_compression,
+            )
+            if fmt == "raw":
+                write_raw_sidecar(segment_dir, *size)
+            if job.cancelled:
+                return
+    elif crop:
+        await loop.run_in_executor(
+            executor,
+            extract_crop_frames,
+            video_data.path,
+            frames_dir,
+            crop,
+            fmt,
+            png_compression,
+        )
+    else:
+        await loop.run_in_executor(
+            executor,
+            extract_all_frames,
+            video_data.path,
+            frames_dir,
+            fmt,
+            png_compression,
+        )
+
+    if fmt == "raw" and not spans:
+        write_raw_sidecar(frames_dir, *size)
 
-        if process.returncode != 0:
-            stderr = await process.stderr.read()
-            raise RuntimeError(f"Inpainting failed: {stderr.decode()}")
 
+async def run_frame_files(
+    job_id: str,
+    job: "JobData",
+    jobs: "StateStore",
+    video_data: "VideoData",
+    job_dir: Path,
+    output_path: Path,
+    resume: bool = False,
+) -> None:
+    """
+    Extract frames to disk, inpaint them, then encode the result.
+
+    Frames are stored in the job's intermediate format (PNG, BMP or one
+    memory-mapped raw file per directory).
+
+    In ``roi`` pipeline mode only a padded crop around the ROI is extracted
+    and inpainted, and the crops are overlaid on the original when encoding.
+    With time segments only their frames are extracted, each into its own
+    subdirectory, and the rest of the video passes through the encode.
+
+    When resuming, extraction is skipped if it completed before and the
+    worker only inpaints frames missing from ``frames_out``.
+    """
+    frames_dir = job_dir / "frames"
+    frames_out = job_dir / "frames_out"
+    settings = job.settings
+    info = video_data.info
+
+    fmt, png_compression = frame_format(job)
+
+    crop = None
+    if settings.pipeline == "roi":
+        crop = compute_roi_crop(job.roi, info.width, info.height, settings.cropPadding)
+    size = crop[2:] if crop else (info.width, info.height)
+
+    loop = asyncio.get_event_loop()
+    spans = segment_frames(job.segments, info.fps)
+    overlays = [
+        (frames_out / f"seg_{i:03d}", start) for i, (start, _) in enumerate(spans)
+    ]
+
+    # Stage 1: Extract frames
+    if resume and job.frames_extracted:
+        logger.info(f"Resuming job {job_id}, frames already extracted")
+    else:
+        async with scheduler.stage("extract", job_id, job.priority):
+            with stage_duration.time(stage="extract"):
+                await extract_job_frames(
+                    job, jobs, video_data, frames_dir, spans, crop, size
+                )
         if job.cancelled:
             return
+        job.frames_extracted = True
+        save_job(jobs, job)
+
+    frames_out.mkdir(parents=True, exist_ok=True)
+
+    job.progress.percent = 25
+    job.progress.message = "Frames extracted"
 
-        # Stage 3: Encode video
+    # Stage 2: Inpainting
+    model_path = resolve_model(job)
+    origin = crop[:2] if crop else (0, 0)
+    await run_inpainting(
+        job_id,
+        job,
+        jobs,
+        build_worker_args(job, frames_dir, frames_out, model_path, origin, resume),
+    )
+
+    if job.cancelled:
+        return
+
+    # Stage 3: Encode video
+    async with scheduler.stage("encode", job_id, job.priority):
         job.status = ProcessingStage.ENCODING
         job.progress = ProcessingProgress(
             stage=ProcessingStage.ENCODING,
             percent=90,
             message="Encoding video...",
         )
+        save_job(jobs, job)
+
+        crf = CRF_MAP.get(settings.quality, 18)
+        preset = PRESET_MAP.get(settings.quality, "medium")
+
+        with stage_duration.time(stage="encode"):
+            if crop or overlays:
+                await loop.run_in_executor(
+                    executor,
+                    encode_overlay,
+                    video_data.path,
+                    overlays or [(frames_out, 0.0)],
+                    origin,
+                    info.fps,
+                    output_path,
+                    crf,
+                    preset,
+                    fmt,
+                    size,
+                )
+            else:
+                await loop.run_in_executor(
+                    executor,
+                    encode_video,
+                    frames_out,
+                    info.fps,
+                    video_data.path,
+                    output_path,
+                    crf,
+                    preset,
+                    fmt,
+                    size,
+                )
+
+
+async def run_stream(
+    job_id: str,
+    job: "JobData",
+    jobs: "StateStore",
+    video_data: "VideoData",
+    output_path: Path,
+) -> None:
+    """Pipe the video decoder -> worker -> encoder, no frames touch the disk."""
+    model_path = resolve_model(job)
+    # Decode, inference and encode overlap, so the worker covers 0-99%
+    await run_inpainting(
+        job_id,
+        job,
+        jobs,
+        build_stream_args(job, video_data, output_path, model_path),
+        band=(0, 0.99),
+    )
+
 
-        output_path = job_dir / "output.mp4"
+async def run_processing(
+    job_id: str,
+    jobs: "StateStore",
+    videos: "StateStore",
+    resume: bool = False,
+) -> None:
+    """
+    Run the inpainting pipeline.
 
-        crf = CRF_MAP.get(job.settings.quality, 18)
-        preset = PRESET_MAP.get(job.settings.quality, "medium")
+    With ``resume`` a frame-file job continues from its checkpoint; a
+    streaming job has nothing on disk to resume from and starts over.
+    """
+    if job_id not in jobs:
+        return
 
-        await loop.run_in_executor(
-            executor,
-            encode_video,
-            frames_out,
-            video_data.info.fps,
-            video_data.path,
-            output_path,
-            crf,
-            preset,
-        )
+    job = jobs[job_id]
+    video_data = videos.get(job.video_id)
+
+    if not video_data:
+        job.status = ProcessingStage.ERROR
+        job.error = "Video not found"
+        save_job(jobs, job)
+        return
+
+    job_dir = JOBS_DIR / job_id
+    output_path = job_dir / "output.mp4"
+    active_jobs.add(job_id)
+
+    try:
+        # Waits in line while other jobs hold the slots
+        async with scheduler.job(job_id, job.priority) as run:
+            if job.cancelled:
+                return
+            if job.settings.pipeline == "stream":
+                await run_stream(job_id, job, jobs, video_data, output_path)
+            else:
+                await run_frame_files(
+                    job_id, job, jobs, video_data, job_dir, output_path, resume
+                )
+            run.finished = not job.cancelled
 
         if job.cancelled:
             return
 
+        # Never complete, or cache, a missing or empty output
+        if not output_path.exists() or output_path.stat().st_size == 0:
+            raise RuntimeError("Encoding produced no output")
+
         # Complete
         job.status = ProcessingStage.COMPLETE
         job.output_path = output_path
@@ -188,9 +703,18 @@ async def run_processing(
             percent=100,
             message="Complete!",
         )
+        if job.cache_key:
+            try:
+                result_cache.store(job.cache_key, output_path)
+            except OSError as e:
+                logger.warning(f"Could not cache result of {job_id}: {e}")
 
         logger.info(f"Job completed: {job_id}")
 
+    except Withdrawn:
+        # Cancelled while waiting in a queue, settled below
+        logger.info(f"Job left the queue: {job_id}")
+
     except Exception as e:
         logger.exception(f"Job failed: {job_id}")
         job.status = ProcessingStage.ERROR
@@ -199,3 +723,16 @@ async def run_processing(
             stage=ProcessingStage.ERROR,
             message=str(e),
         )
+
+    finally:
+        # A cancelled job settles once its pipeline has actually stopped
+        if job.cancelled and job.status not in TERMINAL_STAGES:
+            job.status = ProcessingStage.CANCELLED
+            job.progress = ProcessingProgress(
+                stage=ProcessingStage.CANCELLED,
+                currentFrame=job.progress.currentFrame,
+                totalFrames=job.progress.totalFrames,
+                message="Cancelled",
+            )
+        active_jobs.discard(job_id)
+        save_job(jobs, job)
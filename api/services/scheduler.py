@@ -0,0 +1,178 @@
+"""
+Keira - Job Scheduler
+Regis Architecture v2.9.0
+
+Admission control for processing jobs. At most MAX_CONCURRENT_JOBS run at
+once and each stage (extract, inpaint, encode) has its own limit in
+STAGE_LIMITS, so a burst of requests queues instead of starting every
+ffmpeg and worker at the same time. Waiters are served by priority, then
+first come first served.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from ..config import MAX_CONCURRENT_JOBS, STAGE_LIMITS
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest job in the moving average of job durations
+DURATION_SMOOTHING = 0.3
+
+
+class Withdrawn(Exception):
+    """Raised to a waiter whose job left the queue, e.g. on cancel."""
+
+
+class PriorityLimiter:
+    """Semaphore whose waiters are woken by priority, FIFO within one."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self._waiters: list[tuple[int, int, str, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def withdraw(self, job_id: str) -> bool:
+        """Take a waiting job out of line, its acquire() raises Withdrawn."""
+        for entry in self._waiters:
+            if entry[2] == job_id and not entry[3].done():
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                entry[3].set_exception(Withdrawn(job_id))
+                return True
+        return False
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place of a waiting job in line, None if not waiting."""
+        for index, (_, _, waiter_id, _) in enumerate(sorted(self._waiters)):
+            if waiter_id == job_id:
+                return index + 1
+        return None
+
+    async def acquire(self, job_id: str, priority: int = 0) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (-priority, next(self._order), job_id, future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            # The slot is handed over by release(), active already counts it
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Cancelled right after being handed the slot, pass it on
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[3]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, job_id: str, priority: int = 0) -> AsyncIterator[None]:
+        await self.acquire(job_id, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class JobRun:
+    """A job's hold on a global slot, set ``finished`` once it ran through."""
+
+    def __init__(self):
+        self.finished = False
+
+
+class JobScheduler:
+    """Global job slots plus one limiter per pipeline stage."""
+
+    def __init__(self, max_jobs: int, stage_limits: dict[str, int]):
+        self.jobs = PriorityLimiter(max_jobs)
+        self.stages = {
+            name: PriorityLimiter(limit) for name, limit in stage_limits.items()
+        }
+        # Moving average of admitted job run time, None until one finishes
+        self.average_duration: Optional[float] = None
+
+    @asynccontextmanager
+    async def job(self, job_id: str, priority: int = 0) -> AsyncIterator["JobRun"]:
+        """
+        Hold one of the global job slots for the body. Only runs the body
+        marks finished count toward the average job duration, a cancelled
+        or failed one says nothing about how long jobs take.
+        """
+        async with self.jobs.slot(job_id, priority):
+            run = JobRun()
+            start = time.monotonic()
+            yield run
+            if run.finished:
+                self._record(time.monotonic() - start)
+
+    @asynccontextmanager
+    async def stage(
+        self, name: str, job_id: str, priority: int = 0
+    ) -> AsyncIterator[None]:
+        """Hold a slot of one stage, e.g. while ffmpeg extracts frames."""
+        async with self.stages[name].slot(job_id, priority):
+            yield
+
+    def withdraw(self, job_id: str) -> bool:
+        """Take a job out of the job queue or the stage queue it waits in."""
+        limiters = [self.jobs, *self.stages.values()]
+        return any([limiter.withdraw(job_id) for limiter in limiters])
+
+    def _record(self, duration: float) -> None:
+        if self.average_duration is None:
+            self.average_duration = duration
+        else:
+            self.average_duration += DURATION_SMOOTHING * (
+                duration - self.average_duration
+            )
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Place in the job queue, or in a stage queue once admitted."""
+        position = self.jobs.position(job_id)
+        if position is not None:
+            return position
+        for limiter in self.stages.values():
+            position = limiter.position(job_id)
+            if position is not None:
+                return position
+        return None
+
+    def estimated_start(self, job_id: str) -> Optional[float]:
+        """
+        Unix time a queued job is expected to start.
+
+        Jobs ahead of it finish in waves of ``limit`` at the average job
+        duration; None while nothing has finished to estimate from.
+        """
+        position = self.jobs.position(job_id)
+        if position is None or self.average_duration is None:
+            return None
+        waves = math.ceil(position / self.jobs.limit)
+        return time.time() + waves * self.average_duration
+
+
+scheduler = JobScheduler(MAX_CONCURRENT_JOBS, STAGE_LIMITS)
@@ -0,0 +1,436 @@
+"""
+Keira - State Store
+Regis Architecture v2.9.0
+
+Backends for the job and video state the routes and run_processing share.
+Both behave like a dict keyed by id, plus explicit persistence calls:
+
+  memory  a plain in-process dict, the state dies with the process
+  sqlite  one SQLite database in WAL mode, shared by every API worker
+          process on the host and kept across restarts
+
+Items are dataclasses mutated in place. ``save()`` writes one through at
+once, ``touch()`` marks it changed and writes every changed item in one
+transaction at most once per flush interval, so the progress loop does not
+cost a write per frame.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Generic, Iterator, Optional, TypeVar, Union
+
+from ..models import (
+    ROI,
+    ExportSettings,
+    JobData,
+    ProcessingProgress,
+    ProcessingStage,
+    TimeRange,
+    VideoData,
+    VideoInfo,
+)
+from .manifest import TERMINAL_STAGES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tells this process apart from an earlier one with the same host and pid,
+# e.g. PID 1 of a restarted container
+PROCESS_TOKEN = uuid.uuid4().hex
+
+
+@dataclass(frozen=True)
+class Codec(Generic[T]):
+    """How a store reads, writes and indexes one kind of item."""
+
+    encode: Callable[[T], dict]
+    decode: Callable[[dict], T]
+    # Indexed status, None for items without one
+    status: Callable[[T], Optional[str]]
+    created: Callable[[T], Optional[float]]
+    # Items that still change are kept live in the process that owns them
+    settled: Callable[[T], bool]
+
+
+def encode_job(job: JobData) -> dict:
+    return {
+        "id": job.id,
+        "videoId": job.video_id,
+        "roi": job.roi.model_dump(),
+        "maskPath": str(job.mask_path),
+        "settings": job.settings.model_dump(),
+        "status": job.status.value,
+        "progress": job.progress.model_dump(mode="json"),
+        "outputPath": str(job.output_path) if job.output_path else None,
+        "error": job.error,
+        "segments": [s.model_dump() for s in job.segments],
+        "extracted": job.frames_extracted,
+        "cacheKey": job.cache_key,
+        "priority": job.priority,
+        "createdAt": job.created_at,
+        "telemetry": job.telemetry,
+    }
+
+
+def decode_job(data: dict) -> JobData:
+    output_path = data.get("outputPath")
+    return JobData(
+        id=data["id"],
+        video_id=data["videoId"],
+        roi=ROI(**data["roi"]),
+        mask_path=Path(data["maskPath"]),
+        settings=ExportSettings(**data["settings"]),
+        status=ProcessingStage(data["status"]),
+        progress=ProcessingProgress(**data["progress"]),
+        output_path=Path(output_path) if output_path else None,
+        error=data.get("error"),
+        cancelled=data.get("cancelled", False),
+        segments=[TimeRange(**s) for s in data.get("segments", [])],
+        frames_extracted=data.get("extracted", False),
+        cache_key=data.get("cacheKey"),
+        priority=data.get("priority", 0),
+        created_at=data["createdAt"],
+        telemetry=data.get("telemetry"),
+    )
+
+
+def encode_video(video: VideoData) -> dict:
+    return {
+        "info": video.info.model_dump(),
+        "path": str(video.path),
+        "hash": video.content_hash,
+    }
+
+
+def decode_video(data: dict) -> VideoData:
+    return VideoData(
+        info=VideoInfo(**data["info"]),
+        path=Path(data["path"]),
+        content_hash=data.get("hash"),
+    )
+
+
+JOB_CODEC = Codec(
+    encode=encode_job,
+    decode=decode_job,
+    status=lambda job: job.status.value,
+    created=lambda job: job.created_at,
+    settled=lambda job: job.status in TERMINAL_STAGES,
+)
+
+# Videos never change after upload, every read goes to the database
+VIDEO_CODEC = Codec(
+    encode=encode_video,
+    decode=decode_video,
+    status=lambda video: None,
+    created=lambda video: None,
+    settled=lambda video: True,
+)
+
+
+class MemoryStore(dict):
+    """In-process state, persistence calls are no-ops."""
+
+    def __init__(self, codec: Codec):
+        super().__init__()
+        self.codec = codec
+
+    def save(self, item) -> None:
+        pass
+
+    def touch(self, item) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def set_cancelled(self, key: str, cancelled: bool) -> None:
+        self[key].cancelled = cancelled
+
+    def query(self, status: Optional[str] = None, limit: Optional[int] = None):
+        """Items newest first, optionally only those with ``status``."""
+        items = [
+            item
+            for item in self.values()
+            if status is None or self.codec.status(item) == status
+        ]
+        items.sort(key=lambda item: self.codec.created(item) or 0, reverse=True)
+        return items[:limit]
+
+    def count_by_status(self) -> dict[str, int]:
+        """Number of items in each status."""
+        return dict(Counter(self.codec.status(item) for item in self.values()))
+
+    def orphaned(self) -> list:
+        """Unsettled items of dead processes; none, they died with them."""
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+def process_owner() -> str:
+    """Owner string of this process, ``host:pid:token``."""
+    return f"{socket.gethostname()}:{os.getpid()}:{PROCESS_TOKEN}"
+
+
+def process_alive(owner: str) -> bool:
+    """
+    Whether a ``host:pid:token`` owner is still running, True for other hosts.
+
+    An owner with this process's host and pid but another token is a
+    previous process that happened to get the same pid, so it is dead.
+    """
+    host, pid, token = (owner.split(":") + ["", ""])[:3]
+    if host != socket.gethostname():
+        return True
+    if pid == str(os.getpid()):
+        return token == PROCESS_TOKEN
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class SQLiteStore(MutableMapping):
+    """
+    State in one table of a SQLite database, shared between processes.
+
+    Unsettled items saved by this process stay live: reads here return the
+    same object run_processing mutates, other processes read the last
+    written copy. The ``cancelled`` flag has its own column, changed only
+    through set_cancelled(), and is read back into live items on every
+    write so a cancel from another process reaches the running job.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        table: str,
+        codec: Codec,
+        flush_interval: float = 1.0,
+    ):
+        self.path = Path(path)
+        self.table = table
+        self.codec = codec
+        self.flush_interval = flush_interval
+        self.owner = process_owner()
+        self._live: dict[str, object] = {}
+        self._dirty: dict[str, object] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Routes run on the event loop, the test client on its own thread
+        self._db = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=5.0
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id TEXT PRIMARY KEY,
+                status TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                cancelled INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS {table}_status
+                ON {table} (status, created_at);
+            CREATE INDEX IF NOT EXISTS {table}_created ON {table} (created_at);
+            """
+        )
+
+    def _row(self, key: str, data: str, cancelled: int):
+        item = self.codec.decode({**json.loads(data), "cancelled": bool(cancelled)})
+        return self._live.get(key, item)
+
+    def _write(self, items: list) -> None:
+        """Upsert items in one transaction, reading back their cancel flags."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for key, item in items:
+                    settled = self.codec.settled(item)
+                    created = self.codec.created(item) or now
+                    cancelled = self._db.execute(
+                        f"""
+                        INSERT INTO {self.table}
+                            (id, status, created_at, updated_at, owner, data)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (id) DO UPDATE SET
+                            status = excluded.status,
+                            updated_at = excluded.updated_at,
+                            owner = excluded.owner,
+                            data = excluded.data
+                        RETURNING cancelled
+                        """,
+                        (
+                            key,
+                            self.codec.status(item),
+                            created,
+                            now,
+                            None if settled else self.owner,
+                            json.dumps(self.codec.encode(item)),
+                        ),
+                    ).fetchone()[0]
+                    if settled:
+                        self._live.pop(key, None)
+                    else:
+                        self._live[key] = item
+                        item.cancelled = bool(cancelled)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def __setitem__(self, key: str, item) -> None:
+        self._dirty.pop(key, None)
+        self._write([(key, item)])
+
+    def __getitem__(self, key: str):
+        if key in self._live:
+            return self._live[key]
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT data, cancelled FROM {self.table} WHERE id = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._row(key, *row)
+
+    def __contains__(self, key) -> bool:
+        if key in self._live:
+            return True
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT 1 FROM {self.table} WHERE id = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def __delitem__(self, key: str) -> None:
+        self._live.pop(key, None)
+        self._dirty.pop(key, None)
+        with self._lock:
+            deleted = self._db.execute(
+                f"DELETE FROM {self.table} WHERE id = ?", (key,)
+            ).rowcount
+        if not deleted:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id FROM {self.table} ORDER BY created_at"
+            ).fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def save(self, item) -> None:
+        """Write an item now, e.g. on a stage change."""
+        key = item.id
+        self._dirty.pop(key, None)
+        self._write([(key, item)])
+
+    def touch(self, item) -> None:
+        """Note a progress change, written with the next batch."""
+        self._dirty[item.id] = item
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write every touched item in one transaction."""
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        items = list(self._dirty.items())
+        self._dirty.clear()
+        self._write(items)
+
+    def set_cancelled(self, key: str, cancelled: bool) -> None:
+        with self._lock:
+            self._db.execute(
+                f"UPDATE {self.table} SET cancelled = ? WHERE id = ?",
+                (int(cancelled), key),
+            )
+        if key in self._live:
+            self._live[key].cancelled = cancelled
+
+    def query(self, status: Optional[str] = None, limit: Optional[int] = None):
+        """Items newest first, optionally only those with ``status``."""
+        sql = f"SELECT id, data, cancelled FROM {self.table}"
+        params: list = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [self._row(*row) for row in rows]
+
+    def count_by_status(self) -> dict[str, int]:
+        """Number of items in each status, from the status index."""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT status, COUNT(*) FROM {self.table} GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def orphaned(self) -> list:
+        """Unsettled items whose owning process on this host has exited."""
+        with self._lock:
+            rows = self._db.execute(
+                f"""
+                SELECT id, data, cancelled, owner FROM {self.table}
+                WHERE owner IS NOT NULL AND owner != ?
+                """,
+                (self.owner,),
+            ).fetchall()
+        return [
+            self._row(key, data, cancelled)
+            for key, data, cancelled, owner in rows
+            if not process_alive(owner)
+        ]
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+
+StateStore = Union[MemoryStore, SQLiteStore]
+
+
+def create_store(
+    backend: str, path: Path, table: str, codec: Codec, flush_interval: float
+):
+    """A state store for the configured backend."""
+    if backend == "sqlite":
+        return SQLiteStore(path, table, codec, flush_interval)
+    if backend != "memory":
+        raise ValueError(f"Unknown state backend: {backend}")
+    return MemoryStore(codec)
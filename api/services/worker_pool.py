@@ -0,0 +1,280 @@
+"""
+Keira - Worker Pool
+Regis Architecture v2.9.0
+
+Keeps a few inpainting service processes (worker/inpaint_service.py) warm
+so jobs skip interpreter start-up and model load. Each process runs one
+job at a time; a process that dies or is killed on cancel is replaced on
+the next job.
+
+Worker stderr is read as it arrives, never left to fill the pipe, and
+written to the log of the job running at the time.
+"""
+
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import IO, AsyncIterator, Optional
+
+from ..config import (
+    DEFAULT_MODEL,
+    MODEL_VARIANTS,
+    MODELS_DIR,
+    ORT_PROVIDERS,
+    WORKER_DIR,
+    WORKER_POOL_SIZE,
+    WORKER_PYTHON,
+)
+
+logger = logging.getLogger(__name__)
+
+CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+# Last stderr lines kept for error messages
+STDERR_TAIL_LINES = 20
+
+
+class StderrDrain:
+    """
+    Reads a worker's stderr in the background into the attached job log.
+
+    Keeps the last lines for error messages. A worker blocked writing to a
+    full stderr pipe would otherwise stall and never finish its job.
+    """
+
+    def __init__(self, stream: asyncio.StreamReader):
+        self.tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        self._log: Optional[IO[str]] = None
+        self._task = asyncio.ensure_future(self._drain(stream))
+
+    async def _drain(self, stream: asyncio.StreamReader) -> None:
+        async for raw in stream:
+            line = raw.decode(errors="replace").rstrip()
+            self.tail.append(line)
+            if self._log is not None:
+                self._log.write(line + "\n")
+            else:
+                logger.debug(f"worker: {line}")
+
+    def attach(self, path: Optional[Path]) -> None:
+        """Append following lines to ``path``, e.g. a job's worker.log."""
+        self.detach()
+        self.tail.clear()
+        if path is None:
+            return
+        try:
+            self._log = open(path, "a", encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Could not open worker log {path}: {e}")
+
+    def detach(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.tail)
+
+    async def wait(self) -> None:
+        """Wait until the stream is closed and fully read."""
+        await self._task
+
+
+def find_worker_python() -> Path:
+    """Locate the worker virtualenv interpreter, or WORKER_PYTHON if set."""
+    if WORKER_PYTHON:
+        return Path(WORKER_PYTHON)
+
+    worker_py = WORKER_DIR / ".venv" / "Scripts" / "python.exe"
+    if not worker_py.exists():
+        worker_py = WORKER_DIR / ".venv" / "bin" / "python"
+
+    if not worker_py.exists():
+        raise RuntimeError("Worker venv not found")
+
+    return worker_py
+
+
+def service_command() -> list[str]:
+    """Command line for one inpainting service process."""
+    cmd = [
+        str(find_worker_python()),
+        str(WORKER_DIR / "inpaint_service.py"),
+        "--providers",
+        ",".join(ORT_PROVIDERS),
+    ]
+    # Load the default model up front so the first job starts warm too
+    default_model = MODELS_DIR / MODEL_VARIANTS[DEFAULT_MODEL]
+    if default_model.exists():
+        cmd += ["--preload", str(default_model)]
+    return cmd
+
+
+class WarmWorker:
+    """One running inpainting service process."""
+
+    def __init__(self, process: asyncio.subprocess.Process, stderr: StderrDrain):
+        self.process = process
+        self.stderr = stderr
+        self.jobs = 0
+        self.busy = False
+        self._killed = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None and not self._killed
+
+    async def run(
+        self, job_id: str, args: list[str], log_path: Optional[Path] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send a job and yield its output lines until it finishes.
+
+        Args:
+            job_id: Job identifier, echoed back by the service
+            args: inpaint_worker.py arguments
+            log_path: File the job's stderr is appended to
+
+        Raises:
+            RuntimeError: If the job fails or the process exits mid-job
+        """
+        request = json.dumps({"id": job_id, "args": args}) + "\n"
+        try:
+            self.process.stdin.write(request.encode())
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise RuntimeError(f"Inpainting service unavailable: {e}") from e
+
+        self.jobs += 1
+        self.busy = True
+        self.stderr.attach(log_path)
+        try:
+            async for raw in self.process.stdout:
+                line = raw.decode().strip()
+                if line.startswith(f"DONE:{job_id}:"):
+                    self.busy = False
+                    return
+                if line.startswith(f"FAILED:{job_id}:"):
+                    self.busy = False
+                    message = line.split(":", 2)[2]
+                    raise RuntimeError(f"Inpainting failed: {message}")
+                yield line
+
+            await self.process.wait()
+            await self.stderr.wait()
+            raise RuntimeError(
+                f"Inpainting service exited unexpectedly "
+                f"(code {self.process.returncode}): {self.stderr.text}"
+            )
+        finally:
+            self.stderr.detach()
+
+    def kill(self) -> None:
+        """Stop the process immediately, e.g. when its job is cancelled."""
+        if self.alive:
+            self._killed = True
+            self.process.kill()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Ask the process to exit by closing stdin, kill it if it lingers."""
+        if self.process.returncode is not None:
+            return
+        if not self._killed:
+            self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of warm inpainting service processes.
+
+    Processes start lazily on first use and are reused across jobs. At most
+    ``size`` jobs run inference at once, later ones wait for a free process.
+    """
+
+    def __init__(self, size: int, command: Optional[list[str]] = None):
+        self.size = max(1, size)
+        self._command = command
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: list[WarmWorker] = []
+        self._workers: set[WarmWorker] = set()
+
+    @property
+    def started(self) -> int:
+        """Number of live service processes."""
+        return sum(1 for w in self._workers if w.alive)
+
+    async def _spawn(self) -> WarmWorker:
+        cmd = self._command or service_command()
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=CREATION_FLAGS,
+        )
+        stderr = StderrDrain(process.stderr)
+
+        # Wait until the model is loaded and the service accepts jobs
+        async for raw in process.stdout:
+            if raw.decode().strip() == "READY":
+                break
+        else:
+            await process.wait()
+            await stderr.wait()
+            raise RuntimeError(
+                f"Inpainting service failed to start "
+                f"(code {process.returncode}): {stderr.text}"
+            )
+
+        worker = WarmWorker(process, stderr)
+        self._workers.add(worker)
+        logger.info(f"Inpainting service started (pid {process.pid})")
+        return worker
+
+    @asynccontextmanager
+    async def worker(self) -> AsyncIterator[WarmWorker]:
+        """Borrow a warm process for one job, starting one if needed."""
+        async with self._slots:
+            worker = None
+            while self._idle and worker is None:
+                candidate = self._idle.pop()
+                if candidate.alive:
+                    worker = candidate
+                else:
+                    self._workers.discard(candidate)
+                    await candidate.close()
+            if worker is None:
+                worker = await self._spawn()
+
+            try:
+                yield worker
+            finally:
+                # A job abandoned mid-run would leak its output into the next
+                if worker.busy:
+                    worker.kill()
+                if worker.alive:
+                    self._idle.append(worker)
+                else:
+                    self._workers.discard(worker)
+                    await worker.close()
+
+    async def shutdown(self) -> None:
+        """Stop all service processes."""
+        workers = list(self._workers)
+        self._idle.clear()
+        self._workers.clear()
+        await asyncio.gather(*(w.close() for w in workers))
+
+
+worker_pool = WorkerPool(WORKER_POOL_SIZE)
@@ -3,8 +3,15 @@ Keira - Global State
 Regis Architecture v2.9.0
 """
 
-from .models import JobData, VideoData
+from .config import STATE_BACKEND, STATE_DB, STATE_FLUSH_INTERVAL
+from .models import UploadSession
+from .services.state_store import JOB_CODEC, VIDEO_CODEC, create_store
 
-# In-memory state
-videos: dict[str, VideoData] = {}
-jobs: dict[str, JobData] = {}
+# Job and video state, in memory or shared through SQLite (STATE_BACKEND)
+videos = create_store(
+    STATE_BACKEND, STATE_DB, "videos", VIDEO_CODEC, STATE_FLUSH_INTERVAL
+)
+jobs = create_store(STATE_BACKEND, STATE_DB, "jobs", JOB_CODEC, STATE_FLUSH_INTERVAL)
+
+# In-memory state, sessions are reloaded from their directories
+upload_sessions: dict[str, UploadSession] = {}
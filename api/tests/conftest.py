@@ -1,5 +1,5 @@
 import shutil
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -15,12 +15,18 @@ def client():
 
 @pytest.fixture
 def mock_video_info():
-    with patch("api.routes.upload.get_video_info") as mock:
+    with patch("api.routes.upload.probe_video", new_callable=AsyncMock) as mock:
         mock.return_value = {
             "duration": 120.5,
             "fps": 30.0,
             "width": 1920,
             "height": 1080,
+            "frameCount": 3615,
+            "codec": "h264",
+            "pixFmt": "yuv420p",
+            "rotation": 0,
+            "hasAudio": True,
+            "keyframeInterval": 60,
         }
         yield mock
 
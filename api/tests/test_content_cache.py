@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+
+from api.models import ROI, ExportSettings, JobData
+from api.services.content_cache import ResultCache, result_key
+
+
+def make_job(roi=(10, 20, 30, 40), **settings) -> JobData:
+    return JobData(
+        id="job-1",
+        video_id="video-1",
+        roi=ROI(x=roi[0], y=roi[1], width=roi[2], height=roi[3]),
+        mask_path=Path("mask.png"),
+        settings=ExportSettings(**settings),
+    )
+
+
+def test_result_key_ignores_speed_settings():
+    base = result_key("v", "m", make_job())
+
+    assert result_key("v", "m", make_job(batchSize=2, ioWorkers=8)) == base
+    assert result_key("v", "m", make_job(pipeline="roi")) != base
+    assert result_key("v", "m", make_job(frameFormat="raw", shards=4)) == base
+    assert result_key("v", "m", make_job(quality="draft")) != base
+    assert result_key("v", "m", make_job(model="int8")) != base
+    assert result_key("v", "m", make_job(roi=(0, 20, 30, 40))) != base
+    assert result_key("v", "other", make_job()) != base
+    assert result_key("other", "m", make_job()) != base
+
+
+def write_output(path: Path, size: int) -> Path:
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_result_cache_hit_and_miss(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=1000)
+
+    assert cache.lookup("key") is None
+    cache.store("key", write_output(tmp_path / "out.mp4", 10))
+    # The job's output can be deleted, the cache keeps its own link
+    (tmp_path / "out.mp4").unlink()
+
+    assert cache.lookup("key").read_bytes() == b"x" * 10
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=1000)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.store(key, write_output(tmp_path / f"{key}.mp4", 100))
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+    # Only two fit; a was stored first but used last
+    cache.max_bytes = 250
+    cache.lookup("a")
+
+    assert cache.evict() == 1
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None
+    assert cache.lookup("c") is not None
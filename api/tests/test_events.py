@@ -0,0 +1,142 @@
+import asyncio
+import json
+from pathlib import Path
+
+from fastapi import WebSocketDisconnect
+
+from api.models import ROI, ExportSettings, JobData, ProcessingProgress, ProcessingStage
+from api.routes.events import job_events_socket
+from api.services.events import job_events, progress_delta, stream_job
+from api.state import jobs
+
+
+def make_job(job_id: str, status=ProcessingStage.QUEUED) -> JobData:
+    return JobData(
+        id=job_id,
+        video_id="video-1",
+        roi=ROI(x=1, y=2, width=3, height=4),
+        mask_path=Path("mask.png"),
+        settings=ExportSettings(),
+        status=status,
+        progress=ProcessingProgress(stage=status),
+    )
+
+
+def test_progress_delta_only_has_changed_fields():
+    last = {"progress": {"percent": 10, "fps": 5.0}, "queuePosition": 2}
+    status = {"progress": {"percent": 20, "fps": 5.0}}
+
+    assert progress_delta(last, status) == {"percent": 20, "queuePosition": None}
+
+
+def test_stream_coalesces_updates_and_ends():
+    store = {"job-1": make_job("job-1")}
+    job = store["job-1"]
+
+    async def collect():
+        return [event async for event in stream_job("job-1", store, max_rate=20)]
+
+    async def run():
+        task = asyncio.ensure_future(collect())
+        await asyncio.sleep(0.01)
+
+        job.status = ProcessingStage.INPAINTING
+        job_events.notify("job-1")
+        for frame in range(1, 51):
+            job.progress = ProcessingProgress(
+                stage=ProcessingStage.INPAINTING,
+                currentFrame=frame,
+                totalFrames=50,
+                message="Running AI inpainting...",
+            )
+            job_events.notify("job-1")
+            await asyncio.sleep(0.002)
+
+        await asyncio.sleep(0.1)
+        job.status = ProcessingStage.COMPLETE
+        job.output_path = Path("output.mp4")
+        job_events.notify("job-1")
+        return await asyncio.wait_for(task, 2)
+
+    events = asyncio.run(run())
+    names = [name for name, _ in events]
+
+    assert names[0] == "stage"
+    assert events[0][1]["status"] == "queued"
+    assert "stage" in names[1:]
+    assert names[-1] == "end"
+    assert events[-1][1]["outputUrl"] == "/api/process/download/job-1"
+    # 50 updates in ~0.1s at 20 events a second
+    assert len(events) < 20
+    # Unchanged fields are not repeated
+    deltas = [data for name, data in events if name == "progress"]
+    assert all(set(delta) == {"currentFrame"} for delta in deltas)
+    assert events[-2] == ("progress", {"currentFrame": 50})
+
+
+def test_stream_ends_once_cancelled_job_settles():
+    store = {"job-1": make_job("job-1", ProcessingStage.INPAINTING)}
+    job = store["job-1"]
+
+    async def collect():
+        return [event async for event in stream_job("job-1", store, max_rate=100)]
+
+    async def run():
+        task = asyncio.ensure_future(collect())
+        job.cancelled = True
+        job_events.notify("job-1")
+        await asyncio.sleep(0.05)
+        assert not task.done()
+
+        job.status = ProcessingStage.CANCELLED
+        job_events.notify("job-1")
+        return await asyncio.wait_for(task, 2)
+
+    events = asyncio.run(run())
+
+    assert [name for name, _ in events] == ["stage", "end"]
+    assert events[-1][1]["status"] == "cancelled"
+    assert events[-1][1]["cancelled"] is True
+    assert "job-1" not in job_events._changed
+
+
+def test_websocket_disconnect_ends_quietly():
+    jobs["gone-job"] = make_job("gone-job", ProcessingStage.INPAINTING)
+
+    class ClosedSocket:
+        async def accept(self):
+            pass
+
+        async def send_json(self, data):
+            raise WebSocketDisconnect(1001)
+
+    asyncio.run(job_events_socket(ClosedSocket(), "gone-job"))
+
+    assert "gone-job" not in job_events._changed
+
+
+def test_sse_route(client):
+    jobs["sse-job"] = make_job("sse-job", ProcessingStage.ERROR)
+    jobs["sse-job"].error = "boom"
+
+    with client.stream("GET", "/api/process/events/sse-job") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        lines = [line for line in response.iter_lines() if line]
+
+    assert lines[0] == "event: end"
+    data = json.loads(lines[1].removeprefix("data: "))
+    assert data["status"] == "error"
+    assert data["error"] == "boom"
+
+    assert client.get("/api/process/events/missing").status_code == 404
+
+
+def test_websocket_route(client):
+    jobs["ws-job"] = make_job("ws-job", ProcessingStage.COMPLETE)
+
+    with client.websocket_connect("/api/process/ws/ws-job") as websocket:
+        message = websocket.receive_json()
+
+    assert message["event"] == "end"
+    assert message["data"]["status"] == "complete"
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from api.services.ffmpeg import (
+    encode_overlay,
+    extract_crop_frames,
+    extract_segment_frames,
+    frame_input_args,
+    frame_output_args,
+    overlay_filter,
+    parse_probe,
+    probe_video,
+    write_raw_sidecar,
+)
+
+
+def test_frame_output_args_png_level():
+    args = frame_output_args(Path("f"), "png", png_compression=1)
+
+    assert args[:2] == ["-compression_level", "1"]
+    assert args[-1].endswith("%06d.png")
+
+
+def test_frame_io_args_raw():
+    out = frame_output_args(Path("f"), "raw")
+    inp = frame_input_args(Path("f"), 25.0, "raw", size=(320, 240))
+
+    assert out[:4] == ["-f", "rawvideo", "-pix_fmt", "bgr24"]
+    assert out[-1].endswith("frames.raw")
+    assert inp[inp.index("-s") + 1] == "320x240"
+    assert inp[-1] == out[-1]
+
+
+def test_write_raw_sidecar_counts_frames(tmp_path):
+    (tmp_path / "frames.raw").write_bytes(bytes(4 * 2 * 3 * 5))
+
+    assert write_raw_sidecar(tmp_path, width=4, height=2) == 5
+    meta = json.loads((tmp_path / "frames.json").read_text())
+    assert meta == {"count": 5, "height": 2, "width": 4, "pix_fmt": "bgr24"}
+
+
+def test_overlay_filter_single_sequence():
+    graph = overlay_filter([(Path("out"), 0.0)], (16, 8))
+
+    assert graph == (
+        "[1:v]setpts=PTS-STARTPTS+0.0/TB[s1];[0:v][s1]overlay=16:8:eof_action=pass[v]"
+    )
+
+
+def test_overlay_filter_chains_segments_at_offsets():
+    graph = overlay_filter([(Path("a"), 0.0), (Path("b"), 42.5)], (0, 0))
+    chains = graph.split(";")
+
+    assert chains[2] == "[2:v]setpts=PTS-STARTPTS+42.5/TB[s2]"
+    assert chains[1].endswith("[v1]")
+    assert chains[3] == "[v1][s2]overlay=0:0:eof_action=pass[v]"
+
+
+PROBE_OUTPUT = {
+    "streams": [
+        {
+            "index": 0,
+            "codec_type": "video",
+            "codec_name": "h264",
+            "pix_fmt": "yuv420p",
+            "width": 1920,
+            "height": 1080,
+            "r_frame_rate": "30000/1001",
+            "nb_frames": "300",
+            "side_data_list": [{"rotation": -90}],
+        },
+        {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "10.010000"},
+    "packets": [
+        {"stream_index": 0, "pts_time": "0.000000", "flags": "K__"},
+        {"stream_index": 1, "pts_time": "0.500000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "1.001000", "flags": "___"},
+        {"stream_index": 0, "pts_time": "2.002000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "4.004000", "flags": "K__"},
+    ],
+}
+
+
+def test_parse_probe():
+    info = parse_probe(PROBE_OUTPUT)
+
+    assert info["fps"] == pytest.approx(29.97, abs=0.01)
+    assert info["duration"] == pytest.approx(10.01)
+    assert info["frameCount"] == 300
+    assert (info["codec"], info["pixFmt"]) == ("h264", "yuv420p")
+    # Decoded frames are rotated, so the display size is reported
+    assert info["rotation"] == 270
+    assert (info["width"], info["height"]) == (1080, 1920)
+    assert info["hasAudio"] is True
+    # Audio keyframes are ignored
+    assert info["keyframeInterval"] == 60
+
+
+def test_parse_probe_fallbacks():
+    data = {
+        "streams": [
+            {
+                "index": 0,
+                "codec_type": "video",
+                "width": 64,
+                "height": 48,
+                "r_frame_rate": "0/0",
+                "avg_frame_rate": "25/1",
+                "tags": {"rotate": "180"},
+            }
+        ],
+        "format": {"duration": "2.0"},
+    }
+
+    info = parse_probe(data)
+
+    assert info["fps"] == 25.0
+    assert info["frameCount"] == 50
+    assert (info["rotation"], info["width"]) == (180, 64)
+    assert info["hasAudio"] is False
+    assert info["keyframeInterval"] is None
+
+
+def test_probe_video_runs_once_per_file(tmp_path, monkeypatch):
+    """One ffprobe process per file identity, hard links included."""
+    calls = []
+
+    def fake_command(path):
+        calls.append(path)
+        code = f"print({json.dumps(json.dumps(PROBE_OUTPUT))})"
+        return [sys.executable, "-c", code]
+
+    monkeypatch.setattr("api.services.ffmpeg.probe_command", fake_command)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+    os.link(video, tmp_path / "copy.mp4")
+
+    first = asyncio.run(probe_video(video))
+    again = asyncio.run(probe_video(tmp_path / "copy.mp4"))
+    video.write_bytes(b"changed video")
+    changed = asyncio.run(probe_video(video))
+
+    assert first == again == changed
+    assert len(calls) == 2
+
+
+# Stand-in for ffmpeg that fails like it on a missing input file
+FAKE_FFMPEG = """#!{python}
+import os
+import sys
+
+args = sys.argv[1:]
+for flag, value in zip(args, args[1:]):
+    if flag == "-i" and "%" not in value and not os.path.exists(value):
+        print("ffmpeg version n6.0", file=sys.stderr)
+        print(f"{{value}}: No such file or directory", file=sys.stderr)
+        sys.exit(254)
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path
+
+
+def test_extract_crop_frames_raises_on_ffmpeg_failure(fake_ffmpeg):
+    with pytest.raises(RuntimeError, match="missing.mp4: No such file"):
+        extract_crop_frames(fake_ffmpeg / "missing.mp4", fake_ffmpeg, (0, 0, 8, 8))
+
+
+def test_extract_segment_frames_raises_on_ffmpeg_failure(fake_ffmpeg):
+    with pytest.raises(RuntimeError, match="missing.mp4: No such file"):
+        extract_segment_frames(fake_ffmpeg / "missing.mp4", fake_ffmpeg, 1.0, 25)
+
+
+def test_encode_overlay_raises_on_ffmpeg_failure(fake_ffmpeg):
+    frames = fake_ffmpeg / "frames_out"
+
+    with pytest.raises(RuntimeError, match=r"(?s)code 254.*missing.mp4"):
+        encode_overlay(
+            fake_ffmpeg / "missing.mp4",
+            [(frames, 0.0)],
+            (0, 0),
+            25.0,
+            fake_ffmpeg / "output.mp4",
+        )
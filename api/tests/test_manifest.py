@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import pytest
+
+from api.models import (
+    ROI,
+    ExportSettings,
+    JobData,
+    ProcessingStage,
+    TimeRange,
+    VideoData,
+    VideoInfo,
+)
+from api.services import manifest
+from api.services.manifest import (
+    checkpoint,
+    create_manifest,
+    load_manifest,
+    restore_jobs,
+    update_manifest,
+)
+
+
+@pytest.fixture
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("api.services.manifest.JOBS_DIR", tmp_path)
+    return tmp_path
+
+
+def make_video(path: Path) -> VideoData:
+    info = VideoInfo(
+        id="video-1",
+        name="clip.mp4",
+        path=str(path),
+        duration=10,
+        fps=30,
+        width=640,
+        height=360,
+        size=1024,
+    )
+    return VideoData(info=info, path=path)
+
+
+def make_job(jobs_dir: Path, status=ProcessingStage.EXTRACTING) -> JobData:
+    (jobs_dir / "job-1").mkdir(exist_ok=True)
+    return JobData(
+        id="job-1",
+        video_id="video-1",
+        roi=ROI(x=1, y=2, width=3, height=4),
+        mask_path=jobs_dir / "job-1" / "mask.png",
+        settings=ExportSettings(model="int8", frameFormat="raw"),
+        status=status,
+        segments=[TimeRange(start=1, end=2)],
+    )
+
+
+def test_manifest_round_trip(jobs_dir, tmp_path):
+    video_path = tmp_path / "clip.mp4"
+    video_path.write_bytes(b"video")
+    job = make_job(jobs_dir)
+    create_manifest(job, make_video(video_path))
+
+    job.frames_extracted = True
+    job.status = ProcessingStage.COMPLETE
+    job.progress.currentFrame = 30
+    update_manifest(job)
+
+    jobs, videos = {}, {}
+    assert restore_jobs(jobs, videos) == 1
+    restored = jobs["job-1"]
+    assert restored.status == ProcessingStage.COMPLETE
+    assert restored.frames_extracted
+    assert restored.settings.frameFormat == "raw"
+    assert restored.segments == [TimeRange(start=1, end=2)]
+    assert restored.progress.currentFrame == 30
+    assert videos["video-1"].path == video_path
+
+
+def test_restore_marks_running_jobs_interrupted(jobs_dir, tmp_path):
+    job = make_job(jobs_dir, ProcessingStage.INPAINTING)
+    # The upload is gone, the job is restored but not its video
+    create_manifest(job, make_video(tmp_path / "missing.mp4"))
+
+    jobs, videos = {}, {}
+    restore_jobs(jobs, videos)
+
+    assert jobs["job-1"].status == ProcessingStage.ERROR
+    assert jobs["job-1"].error == "Interrupted by server restart"
+    assert videos == {}
+    assert load_manifest("job-1")["status"] == "error"
+
+
+def test_restore_skips_unreadable_manifest(jobs_dir):
+    (jobs_dir / "job-2").mkdir()
+    (jobs_dir / "job-2" / manifest.MANIFEST_FILE).write_text("{not json")
+
+    jobs = {}
+    assert restore_jobs(jobs, {}) == 0
+
+
+def test_checkpoint_is_throttled(jobs_dir, tmp_path, monkeypatch):
+    job = make_job(jobs_dir, ProcessingStage.INPAINTING)
+    create_manifest(job, make_video(tmp_path / "clip.mp4"))
+    monkeypatch.setattr("api.services.manifest.MANIFEST_CHECKPOINT_INTERVAL", 60)
+
+    job.progress.currentFrame = 10
+    checkpoint(job)
+    job.progress.currentFrame = 20
+    checkpoint(job)
+
+    assert load_manifest("job-1")["framesDone"] == 10
@@ -0,0 +1,108 @@
+import asyncio
+import os
+from pathlib import Path
+
+from api.models import ROI, ExportSettings, JobData, ProcessingStage
+from api.services.metrics import (
+    Counter,
+    DiskUsage,
+    Histogram,
+    Registry,
+    disk_usage,
+    model_load,
+    upload_bytes,
+)
+from api.services.processing import handle_worker_line
+from api.services.state_store import JOB_CODEC, MemoryStore
+from api.state import jobs
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    durations = registry.register(
+        Histogram("test_seconds", "Test durations.", (1, 5), labels=("stage",))
+    )
+    requests = registry.register(
+        Counter("test_total", "Test requests.", labels=("result",))
+    )
+
+    for value in (0.5, 3, 10):
+        durations.observe(value, stage="encode")
+    requests.inc(result='say "hi"')
+
+    assert registry.render().splitlines() == [
+        "# HELP test_seconds Test durations.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="encode",le="1"} 1',
+        'test_seconds_bucket{stage="encode",le="5"} 2',
+        'test_seconds_bucket{stage="encode",le="+Inf"} 3',
+        'test_seconds_sum{stage="encode"} 13.5',
+        'test_seconds_count{stage="encode"} 3',
+        "# HELP test_total Test requests.",
+        "# TYPE test_total counter",
+        'test_total{result="say \\"hi\\""} 1',
+    ]
+
+
+def test_disk_usage_counts_hard_links_once(tmp_path):
+    (tmp_path / "blobs").mkdir()
+    (tmp_path / "video").mkdir()
+    blob = tmp_path / "blobs" / "abc.mp4"
+    blob.write_bytes(b"x" * 1000)
+    os.link(blob, tmp_path / "video" / "video.mp4")
+    (tmp_path / "video" / "mask.png").write_bytes(b"y" * 24)
+
+    assert disk_usage(tmp_path) == 1024
+
+    usage = DiskUsage(tmp_path, interval=3600)
+    assert asyncio.run(usage.get()) == 1024
+    (tmp_path / "video" / "more.bin").write_bytes(b"z" * 100)
+    # Reused until the interval has passed
+    assert asyncio.run(usage.get()) == 1024
+
+
+def test_model_load_only_counts_fresh_loads():
+    job = JobData(
+        id="job-1",
+        video_id="video-1",
+        roi=ROI(x=1, y=2, width=3, height=4),
+        mask_path=Path("mask.png"),
+        settings=ExportSettings(),
+    )
+    store = MemoryStore(JOB_CODEC)
+    before = model_load.count()
+
+    for line in (
+        '{"event":"model","load":2.5,"cached":false}',
+        '{"event":"model","load":0.0,"cached":true}',
+    ):
+        handle_worker_line(store, job, line, (25, 0.65))
+
+    assert model_load.count() == before + 1
+
+
+def test_metrics_route(client, mock_video_info):
+    jobs["metrics-job"] = JobData(
+        id="metrics-job",
+        video_id="video-1",
+        roi=ROI(x=1, y=2, width=3, height=4),
+        mask_path=Path("mask.png"),
+        settings=ExportSettings(),
+        status=ProcessingStage.ENCODING,
+    )
+    uploaded = upload_bytes.value()
+    client.post("/api/upload", files={"file": ("a.mp4", b"12345", "video/mp4")})
+
+    response = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'keira_jobs{stage="encoding"} 1' in lines
+    assert 'keira_queue_depth{queue="inpaint"} 0' in lines
+    names = {line.split(" ")[0] for line in lines}
+    assert 'keira_cache_hit_ratio{cache="preview"}' in names
+    assert "keira_work_dir_bytes" in names
+    assert upload_bytes.value() == uploaded + 5
+    assert "# TYPE keira_stage_duration_seconds histogram" in lines
+    del jobs["metrics-job"]
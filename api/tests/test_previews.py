@@ -0,0 +1,166 @@
+import asyncio
+import gc
+import sys
+from pathlib import Path
+
+import pytest
+
+from api.models import VideoData, VideoInfo
+from api.services.previews import PreviewCache, snap_time
+from api.state import videos
+
+
+def fake_ffmpeg(calls: list, delay: float = 0.0, fail: bool = False):
+    """Stand-in for ffmpeg printing the requested time as the JPEG bytes."""
+
+    def command(video_path, time):
+        calls.append(time)
+        code = (
+            "import sys, time\n"
+            f"time.sleep({delay})\n"
+            f"sys.exit(1) if {fail} else sys.stdout.write('jpeg@{time}')\n"
+        )
+        return [sys.executable, "-c", code]
+
+    return command
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "api.services.previews.frame_preview_command", fake_ffmpeg(calls)
+    )
+    return calls
+
+
+def test_snap_time_quantizes_and_clamps():
+    assert snap_time(1.234, 10, 25, 0.1) == 1.2
+    assert snap_time(1.26, 10, 25, 0.1) == 1.3
+    assert snap_time(-3, 10, 25, 0.1) == 0.0
+    # Never past the last frame
+    assert snap_time(99, 10, 25, 0.1) == 9.96
+
+
+def test_concurrent_requests_share_one_extraction(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "api.services.previews.frame_preview_command", fake_ffmpeg(calls, delay=0.2)
+    )
+
+    async def scrub():
+        cache = PreviewCache()
+        same = [cache.get("v", Path("v.mp4"), 1.5) for _ in range(5)]
+        return await asyncio.gather(*same, cache.get("v", Path("v.mp4"), 2.0))
+
+    results = asyncio.run(scrub())
+
+    assert results[:5] == [b"jpeg@1.5"] * 5
+    assert results[5] == b"jpeg@2.0"
+    assert sorted(calls) == [1.5, 2.0]
+
+
+def test_cache_evicts_least_recently_used(calls):
+    async def scrub():
+        cache = PreviewCache(max_bytes=1000, max_count=2)
+        await cache.get("v", Path("v.mp4"), 1.0)
+        await cache.get("v", Path("v.mp4"), 2.0)
+        await cache.get("v", Path("v.mp4"), 1.0)
+        await cache.get("v", Path("v.mp4"), 3.0)
+        await cache.get("v", Path("v.mp4"), 1.0)
+        await cache.get("v", Path("v.mp4"), 2.0)
+        return cache
+
+    cache = asyncio.run(scrub())
+
+    # 2.0 was least recently used when 3.0 arrived
+    assert calls == [1.0, 2.0, 3.0, 2.0]
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.bytes == len(b"jpeg@3.0") + len(b"jpeg@2.0")
+
+    cache.forget("v")
+    assert cache.bytes == 0
+
+
+def test_cache_respects_byte_budget(calls):
+    async def scrub():
+        cache = PreviewCache(max_bytes=20, max_count=100)
+        for t in (1.0, 2.0, 3.0):
+            await cache.get("v", Path("v.mp4"), t)
+        return cache
+
+    cache = asyncio.run(scrub())
+
+    assert cache.bytes == 16
+    assert len(cache._entries) == 2
+
+
+def test_failed_extraction_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "api.services.previews.frame_preview_command", fake_ffmpeg(calls, fail=True)
+    )
+
+    async def scrub():
+        cache = PreviewCache()
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.get("v", Path("v.mp4"), 1.0)
+
+    asyncio.run(scrub())
+    assert len(calls) == 2
+
+
+def test_failure_after_every_waiter_left_is_retrieved(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "api.services.previews.frame_preview_command",
+        fake_ffmpeg(calls, delay=0.1, fail=True),
+    )
+    unhandled = []
+
+    async def scrub():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: unhandled.append(context)
+        )
+        cache = PreviewCache()
+        waiter = asyncio.ensure_future(cache.get("v", Path("v.mp4"), 1.0))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        while cache._inflight:
+            await asyncio.sleep(0.02)
+        gc.collect()
+
+    asyncio.run(scrub())
+
+    assert calls == [1.0]
+    assert unhandled == []
+
+
+def test_frame_route_snaps_time(client, calls):
+    videos["preview-video"] = VideoData(
+        info=VideoInfo(
+            id="preview-video",
+            name="clip.mp4",
+            path="clip.mp4",
+            duration=10,
+            fps=25,
+            width=64,
+            height=48,
+            size=1,
+        ),
+        path=Path("clip.mp4"),
+    )
+    try:
+        response = client.get("/api/frame/preview-video?time=4.04")
+    finally:
+        videos.pop("preview-video")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["x-frame-time"] == "4.000"
+    assert response.content == b"jpeg@4.0"
+
+
+def test_frame_route_unknown_video(client):
+    assert client.get("/api/frame/missing").status_code == 404
@@ -0,0 +1,206 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from api import config
+from api.models import ProcessingStage, VideoData, VideoInfo
+from api.services.content_cache import ResultCache
+from api.state import jobs, videos
+
+MASK_DATA_URL = "data:image/png;base64,iVBORw0KGgo="
+
+
+@pytest.fixture
+def video():
+    vid_id = "test-process-video"
+    videos[vid_id] = VideoData(
+        info=VideoInfo(
+            id=vid_id,
+            name="test.mp4",
+            path="path/to/video.mp4",
+            duration=10,
+            fps=30,
+            width=1920,
+            height=1080,
+            size=1024,
+        ),
+        path=Path("path/to/video.mp4"),
+    )
+    yield vid_id
+    videos.pop(vid_id, None)
+
+
+def start_request(video_id, **settings):
+    return {
+        "videoId": video_id,
+        "roi": {"x": 0, "y": 0, "width": 100, "height": 50},
+        "maskDataUrl": MASK_DATA_URL,
+        "settings": settings,
+    }
+
+
+def test_list_models(client, tmp_path, monkeypatch):
+    """Variants are reported with their install status."""
+    monkeypatch.setattr("api.routes.process.MODELS_DIR", tmp_path)
+    (tmp_path / config.MODEL_VARIANTS["int8"]).write_bytes(b"onnx")
+
+    response = client.get("/api/process/models")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["default"] == "fp32"
+    available = {m["name"]: m["available"] for m in data["models"]}
+    assert available == {"fp32": False, "int8": True, "fp16": False}
+
+
+def test_start_processing_unknown_model(client, video):
+    response = client.post(
+        "/api/process/start", json=start_request(video, model="int4")
+    )
+
+    assert response.status_code == 400
+    assert "Unknown model" in response.json()["detail"]
+    assert not any(job.video_id == video for job in jobs.values())
+
+
+def test_start_processing_unknown_pipeline(client, video):
+    response = client.post(
+        "/api/process/start", json=start_request(video, pipeline="tape")
+    )
+
+    assert response.status_code == 400
+    assert "Unknown pipeline" in response.json()["detail"]
+
+
+def test_start_processing_rejects_segment_outside_video(client, video):
+    request = start_request(video)
+    request["segments"] = [{"start": 20, "end": 30}]
+
+    response = client.post("/api/process/start", json=request)
+
+    assert response.status_code == 400
+    assert "Invalid segment" in response.json()["detail"]
+
+
+def test_start_processing_rejects_segments_when_streaming(client, video):
+    request = start_request(video, pipeline="stream")
+    request["segments"] = [{"start": 0, "end": 5}]
+
+    response = client.post("/api/process/start", json=request)
+
+    assert response.status_code == 400
+
+
+def test_start_processing_unknown_frame_format(client, video):
+    response = client.post(
+        "/api/process/start", json=start_request(video, frameFormat="tiff")
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def recorded_runs(monkeypatch):
+    runs = []
+
+    async def fake_run(job_id, jobs, videos, resume=False):
+        runs.append((job_id, resume))
+
+    monkeypatch.setattr("api.routes.process.run_processing", fake_run)
+    return runs
+
+
+def test_resume_restarts_failed_job(client, video, recorded_runs):
+    job_id = client.post("/api/process/start", json=start_request(video)).json()[
+        "jobId"
+    ]
+    job = jobs[job_id]
+    job.status = ProcessingStage.ERROR
+    job.error = "Interrupted by server restart"
+
+    response = client.post(f"/api/process/resume/{job_id}")
+
+    assert response.status_code == 200
+    assert recorded_runs[-1] == (job_id, True)
+    assert job.error is None
+    assert job.status == ProcessingStage.QUEUED
+    manifest = json.loads((config.JOBS_DIR / job_id / "manifest.json").read_text())
+    assert manifest["status"] == "queued"
+
+
+def test_resume_rejects_running_and_complete_jobs(client, video, recorded_runs):
+    job_id = client.post("/api/process/start", json=start_request(video)).json()[
+        "jobId"
+    ]
+
+    assert client.post(f"/api/process/resume/{job_id}").status_code == 409
+
+    jobs[job_id].status = ProcessingStage.COMPLETE
+    assert client.post(f"/api/process/resume/{job_id}").status_code == 400
+    assert client.post("/api/process/resume/missing").status_code == 404
+
+
+def test_resume_waits_for_cancelled_pipeline_to_stop(
+    client, video, recorded_runs, monkeypatch
+):
+    job_id = client.post("/api/process/start", json=start_request(video)).json()[
+        "jobId"
+    ]
+    client.post(f"/api/process/cancel/{job_id}")
+    # The old run is still inside frame extraction
+    monkeypatch.setattr("api.routes.process.active_jobs", {job_id})
+    jobs[job_id].status = ProcessingStage.EXTRACTING
+
+    assert client.post(f"/api/process/resume/{job_id}").status_code == 409
+    assert jobs[job_id].cancelled
+
+    # ...until it has stopped and settled the job
+    monkeypatch.setattr("api.routes.process.active_jobs", set())
+    jobs[job_id].status = ProcessingStage.CANCELLED
+    assert client.post(f"/api/process/resume/{job_id}").status_code == 200
+    assert not jobs[job_id].cancelled
+
+
+def test_start_serves_repeated_job_from_result_cache(
+    client, video, recorded_runs, tmp_path, monkeypatch
+):
+    cache = ResultCache(tmp_path / "results", max_bytes=10**6)
+    monkeypatch.setattr("api.routes.process.result_cache", cache)
+    videos[video].content_hash = "abc"
+
+    first = client.post("/api/process/start", json=start_request(video)).json()
+    assert first["cached"] is False
+    output = tmp_path / "output.mp4"
+    output.write_bytes(b"encoded")
+    cache.store(jobs[first["jobId"]].cache_key, output)
+
+    second = client.post("/api/process/start", json=start_request(video)).json()
+    other = client.post(
+        "/api/process/start", json=start_request(video, quality="draft")
+    ).json()
+
+    assert second["cached"] is True
+    assert other["cached"] is False
+    assert len(recorded_runs) == 2
+    status = client.get(f"/api/process/status/{second['jobId']}").json()
+    assert status["status"] == "complete"
+    download = client.get(status["outputUrl"])
+    assert download.content == b"encoded"
+
+
+def test_status_reports_queue_position(client, video, recorded_runs, monkeypatch):
+    job_id = client.post(
+        "/api/process/start", json={**start_request(video), "priority": 3}
+    ).json()["jobId"]
+    monkeypatch.setattr("api.services.events.scheduler.queue_position", lambda _: 2)
+    monkeypatch.setattr(
+        "api.services.events.scheduler.estimated_start", lambda _: 1234.5
+    )
+
+    status = client.get(f"/api/process/status/{job_id}").json()
+
+    assert jobs[job_id].priority == 3
+    assert status["status"] == "queued"
+    assert status["queuePosition"] == 2
+    assert status["estimatedStart"] == 1234.5
@@ -0,0 +1,359 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from api.models import (
+    ROI,
+    ExportSettings,
+    JobData,
+    ProcessingStage,
+    SessionSettings,
+    TimeRange,
+    VideoData,
+    VideoInfo,
+)
+from api.services.processing import (
+    WORKER_LOG,
+    active_jobs,
+    build_stream_args,
+    build_worker_args,
+    compute_roi_crop,
+    normalize_segments,
+    parse_progress,
+    parse_telemetry,
+    run_processing,
+    run_worker_process,
+    segment_frames,
+)
+from api.services.scheduler import JobScheduler
+from api.services.state_store import JOB_CODEC, VIDEO_CODEC, MemoryStore
+
+
+def make_job(**settings) -> JobData:
+    return JobData(
+        id="job-1",
+        video_id="video-1",
+        roi=ROI(x=10, y=20, width=30, height=40),
+        mask_path=Path("mask.png"),
+        settings=ExportSettings(**settings),
+    )
+
+
+def test_build_worker_args_defaults():
+    args = build_worker_args(
+        make_job(), Path("frames"), Path("frames_out"), Path("lama.onnx")
+    )
+
+    assert args[args.index("--roi") + 1] == "10,20,30,40"
+    assert args[args.index("--batch-size") + 1] == "8"
+    assert args[args.index("--providers") + 1] == (
+        "CUDAExecutionProvider,CPUExecutionProvider"
+    )
+    assert "--optimized-cache" in args
+    assert args[args.index("--ext") + 1] == ".png"
+    assert args[args.index("--png-compression") + 1] == "1"
+
+
+def test_build_worker_args_resume_skips_existing():
+    paths = (Path("frames"), Path("frames_out"), Path("lama.onnx"))
+
+    assert "--skip-existing" not in build_worker_args(make_job(), *paths)
+    assert "--skip-existing" in build_worker_args(make_job(), *paths, resume=True)
+
+
+def test_build_worker_args_frame_format():
+    args = build_worker_args(
+        make_job(frameFormat="raw"), Path("f"), Path("o"), Path("m.onnx")
+    )
+
+    assert args[args.index("--ext") + 1] == ".raw"
+
+
+def test_build_worker_args_session_settings():
+    session = SessionSettings(
+        intraOpThreads=4,
+        providers=["CPUExecutionProvider"],
+        memArena=False,
+        cacheOptimizedModel=False,
+    )
+    args = build_worker_args(
+        make_job(session=session), Path("f"), Path("o"), Path("m.onnx")
+    )
+
+    assert args[args.index("--intra-op-threads") + 1] == "4"
+    assert args[args.index("--providers") + 1] == "CPUExecutionProvider"
+    assert "--no-mem-arena" in args
+    assert "--no-optimized-cache" in args
+
+
+def test_build_worker_args_shifts_roi_into_crop():
+    args = build_worker_args(
+        make_job(), Path("f"), Path("o"), Path("m.onnx"), origin=(4, 6)
+    )
+
+    assert args[args.index("--roi") + 1] == "6,14,30,40"
+
+
+def test_compute_roi_crop_pads_and_aligns():
+    roi = ROI(x=101, y=51, width=31, height=21)
+
+    x, y, w, h = compute_roi_crop(roi, 1920, 1080, padding=16)
+
+    assert (x, y) == (84, 34)
+    assert x <= roi.x - 16 and y <= roi.y - 16
+    assert x + w >= roi.x + roi.width + 16
+    assert y + h >= roi.y + roi.height + 16
+    assert w % 2 == 0 and h % 2 == 0
+
+
+def test_compute_roi_crop_clamps_to_frame():
+    roi = ROI(x=1880, y=1050, width=40, height=30)
+
+    assert compute_roi_crop(roi, 1920, 1080, padding=64) == (1816, 986, 104, 94)
+
+
+def test_normalize_segments_merges_and_clamps():
+    segments = [
+        TimeRange(start=50, end=70),
+        TimeRange(start=0, end=10),
+        TimeRange(start=5, end=12),
+        TimeRange(start=110, end=200),
+    ]
+
+    assert normalize_segments(segments, duration=120.0) == [
+        (0, 12),
+        (50, 70),
+        (110, 120.0),
+    ]
+
+
+def test_normalize_segments_rejects_empty():
+    with pytest.raises(ValueError, match="Invalid segment"):
+        normalize_segments([TimeRange(start=130, end=140)], duration=120.0)
+
+
+def test_segment_frames_snaps_to_frames():
+    segments = [TimeRange(start=1.01, end=2.0), TimeRange(start=5.0, end=5.01)]
+
+    assert segment_frames(segments, fps=25.0) == [(1.0, 25)]
+
+
+def test_build_stream_args():
+    """Streaming jobs hand the worker the video and encoder settings."""
+    info = VideoInfo(
+        id="video-1",
+        name="clip.mp4",
+        path="clip.mp4",
+        duration=10.0,
+        fps=25.0,
+        width=1280,
+        height=720,
+        size=1024,
+    )
+    video = VideoData(info=info, path=Path("clip.mp4"))
+
+    args = build_stream_args(
+        make_job(quality="standard"), video, Path("out.mp4"), Path("lama.onnx")
+    )
+
+    assert "--frames" not in args
+    assert args[args.index("--input-video") + 1] == "clip.mp4"
+    assert args[args.index("--size") + 1] == "1280x720"
+    assert args[args.index("--total-frames") + 1] == "250"
+    assert args[args.index("--crf") + 1] == "23"
+    assert args[args.index("--roi") + 1] == "10,20,30,40"
+
+
+def progress_line(**fields) -> str:
+    event = {
+        "event": "progress",
+        "percent": 50,
+        "processed": 120,
+        "total": 240,
+        "fps": 12.5,
+        "eta": "00:10",
+        "hitRate": 0.25,
+    }
+    return json.dumps({**event, **fields})
+
+
+def test_parse_progress_line():
+    """Worker progress maps into the 25-90% inpainting band."""
+    progress = parse_progress(progress_line())
+
+    assert progress.stage == ProcessingStage.INPAINTING
+    assert progress.percent == 25 + int(50 * 0.65)
+    assert progress.currentFrame == 120
+    assert progress.totalFrames == 240
+    assert progress.fps == 12.5
+    assert progress.eta == "00:10"
+    assert progress.cacheHitRate == 0.25
+    assert "25% reused" in progress.message
+
+
+def test_parse_progress_custom_band():
+    progress = parse_progress(progress_line(processed=1, total=2), base=0, span=0.99)
+
+    assert progress.percent == 49
+
+
+def test_parse_progress_without_hit_rate():
+    line = json.dumps({**json.loads(progress_line(eta="01:30")), "hitRate": None})
+    progress = parse_progress(line)
+
+    assert progress.eta == "01:30"
+    assert progress.cacheHitRate == 0.0
+
+
+def test_parse_progress_ignores_other_lines():
+    assert parse_progress("Loading LaMa model...") is None
+    assert parse_progress('{"event": "progress", "percent": 1}') is None
+    assert parse_progress(progress_line(percent="x")) is None
+    assert parse_progress('{"event": "telemetry", "stages": {}}') is None
+    assert parse_progress("{not json") is None
+
+
+def test_parse_telemetry_adds_busy_share():
+    line = json.dumps(
+        {
+            "event": "telemetry",
+            "elapsed": 4.0,
+            "rss": 1024,
+            "stages": {
+                "read": {"items": 10, "busy": 1.0, "wait": 0.0},
+                "infer": {"items": 10, "busy": 3.0, "wait": 0.0},
+            },
+        }
+    )
+
+    telemetry = parse_telemetry(line)
+
+    assert telemetry["rss"] == 1024
+    assert telemetry["final"] is False
+    assert telemetry["stages"]["read"]["share"] == 0.25
+    assert telemetry["stages"]["infer"]["share"] == 0.75
+    assert parse_telemetry(progress_line()) is None
+
+
+# Stand-in for inpaint_worker.py that logs far more than a pipe buffer holds
+CHATTY_WORKER = """
+import json
+import sys
+
+for i in range(2000):
+    print(f"log line {i} " + "x" * 100, file=sys.stderr)
+print(json.dumps({"event": "progress", "percent": 100, "processed": 2,
+                  "total": 2, "fps": 1.0, "eta": "00:00", "hitRate": 0.0}))
+print(json.dumps({"event": "telemetry", "elapsed": 1.0, "rss": 1,
+                  "stages": {"infer": {"items": 2, "busy": 0.5, "wait": 0.0}}}))
+sys.exit(int(sys.argv[1]))
+"""
+
+
+@pytest.fixture
+def chatty_worker(tmp_path, monkeypatch):
+    (tmp_path / "inpaint_worker.py").write_text(CHATTY_WORKER)
+    (tmp_path / "job-1").mkdir()
+    monkeypatch.setattr("api.services.processing.WORKER_DIR", tmp_path)
+    monkeypatch.setattr("api.services.processing.JOBS_DIR", tmp_path)
+    monkeypatch.setattr(
+        "api.services.processing.find_worker_python", lambda: sys.executable
+    )
+    return tmp_path / "job-1" / WORKER_LOG
+
+
+def test_worker_stderr_is_drained_into_job_log(chatty_worker):
+    job = make_job()
+    jobs = MemoryStore(JOB_CODEC)
+    jobs[job.id] = job
+
+    asyncio.run(asyncio.wait_for(run_worker_process(job, jobs, ["0"], (25, 0.65)), 10))
+
+    assert job.progress.currentFrame == 2
+    assert job.telemetry["stages"]["infer"]["share"] == 1.0
+    assert chatty_worker.read_text().count("log line") == 2000
+
+
+def test_worker_failure_reports_stderr_tail(chatty_worker):
+    job = make_job()
+
+    with pytest.raises(RuntimeError, match="log line 1999"):
+        asyncio.run(run_worker_process(job, MemoryStore(JOB_CODEC), ["2"], (25, 0.65)))
+
+
+def job_stores(job: JobData, tmp_path: Path) -> tuple[MemoryStore, MemoryStore]:
+    jobs = MemoryStore(JOB_CODEC)
+    jobs[job.id] = job
+    videos = MemoryStore(VIDEO_CODEC)
+    info = VideoInfo(
+        id="video-1", name="v.mp4", path="v.mp4", duration=1.0, fps=25.0,
+        width=64, height=48, size=1,
+    )  # fmt: skip
+    videos["video-1"] = VideoData(info=info, path=tmp_path / "v.mp4")
+    return jobs, videos
+
+
+def test_cancelled_job_settles_as_cancelled(tmp_path):
+    job = make_job()
+    job.cancelled = True
+
+    asyncio.run(run_processing(job.id, *job_stores(job, tmp_path)))
+
+    assert job.status == ProcessingStage.CANCELLED
+    assert job.progress.message == "Cancelled"
+    assert job.id not in active_jobs
+
+
+def test_job_cancelled_in_the_queue_settles_without_a_slot(tmp_path, monkeypatch):
+    scheduler = JobScheduler(max_jobs=1, stage_limits={})
+    monkeypatch.setattr("api.services.processing.scheduler", scheduler)
+    job = make_job()
+
+    async def scenario():
+        await scheduler.jobs.acquire("running")
+        task = asyncio.create_task(run_processing(job.id, *job_stores(job, tmp_path)))
+        await asyncio.sleep(0)
+        assert scheduler.queue_position(job.id) == 1
+
+        job.cancelled = True
+        assert scheduler.withdraw(job.id)
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(scenario())
+
+    assert job.status == ProcessingStage.CANCELLED
+    assert scheduler.jobs.waiting == 0
+    assert scheduler.jobs.active == 1
+    assert scheduler.average_duration is None
+
+
+@pytest.mark.parametrize("output", [None, b"", b"video"])
+def test_only_a_written_output_completes_and_is_cached(tmp_path, monkeypatch, output):
+    job = make_job(pipeline="stream")
+    job.cache_key = "key"
+    stored = []
+
+    async def fake_stream(job_id, job, jobs, video_data, output_path):
+        if output is not None:
+            output_path.write_bytes(output)
+
+    (tmp_path / job.id).mkdir()
+    monkeypatch.setattr("api.services.processing.JOBS_DIR", tmp_path)
+    monkeypatch.setattr("api.services.processing.run_stream", fake_stream)
+    monkeypatch.setattr(
+        "api.services.processing.result_cache.store",
+        lambda key, path: stored.append(key),
+    )
+
+    asyncio.run(run_processing(job.id, *job_stores(job, tmp_path)))
+
+    if output:
+        assert job.status == ProcessingStage.COMPLETE
+        assert stored == ["key"]
+    else:
+        assert job.status == ProcessingStage.ERROR
+        assert job.error == "Encoding produced no output"
+        assert stored == []
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from api.services.scheduler import JobScheduler, PriorityLimiter, Withdrawn
+
+
+def test_waiters_run_by_priority_then_arrival():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        order = []
+
+        async def job(name, priority):
+            async with limiter.slot(name, priority):
+                order.append(name)
+
+        await limiter.acquire("running")
+        tasks = [
+            asyncio.create_task(job(name, priority))
+            for name, priority in (("a", 0), ("b", 0), ("urgent", 5))
+        ]
+        await asyncio.sleep(0)
+        positions = {name: limiter.position(name) for name in ("a", "b", "urgent")}
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order, positions, limiter.active
+
+    order, positions, active = asyncio.run(scenario())
+
+    assert order == ["urgent", "a", "b"]
+    assert positions == {"urgent": 1, "a": 2, "b": 3}
+    assert active == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire("running")
+        waiter = asyncio.create_task(limiter.acquire("gone"))
+        await asyncio.sleep(0)
+        assert limiter.position("gone") == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        return limiter
+
+    limiter = asyncio.run(scenario())
+
+    assert limiter.waiting == 0
+    assert limiter.active == 0
+
+
+def test_withdrawn_waiter_gives_up_its_place():
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=1, stage_limits={"encode": 1})
+        await scheduler.jobs.acquire("running")
+        waiter = asyncio.create_task(scheduler.jobs.acquire("gone"))
+        behind = asyncio.create_task(scheduler.jobs.acquire("next"))
+        await asyncio.sleep(0)
+
+        assert scheduler.withdraw("gone")
+        with pytest.raises(Withdrawn):
+            await waiter
+        position = scheduler.queue_position("next")
+        scheduler.jobs.release()
+        await behind
+        return scheduler, position
+
+    scheduler, position = asyncio.run(scenario())
+
+    assert position == 1
+    assert not scheduler.withdraw("gone")
+    assert (scheduler.jobs.waiting, scheduler.jobs.active) == (0, 1)
+
+
+def test_only_finished_runs_count_toward_the_average():
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=1, stage_limits={})
+        async with scheduler.job("cancelled"):
+            pass
+        with pytest.raises(RuntimeError):
+            async with scheduler.job("failed"):
+                raise RuntimeError("boom")
+        before = scheduler.average_duration
+        async with scheduler.job("done") as run:
+            run.finished = True
+        return before, scheduler
+
+    before, scheduler = asyncio.run(scenario())
+
+    assert before is None
+    assert scheduler.average_duration is not None
+    assert scheduler.jobs.active == 0
+
+
+def test_stage_limit_holds_under_burst():
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=10, stage_limits={"extract": 2})
+        running = peak = 0
+
+        async def job(i):
+            nonlocal running, peak
+            async with scheduler.job(f"job-{i}"):
+                async with scheduler.stage("extract", f"job-{i}"):
+                    running += 1
+                    peak = max(peak, running)
+                    await asyncio.sleep(0.01)
+                    running -= 1
+
+        await asyncio.gather(*(job(i) for i in range(8)))
+        return peak, scheduler
+
+    peak, scheduler = asyncio.run(scenario())
+
+    assert peak == 2
+    assert scheduler.stages["extract"].active == 0
+
+
+def test_estimated_start_from_average_duration():
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=2, stage_limits={})
+        async with scheduler.job("first"):
+            pass
+        scheduler.average_duration = 10.0
+
+        await scheduler.jobs.acquire("h0")
+        await scheduler.jobs.acquire("h1")
+        waiters = [
+            asyncio.create_task(scheduler.jobs.acquire(f"w{i}")) for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        estimates = [scheduler.estimated_start(f"w{i}") for i in range(3)]
+        positions = [scheduler.queue_position(f"w{i}") for i in range(3)]
+        for task in waiters:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return estimates, positions
+
+    estimates, positions = asyncio.run(scenario())
+
+    assert positions == [1, 2, 3]
+    # Two run at once: first wave ~10 s, third job waits a second wave
+    assert estimates[1] - estimates[0] == pytest.approx(0, abs=0.1)
+    assert estimates[2] - estimates[0] == pytest.approx(10, abs=0.1)
@@ -0,0 +1,199 @@
+import os
+import socket
+from pathlib import Path
+
+import pytest
+
+from api.models import (
+    ROI,
+    ExportSettings,
+    JobData,
+    ProcessingProgress,
+    ProcessingStage,
+    VideoData,
+    VideoInfo,
+)
+from api.services.manifest import interrupt_orphans
+from api.services.state_store import (
+    JOB_CODEC,
+    VIDEO_CODEC,
+    MemoryStore,
+    SQLiteStore,
+    process_alive,
+)
+from api.state import jobs as job_state
+
+
+def make_job(job_id: str, status=ProcessingStage.QUEUED, created_at=0.0) -> JobData:
+    return JobData(
+        id=job_id,
+        video_id="video-1",
+        roi=ROI(x=1, y=2, width=3, height=4),
+        mask_path=Path("mask.png"),
+        settings=ExportSettings(model="int8"),
+        status=status,
+        progress=ProcessingProgress(stage=status),
+        created_at=created_at,
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "state.db"
+
+
+def open_jobs(path: Path, flush_interval: float = 1.0) -> SQLiteStore:
+    return SQLiteStore(path, "jobs", JOB_CODEC, flush_interval)
+
+
+def test_sqlite_store_is_shared_between_processes(db_path):
+    store, other = open_jobs(db_path), open_jobs(db_path)
+    job = make_job("job-1", created_at=1.0)
+    store["job-1"] = job
+
+    assert store["job-1"] is job
+    copy = other["job-1"]
+    assert copy is not job
+    assert copy.roi == job.roi
+    assert copy.settings.model == "int8"
+    assert "job-1" in other
+    assert list(other) == ["job-1"]
+
+
+def test_sqlite_store_queries_by_status_newest_first(db_path):
+    store = open_jobs(db_path)
+    store["a"] = make_job("a", ProcessingStage.COMPLETE, created_at=1.0)
+    store["b"] = make_job("b", ProcessingStage.ERROR, created_at=2.0)
+    store["c"] = make_job("c", ProcessingStage.COMPLETE, created_at=3.0)
+
+    assert [j.id for j in store.query()] == ["c", "b", "a"]
+    assert [j.id for j in store.query("complete")] == ["c", "a"]
+    assert [j.id for j in store.query(limit=1)] == ["c"]
+    assert store.count_by_status() == {"complete": 2, "error": 1}
+
+    del store["c"]
+    assert len(store) == 2
+    with pytest.raises(KeyError):
+        store["c"]
+
+
+def test_sqlite_store_batches_progress(db_path):
+    store, other = open_jobs(db_path, flush_interval=3600), open_jobs(db_path)
+    job = make_job("job-1")
+    store["job-1"] = job
+
+    for frame in range(1, 101):
+        job.progress = ProcessingProgress(
+            stage=ProcessingStage.INPAINTING, currentFrame=frame
+        )
+        store.touch(job)
+    assert other["job-1"].progress.currentFrame == 0
+
+    store.flush()
+    assert other["job-1"].progress.currentFrame == 100
+
+
+def test_sqlite_cancel_reaches_running_job(db_path):
+    store, other = open_jobs(db_path), open_jobs(db_path)
+    job = make_job("job-1", ProcessingStage.INPAINTING)
+    store["job-1"] = job
+
+    other.set_cancelled("job-1", True)
+    assert not job.cancelled
+    store.touch(job)
+    store.flush()
+    assert job.cancelled
+
+    # Resuming clears it again
+    store.set_cancelled("job-1", False)
+    store.save(job)
+    assert not job.cancelled
+    assert not other["job-1"].cancelled
+
+
+def test_settled_jobs_are_read_from_the_database(db_path):
+    store, other = open_jobs(db_path), open_jobs(db_path)
+    job = make_job("job-1", ProcessingStage.COMPLETE)
+    store["job-1"] = job
+    assert store["job-1"] is not job
+
+    # Resumed by another process
+    resumed = other["job-1"]
+    resumed.status = ProcessingStage.QUEUED
+    other.save(resumed)
+    assert store["job-1"].status == ProcessingStage.QUEUED
+
+
+def test_orphaned_jobs_are_interrupted(db_path, monkeypatch):
+    store = open_jobs(db_path)
+    store["running"] = make_job("running", ProcessingStage.INPAINTING)
+    store["done"] = make_job("done", ProcessingStage.COMPLETE)
+
+    assert process_alive(store.owner)
+    assert open_jobs(db_path).orphaned() == []
+
+    # Same database opened after the owning process exited
+    restarted = open_jobs(db_path)
+    restarted.owner = f"{socket.gethostname()}:0"
+    monkeypatch.setattr("api.services.state_store.process_alive", lambda o: False)
+    assert [j.id for j in restarted.orphaned()] == ["running"]
+
+    assert interrupt_orphans(restarted) == 1
+    job = open_jobs(db_path)["running"]
+    assert job.status == ProcessingStage.ERROR
+    assert job.error == "Interrupted by server restart"
+    assert restarted.orphaned() == []
+
+
+def test_same_host_and_pid_from_an_earlier_boot_is_dead(db_path):
+    # A restarted container reuses the hostname and often the pid
+    previous = open_jobs(db_path)
+    previous.owner = f"{socket.gethostname()}:{os.getpid()}:earlier-boot"
+    previous["running"] = make_job("running", ProcessingStage.INPAINTING)
+
+    current = open_jobs(db_path)
+    assert process_alive(current.owner)
+    assert not process_alive(previous.owner)
+    assert [j.id for j in current.orphaned()] == ["running"]
+
+
+def test_sqlite_video_store(db_path, tmp_path):
+    videos = SQLiteStore(db_path, "videos", VIDEO_CODEC)
+    info = VideoInfo(
+        id="video-1",
+        name="clip.mp4",
+        path=str(tmp_path / "clip.mp4"),
+        duration=10,
+        fps=30,
+        width=640,
+        height=360,
+        size=1024,
+    )
+    videos["video-1"] = VideoData(info=info, path=tmp_path / "clip.mp4")
+
+    video = videos.pop("video-1")
+    assert video.info == info
+    assert "video-1" not in videos
+
+
+def test_memory_store_query():
+    store = MemoryStore(JOB_CODEC)
+    store["a"] = make_job("a", created_at=1.0)
+    store["b"] = make_job("b", ProcessingStage.ERROR, created_at=2.0)
+
+    assert [j.id for j in store.query()] == ["b", "a"]
+    assert [j.id for j in store.query("queued")] == ["a"]
+    assert store.count_by_status() == {"queued": 1, "error": 1}
+    store.set_cancelled("a", True)
+    assert store["a"].cancelled
+
+
+def test_list_jobs_route(client):
+    job_state["listed-job"] = make_job("listed-job", ProcessingStage.ERROR, 2e9)
+
+    response = client.get("/api/process/jobs", params={"status": "error"})
+    assert response.status_code == 200
+    assert response.json()[0]["jobId"] == "listed-job"
+
+    response = client.get("/api/process/jobs", params={"status": "bogus"})
+    assert response.status_code == 400
@@ -1,4 +1,7 @@
-from api.state import videos
+import hashlib
+
+from api import config
+from api.state import upload_sessions, videos
 
 
 def test_upload_video_success(client, mock_video_info):
@@ -38,3 +41,123 @@ def test_upload_no_filename(client):
     response = client.post("/api/upload", files=files)
 
     assert response.status_code == 422
+
+
+def test_identical_uploads_share_one_blob(client, mock_video_info):
+    files = {"file": ("test.mp4", b"same video bytes", "video/mp4")}
+
+    first = client.post("/api/upload", files=files).json()
+    second = client.post("/api/upload", files=files).json()
+
+    first_path = videos[first["id"]].path
+    second_path = videos[second["id"]].path
+    assert first["id"] != second["id"]
+    assert first_path.stat().st_ino == second_path.stat().st_ino
+    assert videos[first["id"]].content_hash == videos[second["id"]].content_hash
+    assert first["size"] == len(b"same video bytes")
+
+    blob = config.BLOBS_DIR / f"{videos[first['id']].content_hash}.mp4"
+    client.delete(f"/api/video/{first['id']}")
+    assert blob.exists()
+    client.delete(f"/api/video/{second['id']}")
+    assert not blob.exists()
+
+
+def test_upload_over_size_limit(client, mock_video_info, monkeypatch):
+    monkeypatch.setattr("api.routes.upload.MAX_UPLOAD_BYTES", 8)
+    files = {"file": ("test.mp4", b"0123456789", "video/mp4")}
+
+    response = client.post("/api/upload", files=files)
+
+    assert response.status_code == 413
+    assert list(config.UPLOADS_DIR.iterdir()) == []
+
+
+def test_upload_rejected_on_content_length_before_reading(client, monkeypatch):
+    monkeypatch.setattr("api.routes.upload.MAX_UPLOAD_BYTES", 8)
+    monkeypatch.setattr("api.routes.upload.UPLOAD_FORM_OVERHEAD", 0)
+
+    def fail(*args):
+        raise AssertionError("body was read")
+
+    monkeypatch.setattr("api.routes.upload.FormFile.open", fail)
+    files = {"file": ("test.mp4", b"0123456789", "video/mp4")}
+
+    response = client.post("/api/upload", files=files)
+
+    assert response.status_code == 413
+    assert list(config.UPLOADS_DIR.iterdir()) == []
+
+
+def test_upload_skips_other_form_fields(client, mock_video_info):
+    files = {"file": ("test.mp4", b"video bytes", "video/mp4")}
+
+    response = client.post("/api/upload", data={"note": "first"}, files=files)
+
+    assert response.status_code == 200
+    assert response.json()["size"] == len(b"video bytes")
+    path = videos[response.json()["id"]].path
+    assert path.read_bytes() == b"video bytes"
+
+
+def init_upload(client, data: bytes) -> str:
+    response = client.post(
+        "/api/upload/init", json={"filename": "big.mp4", "size": len(data)}
+    )
+    assert response.status_code == 200
+    assert response.json()["offset"] == 0
+    return response.json()["uploadId"]
+
+
+def test_resumable_upload(client, mock_video_info):
+    data = b"resumable video bytes"
+    upload_id = init_upload(client, data)
+
+    first = client.put(f"/api/upload/{upload_id}?offset=0", content=data[:9])
+    assert first.json()["offset"] == 9
+    # A retried chunk at a stale offset is refused
+    stale = client.put(f"/api/upload/{upload_id}?offset=0", content=data[:9])
+    assert stale.status_code == 409
+    assert client.post(f"/api/upload/{upload_id}/finalize").status_code == 400
+
+    client.put(f"/api/upload/{upload_id}?offset=9", content=data[9:])
+    response = client.post(f"/api/upload/{upload_id}/finalize")
+
+    assert response.status_code == 200
+    assert response.json()["size"] == len(data)
+    video = videos[upload_id]
+    assert video.path.read_bytes() == data
+    assert video.content_hash == hashlib.sha256(data).hexdigest()
+    assert upload_id not in upload_sessions
+
+
+def test_resumable_upload_survives_restart(client, mock_video_info):
+    data = b"interrupted upload"
+    upload_id = init_upload(client, data)
+    client.put(f"/api/upload/{upload_id}?offset=0", content=data[:5])
+    upload_sessions.clear()
+
+    status = client.get(f"/api/upload/{upload_id}").json()
+    client.put(f"/api/upload/{upload_id}?offset={status['offset']}", content=data[5:])
+    response = client.post(f"/api/upload/{upload_id}/finalize")
+
+    assert status["offset"] == 5
+    assert response.status_code == 200
+    assert videos[upload_id].content_hash == hashlib.sha256(data).hexdigest()
+
+
+def test_resumable_upload_limits(client, monkeypatch):
+    monkeypatch.setattr("api.routes.upload.MAX_UPLOAD_BYTES", 10)
+    oversized = client.post(
+        "/api/upload/init", json={"filename": "big.mp4", "size": 11}
+    )
+    assert oversized.status_code == 413
+
+    upload_id = init_upload(client, b"12345")
+    response = client.put(f"/api/upload/{upload_id}?offset=0", content=b"123456")
+    assert response.status_code == 413
+    assert client.get(f"/api/upload/{upload_id}").json()["offset"] == 0
+
+    assert client.delete(f"/api/upload/{upload_id}").status_code == 200
+    assert client.get(f"/api/upload/{upload_id}").status_code == 404
+    assert client.get("/api/upload/not-a-uuid").status_code == 404
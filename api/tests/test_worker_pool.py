@@ -0,0 +1,103 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from api.services.worker_pool import WorkerPool, find_worker_python
+
+# Stand-in for worker/inpaint_service.py speaking the same line protocol
+FAKE_SERVICE = """
+import json
+import os
+import sys
+from pathlib import Path
+
+print("READY", flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    job_id = request["id"]
+    if request["args"] == ["fail"]:
+        print(f"FAILED:{job_id}:bad input", flush=True)
+    elif request["args"] == ["crash"]:
+        sys.exit(3)
+    else:
+        print(f"PROGRESS:100:1:1:1.0:00:00:0.000:{os.getpid()}", flush=True)
+        print(f"DONE:{job_id}:1", flush=True)
+"""
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    script = tmp_path / "fake_service.py"
+    script.write_text(FAKE_SERVICE)
+
+    def make(size=1):
+        return WorkerPool(size, command=[sys.executable, str(script)])
+
+    return make
+
+
+async def run_job(pool, job_id, args):
+    async with pool.worker() as worker:
+        return [line async for line in worker.run(job_id, args)]
+
+
+def test_worker_is_reused_across_jobs(make_pool):
+    async def scenario():
+        pool = make_pool()
+        first = await run_job(pool, "a", ["ok"])
+        second = await run_job(pool, "b", ["ok"])
+        started = pool.started
+        await pool.shutdown()
+        return first, second, started
+
+    first, second, started = asyncio.run(scenario())
+
+    assert first[0].startswith("PROGRESS:100")
+    # Same pid means the same warm process served both jobs
+    assert first[0].rsplit(":", 1)[1] == second[0].rsplit(":", 1)[1]
+    assert started == 1
+
+
+def test_failed_job_keeps_worker_alive(make_pool):
+    async def scenario():
+        pool = make_pool()
+        with pytest.raises(RuntimeError, match="bad input"):
+            await run_job(pool, "a", ["fail"])
+        alive = pool.started
+        await run_job(pool, "b", ["ok"])
+        await pool.shutdown()
+        return alive
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_crashed_worker_is_replaced(make_pool):
+    async def scenario():
+        pool = make_pool()
+        with pytest.raises(RuntimeError, match="exited unexpectedly"):
+            await run_job(pool, "a", ["crash"])
+        lines = await run_job(pool, "b", ["ok"])
+        await pool.shutdown()
+        return lines
+
+    assert asyncio.run(scenario())[0].startswith("PROGRESS:")
+
+
+def test_killed_worker_is_not_reused(make_pool):
+    async def scenario():
+        pool = make_pool()
+        async with pool.worker() as worker:
+            worker.kill()
+        started = pool.started
+        await pool.shutdown()
+        return started
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_worker_python_override(monkeypatch):
+    monkeypatch.setattr("api.services.worker_pool.WORKER_PYTHON", sys.executable)
+
+    assert find_worker_python() == Path(sys.executable)
@@ -0,0 +1,83 @@
+"""
+Keira - Blend Benchmark
+Regis Architecture v2.9.0
+
+Compares the original full-frame float64 composite with the in-place,
+bbox-local fixed-point blend, for hard and feathered masks.
+
+Usage:
+    python benchmarks/bench_blend.py [--frames 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "worker"))
+
+from blending import blend_into  # noqa: E402
+from masking import build_mask_plan  # noqa: E402
+
+RESOLUTIONS = {"1080p": (1080, 1920), "4k": (2160, 3840)}
+ROI = (1500, 60, 320, 120)
+
+
+def measure(fn: Callable[[], object], frames: int) -> tuple[float, int]:
+    """Return (ms per frame, peak bytes allocated by a single frame)."""
+    fn()  # warm up
+    peak = 0
+    start = time.perf_counter()
+    tracemalloc.start()
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / frames, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark frame blending")
+    parser.add_argument("--frames", type=int, default=30, help="Frames per run")
+    args = parser.parse_args()
+
+    mask_img = np.zeros((ROI[3], ROI[2]), dtype=np.uint8)
+    cv2.rectangle(mask_img, (20, 20), (ROI[2] - 20, ROI[3] - 20), 255, -1)
+    rng = np.random.default_rng(0)
+
+    print(f"{'resolution':<10} {'path':<10} {'ms/frame':>10} {'peak alloc/frame':>18}")
+    for name, shape in RESOLUTIONS.items():
+        frame = rng.integers(0, 256, size=(*shape, 3), dtype=np.uint8)
+        result = rng.integers(0, 256, size=(*shape, 3), dtype=np.uint8)
+        hard = build_mask_plan(mask_img, ROI, shape)
+        soft = build_mask_plan(mask_img, ROI, shape, feather=8)
+
+        def legacy() -> np.ndarray:
+            mask_3ch = cv2.cvtColor(hard.mask, cv2.COLOR_GRAY2BGR) / 255.0
+            return (frame * (1 - mask_3ch) + result * mask_3ch).astype(np.uint8)
+
+        def local(plan) -> Callable[[], None]:
+            x, y, w, h = plan.bbox
+            patch = result[y : y + h, x : x + w]
+            return lambda: blend_into(frame, patch, plan)
+
+        runs = {
+            "legacy": measure(legacy, args.frames),
+            "hard": measure(local(hard), args.frames),
+            "feather": measure(local(soft), args.frames),
+        }
+        for label, (ms, peak) in runs.items():
+            print(f"{name:<10} {label:<10} {ms:>10.3f} {peak / 1e6:>15.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
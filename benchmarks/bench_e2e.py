@@ -0,0 +1,316 @@
+"""
+Keira - End-to-End Benchmark
+Regis Architecture v2.9.0
+
+Runs whole jobs through run_processing, the code path behind the API, on
+synthetic ffmpeg testsrc clips at 720p, 1080p and 4K. The stand-in model
+from stub_model.py replaces the LaMa weights, so only ffmpeg is needed.
+Per clip and pipeline it reports, as JSON:
+
+    stages         wall seconds of extract / inpaint / encode
+    wall, fps      whole job, frames per second of the whole job
+    inpaintFps     frames per second of the inpainting stage
+    workerStages   the worker's own read / preprocess / infer / blend /
+                   write breakdown from its final telemetry
+    peakRss        largest resident memory the worker reported
+    peakDiskBytes  largest size of the job directory while it ran
+
+and compares the results with a stored baseline: a case regresses when its
+fps falls or its wall time grows by more than --threshold.
+
+Usage:
+    python benchmarks/bench_e2e.py [--resolutions 720p,1080p] [--seconds 2]
+    python benchmarks/bench_e2e.py --pipelines frames,roi,stream --json out.json
+    python benchmarks/bench_e2e.py --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from stub_model import STUB_MODEL, build_stub_model  # noqa: E402
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+PIPELINES = ("frames", "roi", "stream")
+BASELINE = Path(__file__).resolve().parent / "e2e_baseline.json"
+CLIPS_DIR = Path(tempfile.gettempdir()) / "keira_bench_clips"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS))
+    parser.add_argument("--pipelines", default="frames,stream")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Clip length")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the fastest run")
+    parser.add_argument("--model", default=str(STUB_MODEL))
+    parser.add_argument(
+        "--worker-python",
+        default=sys.executable,
+        help="Interpreter for the worker (default: this one)",
+    )
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed relative slowdown"
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    return parser.parse_args()
+
+
+def generate_clip(resolution: str, seconds: float, fps: int) -> Path:
+    """An H.264 testsrc clip, generated once and reused."""
+    width, height = RESOLUTIONS[resolution]
+    path = CLIPS_DIR / f"testsrc_{resolution}_{seconds:g}s_{fps}.mp4"
+    if path.exists():
+        return path
+
+    CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp.mp4")
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc=size={width}x{height}:rate={fps}:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-pix_fmt",
+            "yuv420p",
+            str(tmp_path),
+        ],
+        check=True,
+    )
+    tmp_path.replace(path)
+    return path
+
+
+def watermark_roi(width: int, height: int) -> tuple[int, int, int, int]:
+    """A logo-sized box near the bottom right corner."""
+    w, h = width // 5, height // 8
+    return width - w - width // 40, height - h - height // 30, w, h
+
+
+async def run_case(clip: Path, pipeline: str, sample_interval: float = 0.2) -> dict:
+    """Process the clip once with ``pipeline`` and measure it."""
+    from api.config import JOBS_DIR
+    from api.models import (
+        ROI,
+        ExportSettings,
+        JobData,
+        ProcessingStage,
+        VideoData,
+        VideoInfo,
+    )
+    from api.services.ffmpeg import probe_video
+    from api.services.metrics import disk_usage, stage_duration
+    from api.services.processing import run_processing
+    from api.state import jobs, videos
+
+    info = await probe_video(clip)
+    video_id = str(uuid.uuid4())
+    videos[video_id] = VideoData(
+        info=VideoInfo(
+            id=video_id,
+            name=clip.name,
+            path=str(clip),
+            size=clip.stat().st_size,
+            **info,
+        ),
+        path=clip,
+    )
+
+    job_id = str(uuid.uuid4())
+    job_dir = JOBS_DIR / job_id
+    job_dir.mkdir(parents=True)
+    x, y, w, h = watermark_roi(info["width"], info["height"])
+    mask_path = job_dir / "mask.png"
+    cv2.imwrite(str(mask_path), np.full((h, w), 255, dtype=np.uint8))
+    job = JobData(
+        id=job_id,
+        video_id=video_id,
+        roi=ROI(x=x, y=y, width=w, height=h),
+        mask_path=mask_path,
+        settings=ExportSettings(pipeline=pipeline),
+        status=ProcessingStage.QUEUED,
+    )
+    jobs[job_id] = job
+
+    peaks = {"disk": 0, "rss": 0}
+
+    async def sample() -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            disk = await loop.run_in_executor(None, disk_usage, job_dir)
+            peaks["disk"] = max(peaks["disk"], disk)
+            peaks["rss"] = max(peaks["rss"], (job.telemetry or {}).get("rss") or 0)
+            await asyncio.sleep(sample_interval)
+
+    stages = ("extract", "inpaint", "encode")
+    before = {stage: stage_duration.value(stage=stage) for stage in stages}
+    sampler = asyncio.ensure_future(sample())
+    start = time.perf_counter()
+    try:
+        await run_processing(job_id, jobs, videos)
+    finally:
+        wall = time.perf_counter() - start
+        sampler.cancel()
+        # The finished output counts too
+        peaks["disk"] = max(peaks["disk"], disk_usage(job_dir))
+        del jobs[job_id], videos[video_id]
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    if job.status != ProcessingStage.COMPLETE:
+        raise RuntimeError(f"{clip.name} ({pipeline}) failed: {job.error}")
+
+    telemetry = job.telemetry or {}
+    frames = info["frameCount"]
+    inpaint = stage_duration.value(stage="inpaint") - before["inpaint"]
+    return {
+        "frames": frames,
+        "wall": round(wall, 3),
+        "fps": round(frames / wall, 2),
+        "inpaintFps": round(frames / inpaint, 2) if inpaint else None,
+        "stages": {
+            stage: round(stage_duration.value(stage=stage) - before[stage], 3)
+            for stage in stages
+            if stage_duration.value(stage=stage) > before[stage]
+        },
+        "workerStages": telemetry.get("stages", {}),
+        "peakRss": max(peaks["rss"], telemetry.get("rss") or 0) or None,
+        "peakDiskBytes": peaks["disk"],
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Cases slower than the baseline by more than ``threshold``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["fps"] < base["fps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['fps']} fps, baseline {base['fps']} fps"
+            )
+        if result["wall"] > base["wall"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {result['wall']}s wall, baseline {base['wall']}s"
+            )
+    return regressions
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    from api.services.worker_pool import worker_pool
+
+    results = {}
+    try:
+        for resolution in args.resolutions.split(","):
+            clip = generate_clip(resolution, args.seconds, args.fps)
+            for pipeline in args.pipelines.split(","):
+                name = f"{resolution}/{pipeline}"
+                print(f"Running {name}...", file=sys.stderr)
+                runs = [await run_case(clip, pipeline) for _ in range(args.repeat)]
+                results[name] = min(runs, key=lambda run: run["wall"])
+    finally:
+        await worker_pool.shutdown()
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    for pipeline in args.pipelines.split(","):
+        if pipeline not in PIPELINES:
+            print(f"ERROR: Unknown pipeline: {pipeline}", file=sys.stderr)
+            sys.exit(1)
+    if shutil.which("ffmpeg") is None:
+        print("ERROR: ffmpeg not found on PATH", file=sys.stderr)
+        sys.exit(1)
+
+    model = Path(args.model)
+    if not model.exists():
+        build_stub_model(model)
+
+    # The API reads these on import: the stand-in is served as the default
+    # fp32 variant and the worker runs on the given interpreter
+    models_dir = Path(tempfile.mkdtemp(prefix="keira_bench_models_"))
+    shutil.copy(model, models_dir / "lama_fp32.onnx")
+    os.environ["KEIRA_MODELS_DIR"] = str(models_dir)
+    os.environ["KEIRA_WORKER_PYTHON"] = args.worker_python
+
+    try:
+        results = asyncio.run(run_benchmark(args))
+    finally:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+    baseline_path = Path(args.baseline)
+    baseline = (
+        json.loads(baseline_path.read_text())["results"]
+        if baseline_path.exists()
+        else {}
+    )
+    regressions = compare(results, baseline, args.threshold)
+    report = {
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "clip": {"seconds": args.seconds, "fps": args.fps},
+        "threshold": args.threshold,
+        "results": results,
+        "baseline": str(baseline_path) if baseline else None,
+        "regressions": regressions,
+    }
+
+    columns = ["case", "frames", "wall s", "fps", "extract s", "inpaint s"]
+    columns += ["encode s", "peak RSS MB", "peak disk MB"]
+    print()
+    print("| " + " | ".join(columns) + " |")
+    print("|" + "---|" * len(columns))
+    for name, r in results.items():
+        stages = r["stages"]
+        print(
+            f"| {name} | {r['frames']} | {r['wall']} | {r['fps']} "
+            f"| {stages.get('extract', '-')} | {stages.get('inpaint', '-')} "
+            f"| {stages.get('encode', '-')} | {(r['peakRss'] or 0) / 1e6:.0f} "
+            f"| {r['peakDiskBytes'] / 1e6:.1f} |"
+        )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {baseline_path}", file=sys.stderr)
+
+    if regressions and not args.save_baseline:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Keira - Frame Store Benchmark
+Regis Architecture v2.9.0
+
+Compares the intermediate frame formats the worker reads and writes:
+PNG at several zlib levels, BMP and the memory-mapped raw file. Reports
+disk usage per frame and read / write throughput through FrameStore, the
+same code path the worker uses.
+
+Usage:
+    python benchmarks/bench_frame_store.py [--frames 60] [--resolution 1080p]
+    python benchmarks/bench_frame_store.py --clip reference.mp4
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "worker"))
+
+from frame_store import (  # noqa: E402
+    RAW_FILE,
+    FrameRef,
+    FrameStore,
+    list_frames,
+    write_sidecar,
+)
+
+RESOLUTIONS = {"720p": (720, 1280), "1080p": (1080, 1920), "4k": (2160, 3840)}
+
+# (label, format, PNG level)
+CASES = [
+    ("png-0", "png", 0),
+    ("png-1", "png", 1),
+    ("png-3", "png", 3),
+    ("png-9", "png", 9),
+    ("bmp", "bmp", None),
+    ("raw", "raw", None),
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark frame store formats")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--resolution", choices=RESOLUTIONS, default="1080p")
+    parser.add_argument("--clip", help="Use frames from a video instead of noise")
+    return parser.parse_args()
+
+
+def synthetic_frames(count: int, shape: tuple[int, int]) -> list[np.ndarray]:
+    """Smooth gradients with a little noise, compresses like real footage."""
+    height, width = shape
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frames = []
+    for i in range(count):
+        base = np.stack([x + y * 0 + i, y + x * 0, (x + y) / 2], axis=-1)
+        noise = rng.normal(0, 4, base.shape)
+        frames.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def clip_frames(clip: Path, count: int) -> list[np.ndarray]:
+    capture = cv2.VideoCapture(str(clip))
+    frames = []
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def source_refs(root: Path, fmt: str, frames: list[np.ndarray]) -> list[FrameRef]:
+    """Input refs for a format; raw inputs need their file and sidecar."""
+    root.mkdir(parents=True)
+    if fmt == "raw":
+        raw_path = root / RAW_FILE
+        height, width = frames[0].shape[:2]
+        write_sidecar(raw_path, len(frames), height, width)
+        with open(raw_path, "wb") as f:
+            f.truncate(len(frames) * frames[0].nbytes)
+        return list_frames(root, "raw")
+    return [FrameRef(root / f"{i:06d}.{fmt}") for i in range(1, len(frames) + 1)]
+
+
+def run_case(work: Path, fmt: str, level: int | None, frames: list[np.ndarray]) -> dict:
+    # Write: frames go to the output side of a store, as the worker does
+    src = work / "src"
+    refs = source_refs(src, fmt, frames)
+    store = FrameStore(src, work / "out", fmt, level)
+    store.prepare_outputs(refs)
+
+    start = time.perf_counter()
+    for ref, frame in zip(refs, frames):
+        store.save(ref, frame)
+    store.close()
+    write_s = time.perf_counter() - start
+
+    out = work / "out"
+    disk = sum(p.stat().st_size for p in out.iterdir() if p.suffix != ".json")
+
+    # Read back through a store whose input is the written output
+    reader = FrameStore(out, work / "unused", fmt)
+    out_refs = list_frames(out, fmt)
+    start = time.perf_counter()
+    for ref in out_refs:
+        reader.load(ref)
+    read_s = time.perf_counter() - start
+
+    count = len(frames)
+    return {
+        "mb_per_frame": disk / count / 1e6,
+        "write_fps": count / write_s,
+        "read_fps": count / read_s,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if args.clip:
+        frames = clip_frames(Path(args.clip), args.frames)
+    else:
+        frames = synthetic_frames(args.frames, RESOLUTIONS[args.resolution])
+    if not frames:
+        print("ERROR: No frames", file=sys.stderr)
+        sys.exit(1)
+
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames at {width}x{height}")
+    print()
+    print("| format | MB/frame | write fps | read fps |")
+    print("|---|---|---|---|")
+
+    for label, fmt, level in CASES:
+        work = Path(tempfile.mkdtemp(prefix=f"keira_bench_{label}_"))
+        try:
+            m = run_case(work, fmt, level, frames)
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+        print(
+            f"| {label} | {m['mb_per_frame']:.2f} | {m['write_fps']:.1f} "
+            f"| {m['read_fps']:.1f} |"
+        )
+
+
+if __name__ == "__main__":
+    main()
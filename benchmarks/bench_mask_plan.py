@@ -0,0 +1,80 @@
+"""
+Keira - Mask Plan Benchmark
+Regis Architecture v2.9.0
+
+Compares the per-frame mask preparation the worker used to do (placing the
+ROI mask, summing it, building a float64 3-channel blend mask) against a
+lookup in the precomputed MaskPlanCache.
+
+Usage:
+    python benchmarks/bench_mask_plan.py [--frames 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "worker"))
+
+from masking import MaskPlanCache, create_roi_mask  # noqa: E402
+
+RESOLUTIONS = {"1080p": (1080, 1920), "4k": (2160, 3840)}
+ROI = (1500, 60, 320, 120)
+
+
+def legacy_prepare(
+    mask_img: np.ndarray, frame_shape: tuple[int, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-frame mask preparation as done before mask plans."""
+    frame_mask = create_roi_mask(mask_img, ROI, frame_shape)
+    if np.sum(frame_mask) == 0:
+        return frame_mask, frame_mask
+    mask_3ch = cv2.cvtColor(frame_mask, cv2.COLOR_GRAY2BGR) / 255.0
+    return frame_mask, mask_3ch
+
+
+def measure(fn: Callable[[], object], frames: int) -> tuple[float, int]:
+    """Return (ms per frame, peak bytes allocated by a single frame)."""
+    fn()  # warm up
+    peak = 0
+    start = time.perf_counter()
+    tracemalloc.start()
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / frames, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark mask planning")
+    parser.add_argument("--frames", type=int, default=50, help="Frames per run")
+    args = parser.parse_args()
+
+    mask_img = np.zeros((ROI[3], ROI[2]), dtype=np.uint8)
+    cv2.rectangle(mask_img, (20, 20), (ROI[2] - 20, ROI[3] - 20), 255, -1)
+
+    print(f"{'resolution':<10} {'path':<8} {'ms/frame':>10} {'peak alloc/frame':>18}")
+    for name, shape in RESOLUTIONS.items():
+        plans = MaskPlanCache(mask_img, ROI)
+        frame_shape = (*shape, 3)
+
+        legacy = measure(lambda: legacy_prepare(mask_img, shape), args.frames)
+        planned = measure(lambda: plans.get(frame_shape), args.frames)
+
+        for label, (ms, peak) in (("legacy", legacy), ("plan", planned)):
+            print(f"{name:<10} {label:<8} {ms:>10.3f} {peak / 1e6:>15.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Keira - Model Variant Comparison
+Regis Architecture v2.9.0
+
+Runs every installed LaMa variant over the same frames of a reference clip
+and reports load time, throughput and quality against the fp32 output,
+measured over the mask bounding box.
+
+Usage:
+    python benchmarks/compare_models.py --clip reference.mp4 --roi 1500,60,320,120
+    python benchmarks/compare_models.py --clip ref.mp4 --roi ... --json report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "worker"))
+
+from inpaint_worker import LamaInpainter, process_batch  # noqa: E402
+from masking import MaskPlanCache  # noqa: E402
+from pipeline import batched  # noqa: E402
+from session import SessionConfig  # noqa: E402
+
+from api.config import MODEL_VARIANTS  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare LaMa model variants")
+    parser.add_argument("--clip", required=True, help="Reference video file")
+    parser.add_argument("--roi", required=True, help="ROI as x,y,width,height")
+    parser.add_argument("--mask", help="Mask image for the ROI (default: full ROI)")
+    parser.add_argument("--models-dir", default=str(ROOT / "worker" / "models"))
+    parser.add_argument("--variants", default=",".join(MODEL_VARIANTS))
+    parser.add_argument("--frames", type=int, default=60, help="Frames to process")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--providers", default="CPUExecutionProvider")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    return parser.parse_args()
+
+
+def read_frames(clip: Path, count: int) -> list[np.ndarray]:
+    """Read the first ``count`` frames of a video."""
+    capture = cv2.VideoCapture(str(clip))
+    frames = []
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    """Peak signal-to-noise ratio in dB, inf for identical inputs."""
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0**2 / mse)
+
+
+def run_variant(
+    model_path: Path,
+    frames: list[np.ndarray],
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    batch_size: int,
+    providers: tuple[str, ...],
+) -> tuple[dict, list[np.ndarray]]:
+    """Process the frames with one variant, return (metrics, outputs)."""
+    start = time.perf_counter()
+    inpainter = LamaInpainter(
+        str(model_path), SessionConfig(providers=providers, cache_optimized=False)
+    )
+    load_s = time.perf_counter() - start
+
+    plans = MaskPlanCache(mask_img, roi, min_size=inpainter.input_size)
+    # Warm up so the first batch's allocations do not skew timing
+    process_batch(inpainter, [frames[0].copy()], plans)
+
+    outputs = []
+    start = time.perf_counter()
+    for batch in batched(frames, batch_size):
+        outputs.extend(process_batch(inpainter, [f.copy() for f in batch], plans))
+    elapsed = time.perf_counter() - start
+
+    metrics = {
+        "model_mb": round(model_path.stat().st_size / 1e6, 1),
+        "load_s": round(load_s, 3),
+        "ms_per_frame": round(elapsed * 1000 / len(frames), 2),
+        "fps": round(len(frames) / elapsed, 2),
+    }
+    return metrics, outputs
+
+
+def main() -> None:
+    args = parse_args()
+    roi = tuple(map(int, args.roi.split(",")))
+    models_dir = Path(args.models_dir)
+
+    frames = read_frames(Path(args.clip), args.frames)
+    if not frames:
+        print(f"ERROR: No frames read from {args.clip}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.mask:
+        mask_img = cv2.imread(args.mask, cv2.IMREAD_GRAYSCALE)
+    else:
+        mask_img = np.full((roi[3], roi[2]), 255, dtype=np.uint8)
+
+    plan = MaskPlanCache(mask_img, roi).get(frames[0].shape)
+    if plan.empty:
+        print("ERROR: ROI does not overlap the frames", file=sys.stderr)
+        sys.exit(1)
+    x, y, w, h = plan.bbox
+
+    providers = tuple(args.providers.split(","))
+    report = {"clip": args.clip, "frames": len(frames), "roi": roi, "variants": {}}
+    reference = None
+
+    for name in args.variants.split(","):
+        model_path = models_dir / MODEL_VARIANTS[name]
+        if not model_path.exists():
+            print(f"Skipping {name}: {model_path} not found", file=sys.stderr)
+            continue
+
+        print(f"Running {name}...", file=sys.stderr)
+        metrics, outputs = run_variant(
+            model_path, frames, mask_img, roi, args.batch_size, providers
+        )
+        if reference is None:
+            reference = outputs
+
+        # Quality against the first variant, fp32 by default
+        crops = [
+            (out[y : y + h, x : x + w], ref[y : y + h, x : x + w])
+            for out, ref in zip(outputs, reference)
+        ]
+        min_psnr = min(psnr(o, r) for o, r in crops)
+        # Identical output has no finite PSNR, reported as null in JSON
+        metrics["psnr_db"] = round(min_psnr, 2) if np.isfinite(min_psnr) else None
+        metrics["max_abs_diff"] = int(
+            max(np.abs(o.astype(int) - r.astype(int)).max() for o, r in crops)
+        )
+        report["variants"][name] = metrics
+
+    print()
+    print("| variant | size MB | load s | ms/frame | fps | min PSNR dB | max diff |")
+    print("|---|---|---|---|---|---|---|")
+    for name, m in report["variants"].items():
+        print(
+            f"| {name} | {m['model_mb']} | {m['load_s']} | {m['ms_per_frame']} "
+            f"| {m['fps']} | {m['psnr_db']} | {m['max_abs_diff']} |"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Keira - Stand-in LaMa Model
+Regis Architecture v2.9.0
+
+Builds benchmarks/models/lama_stub.onnx, a tiny model with LaMa's
+input/output signature (image [N,3,512,512] and mask [N,1,512,512] in,
+image out) so the end-to-end benchmark runs offline without the real
+weights. Two small convolutions over the image and mask give inference a
+real, if modest, cost; masked pixels are replaced by their output and the
+rest of the image passes through, as with LaMa.
+
+Usage:
+    python benchmarks/stub_model.py [--output benchmarks/models/lama_stub.onnx]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+STUB_MODEL = Path(__file__).resolve().parent / "models" / "lama_stub.onnx"
+
+# Channels of the hidden convolution
+HIDDEN = 8
+
+
+def build_stub_model(path: Path) -> Path:
+    """Write the stand-in model to ``path``."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    def tensor(name: str, channels: int):
+        return helper.make_tensor_value_info(
+            name, TensorProto.FLOAT, ["N", channels, 512, 512]
+        )
+
+    rng = np.random.default_rng(0)
+    weights = [
+        numpy_helper.from_array(
+            rng.normal(0, 0.1, (HIDDEN, 4, 3, 3)).astype(np.float32), "w1"
+        ),
+        numpy_helper.from_array(np.zeros(HIDDEN, dtype=np.float32), "b1"),
+        numpy_helper.from_array(
+            rng.normal(0, 0.1, (3, HIDDEN, 3, 3)).astype(np.float32), "w2"
+        ),
+        numpy_helper.from_array(np.zeros(3, dtype=np.float32), "b2"),
+        helper.make_tensor("one", TensorProto.FLOAT, [], [1.0]),
+    ]
+    nodes = [
+        helper.make_node("Concat", ["image", "mask"], ["features"], axis=1),
+        helper.make_node("Conv", ["features", "w1", "b1"], ["h1"], pads=[1] * 4),
+        helper.make_node("Relu", ["h1"], ["a1"]),
+        helper.make_node("Conv", ["a1", "w2", "b2"], ["h2"], pads=[1] * 4),
+        helper.make_node("Sigmoid", ["h2"], ["fill"]),
+        # output = image * (1 - mask) + fill * mask
+        helper.make_node("Sub", ["one", "mask"], ["keep"]),
+        helper.make_node("Mul", ["image", "keep"], ["kept"]),
+        helper.make_node("Mul", ["fill", "mask"], ["painted"]),
+        helper.make_node("Add", ["kept", "painted"], ["output"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "lama_stub",
+        [tensor("image", 3), tensor("mask", 1)],
+        [tensor("output", 3)],
+        weights,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    onnx.save(model, str(path))
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the stand-in LaMa model")
+    parser.add_argument("--output", default=str(STUB_MODEL))
+    args = parser.parse_args()
+    path = build_stub_model(Path(args.output))
+    print(f"Wrote {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
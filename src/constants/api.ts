@@ -42,6 +42,21 @@ export const API_TIMEOUTS = {
   PROCESSING: 600_000,
 } as const;
 
+// =============================================================================
+// UPLOADS
+// =============================================================================
+
+export const UPLOAD_CONFIG = {
+  /** Files larger than this use the resumable chunked protocol (bytes) */
+  RESUMABLE_THRESHOLD: 64 * 1024 * 1024,
+
+  /** Bytes sent per chunk request */
+  CHUNK_SIZE: 8 * 1024 * 1024,
+
+  /** Consecutive failed chunk requests before giving up */
+  MAX_RETRIES: 5,
+} as const;
+
 // =============================================================================
 // ERROR CODES
 // =============================================================================
@@ -5,4 +5,4 @@
 
 export { VIDEO_CONFIG, PROCESSING_CONFIG } from './video';
 export { BRUSH_CONFIG, ROI_CONFIG, ANIMATION_CONFIG, MASK_OVERLAY_COLOR } from './ui';
-export { API_CONFIG, API_TIMEOUTS, API_ERRORS } from './api';
+export { API_CONFIG, API_TIMEOUTS, API_ERRORS, UPLOAD_CONFIG } from './api';
@@ -43,6 +43,9 @@ export const PROCESSING_CONFIG = {
   /** Max simulated progress before completion */
   UPLOAD_PROGRESS_MAX: 90,
 
-  /** Polling interval for job status (ms) */
+  /** Polling interval for job status (ms), used when events are unavailable */
   JOB_POLL_INTERVAL: 1000,
+
+  /** Receive job progress as Server-Sent Events instead of polling */
+  USE_JOB_EVENTS: true,
 } as const;
@@ -2,14 +2,24 @@
  * Keira - Processing Job Hook
  * Regis Architecture v2.9.0
  *
- * Manages processing job lifecycle, polling, and status updates
+ * Manages processing job lifecycle and status updates, pushed over
+ * Server-Sent Events with polling as the fallback
  */
 
 import { useEffect, useRef, useCallback } from 'react';
 import { v4 as uuidv4 } from 'uuid';
 import { api } from '../services';
 import { PROCESSING_CONFIG } from '../constants';
-import type { ProcessingJob, ProcessingProgress, ROI, ExportSettings, VideoInfo, ProcessingStage } from '../types';
+import type {
+  ProcessingJob,
+  ProcessingProgress,
+  ProcessingEndEvent,
+  ProcessingStatusResponse,
+  ROI,
+  ExportSettings,
+  VideoInfo,
+  ProcessingStage,
+} from '../types';
 
 // =============================================================================
 // TYPES
@@ -70,11 +80,13 @@ function createInitialJob(
 export const STAGE_LABELS: Record<ProcessingStage, string> = {
   idle: 'Ready',
   uploading: 'Uploading...',
+  queued: 'Waiting in queue...',
   extracting: 'Extracting frames...',
   inpainting: 'AI Inpainting...',
   encoding: 'Encoding video...',
   complete: 'Complete!',
   error: 'Error',
+  cancelled: 'Cancelled',
 };
 
 export function getStageLabel(stage: ProcessingStage): string {
@@ -96,27 +108,25 @@ export function useProcessingJob({
   onError,
 }: UseProcessingJobOptions): UseProcessingJobReturn {
   const pollingRef = useRef<number | null>(null);
+  const eventsRef = useRef<EventSource | null>(null);
   const startedRef = useRef(false);
   const jobIdRef = useRef<string | null>(null);
 
-  // Cleanup polling on unmount
-  useEffect(() => {
-    return () => {
-      if (pollingRef.current) {
-        clearInterval(pollingRef.current);
-        pollingRef.current = null;
-      }
-    };
-  }, []);
-
-  // Stop polling helper
+  // Stop polling / event stream helper
   const stopPolling = useCallback(() => {
     if (pollingRef.current) {
       clearInterval(pollingRef.current);
       pollingRef.current = null;
     }
+    if (eventsRef.current) {
+      eventsRef.current.close();
+      eventsRef.current = null;
+    }
   }, []);
 
+  // Cleanup polling on unmount
+  useEffect(() => stopPolling, [stopPolling]);
+
   // Start status polling
   const startPolling = useCallback(
     (jobId: string) => {
@@ -131,6 +141,8 @@ export function useProcessingJob({
           } else if (status.status === 'error') {
             stopPolling();
             onError(status.error || 'Processing failed');
+          } else if (status.status === 'cancelled') {
+            stopPolling();
           }
         } catch (err) {
           console.error('Status poll error:', err);
@@ -140,6 +152,55 @@ export function useProcessingJob({
     [onProgressUpdate, onComplete, onError, stopPolling]
   );
 
+  // Subscribe to pushed status updates, polling if the stream fails
+  const startEvents = useCallback(
+    (jobId: string) => {
+      if (!PROCESSING_CONFIG.USE_JOB_EVENTS || typeof EventSource === 'undefined') {
+        startPolling(jobId);
+        return;
+      }
+
+      const source = new EventSource(api.getProcessingEventsUrl(jobId));
+      eventsRef.current = source;
+      let progress: ProcessingProgress | null = null;
+
+      // Full status on connect and on every stage change
+      source.addEventListener('stage', (event) => {
+        const status: ProcessingStatusResponse = JSON.parse((event as MessageEvent).data);
+        progress = status.progress;
+        onProgressUpdate(progress);
+      });
+
+      // Only the fields that changed since the last event
+      source.addEventListener('progress', (event) => {
+        if (!progress) return;
+        progress = { ...progress, ...JSON.parse((event as MessageEvent).data) };
+        onProgressUpdate(progress);
+      });
+
+      source.addEventListener('end', (event) => {
+        const status: ProcessingEndEvent = JSON.parse((event as MessageEvent).data);
+        stopPolling();
+        if (status.progress) onProgressUpdate(status.progress);
+
+        if (status.status === 'complete' && status.outputUrl) {
+          onComplete(status.outputUrl);
+        } else if (status.status === 'error') {
+          onError(status.error || 'Processing failed');
+        }
+      });
+
+      source.onerror = () => {
+        // Proxy without streaming support or server gone: fall back
+        if (eventsRef.current !== source) return;
+        source.close();
+        eventsRef.current = null;
+        startPolling(jobId);
+      };
+    },
+    [onProgressUpdate, onComplete, onError, startPolling, stopPolling]
+  );
+
   // Start processing job
   const startProcessing = useCallback(async () => {
     if (!video || !roi || !maskDataUrl || startedRef.current) return;
@@ -157,12 +218,12 @@ export function useProcessingJob({
       // Update job with server ID
       onJobCreated({ ...job, id: jobId });
 
-      // Start polling for status updates
-      startPolling(jobId);
+      // Follow status updates
+      startEvents(jobId);
     } catch (err) {
       onError(err instanceof Error ? err.message : 'Failed to start processing');
     }
-  }, [video, roi, maskDataUrl, settings, onJobCreated, onError, startPolling]);
+  }, [video, roi, maskDataUrl, settings, onJobCreated, onError, startEvents]);
 
   // Cancel processing job
   const cancelProcessing = useCallback(async () => {
@@ -20,6 +20,7 @@ export const api = {
 
   // Video (delegated)
   uploadVideo: videoApi.upload,
+  uploadVideoResumable: videoApi.uploadResumable,
   getFrame: videoApi.getFrame,
   deleteVideo: videoApi.delete,
 
@@ -27,6 +28,8 @@ export const api = {
   startProcessing: processingApi.start,
   getProcessingStatus: processingApi.getStatus,
   cancelProcessing: processingApi.cancel,
+  resumeProcessing: processingApi.resume,
+  getProcessingEventsUrl: processingApi.getEventsUrl,
   getOutputUrl: processingApi.getOutputUrl,
 };
 
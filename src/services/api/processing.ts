@@ -20,8 +20,8 @@ export const processingApi = {
     roi: ROI,
     maskDataUrl: string,
     settings: ExportSettings
-  ): Promise<{ jobId: string }> => {
-    return apiFetch<{ jobId: string }>('/process/start', {
+  ): Promise<{ jobId: string; cached?: boolean }> => {
+    return apiFetch<{ jobId: string; cached?: boolean }>('/process/start', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
@@ -49,6 +49,22 @@ export const processingApi = {
     });
   },
 
+  /**
+   * Resume a failed, cancelled or interrupted job from its checkpoint
+   */
+  resume: (jobId: string): Promise<{ jobId: string }> => {
+    return apiFetch<{ jobId: string }>(`/process/resume/${jobId}`, {
+      method: 'POST',
+    });
+  },
+
+  /**
+   * Server-Sent Events stream of a job's progress
+   */
+  getEventsUrl: (jobId: string): string => {
+    return `${API_CONFIG.BASE_URL}/process/events/${jobId}`;
+  },
+
   /**
    * Get output download URL
    */
@@ -3,7 +3,8 @@
  * Regis Architecture v2.9.0
  */
 
-import type { VideoInfo } from '../../types';
+import type { UploadSessionStatus, VideoInfo } from '../../types';
+import { UPLOAD_CONFIG } from '../../constants';
 import { apiFetch, apiFetchBlob } from './http';
 
 // =============================================================================
@@ -15,6 +16,10 @@ export const videoApi = {
    * Upload video file
    */
   upload: async (file: File): Promise<VideoInfo> => {
+    if (file.size > UPLOAD_CONFIG.RESUMABLE_THRESHOLD) {
+      return videoApi.uploadResumable(file);
+    }
+
     const formData = new FormData();
     formData.append('file', file);
 
@@ -24,6 +29,50 @@ export const videoApi = {
     });
   },
 
+  /**
+   * Upload video file in chunks, continuing after interrupted requests
+   */
+  uploadResumable: async (
+    file: File,
+    onProgress?: (sent: number, total: number) => void
+  ): Promise<VideoInfo> => {
+    const session = await apiFetch<UploadSessionStatus>('/upload/init', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filename: file.name, size: file.size }),
+    });
+
+    let offset = session.offset;
+    let failures = 0;
+    while (offset < file.size) {
+      try {
+        const status = await apiFetch<UploadSessionStatus>(
+          `/upload/${session.uploadId}?offset=${offset}`,
+          {
+            method: 'PUT',
+            body: file.slice(offset, offset + UPLOAD_CONFIG.CHUNK_SIZE),
+          }
+        );
+        offset = status.offset;
+        failures = 0;
+        onProgress?.(offset, file.size);
+      } catch (error) {
+        if (++failures > UPLOAD_CONFIG.MAX_RETRIES) {
+          throw error;
+        }
+        // Part of the chunk may have arrived, continue from the server's offset
+        const status = await apiFetch<UploadSessionStatus>(
+          `/upload/${session.uploadId}`
+        );
+        offset = status.offset;
+      }
+    }
+
+    return apiFetch<VideoInfo>(`/upload/${session.uploadId}/finalize`, {
+      method: 'POST',
+    });
+  },
+
   /**
    * Get frame at specific time
    */
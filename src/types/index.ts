@@ -16,9 +16,25 @@ export interface VideoInfo {
   width: number;
   height: number;
   size: number;
+  frameCount?: number;
+  codec?: string;
+  pixFmt?: string;
+  /** Degrees; width and height are already the rotated display size */
+  rotation?: number;
+  hasAudio?: boolean;
+  /** Average frames between keyframes, null when unknown */
+  keyframeInterval?: number | null;
   thumbnailUrl?: string;
 }
 
+/** Resumable upload state, offset is where the next chunk must start */
+export interface UploadSessionStatus {
+  uploadId: string;
+  offset: number;
+  size: number;
+  chunkSize: number;
+}
+
 export interface ROI {
   x: number;
   y: number;
@@ -39,11 +55,13 @@ export interface MaskData {
 export type ProcessingStage =
   | 'idle'
   | 'uploading'
+  | 'queued'
   | 'extracting'
   | 'inpainting'
   | 'encoding'
   | 'complete'
-  | 'error';
+  | 'error'
+  | 'cancelled';
 
 export interface ProcessingProgress {
   stage: ProcessingStage;
@@ -53,14 +71,48 @@ export interface ProcessingProgress {
   fps: number;
   eta: string;
   message: string;
+  cacheHitRate?: number;
 }
 
 export type ExportQuality = 'draft' | 'standard' | 'high' | 'lossless';
 
+export type InferenceMode = 'crop' | 'resize';
+
+export type ModelVariant = 'fp32' | 'int8' | 'fp16';
+
+export type FramePipeline = 'frames' | 'roi' | 'stream';
+
+export type FrameFormat = 'png' | 'bmp' | 'raw';
+
+export interface SessionSettings {
+  intraOpThreads?: number;
+  interOpThreads?: number;
+  executionMode?: 'sequential' | 'parallel';
+  graphOptimization?: 'disable' | 'basic' | 'extended' | 'all';
+  memArena?: boolean;
+  memPattern?: boolean;
+  providers?: string[];
+  cacheOptimizedModel?: boolean;
+}
+
 export interface ExportSettings {
   quality: ExportQuality;
+  model?: ModelVariant;
+  pipeline?: FramePipeline;
+  frameFormat?: FrameFormat;
+  pngCompression?: number;
   batchSize: number;
   ioWorkers: number;
+  decodeWorkers?: number;
+  prefetchDepth?: number;
+  writeQueueDepth?: number;
+  shards?: number;
+  inferenceMode?: InferenceMode;
+  cropPadding?: number;
+  featherRadius?: number;
+  temporalDedup?: boolean;
+  dedupTolerance?: number;
+  session?: SessionSettings;
 }
 
 export interface ProcessingJob {
@@ -92,11 +144,42 @@ export interface FrameResponse {
   time: number;
 }
 
+export interface TimeRange {
+  start: number;
+  end: number;
+}
+
 export interface StartProcessingRequest {
   videoId: string;
   roi: ROI;
   maskDataUrl: string;
   settings: ExportSettings;
+  segments?: TimeRange[];
+  /** Higher runs first when jobs are queued */
+  priority?: number;
+}
+
+/** Timings and queue depth of one worker pipeline stage */
+export interface WorkerStageTelemetry {
+  items: number;
+  /** Seconds spent working */
+  busy: number;
+  /** Seconds spent waiting on a neighbouring stage */
+  wait: number;
+  /** Fraction of all stages' busy time */
+  share?: number;
+  queue?: number;
+  queueMax?: number;
+  queueCapacity?: number;
+}
+
+/** Latest telemetry reported by the worker */
+export interface WorkerTelemetry {
+  elapsed: number;
+  /** Resident memory of the worker in bytes */
+  rss: number | null;
+  final?: boolean;
+  stages: Record<string, WorkerStageTelemetry>;
 }
 
 export interface ProcessingStatusResponse {
@@ -105,6 +188,16 @@ export interface ProcessingStatusResponse {
   progress: ProcessingProgress;
   outputUrl?: string;
   error?: string;
+  /** 1-based place in line while waiting for a job or stage slot */
+  queuePosition?: number;
+  /** Expected start, Unix time in seconds */
+  estimatedStart?: number;
+  telemetry?: WorkerTelemetry;
+}
+
+/** Final event of a job's event stream */
+export interface ProcessingEndEvent extends ProcessingStatusResponse {
+  cancelled?: boolean;
 }
 
 // =============================================================================
@@ -0,0 +1,44 @@
+"""
+Keira - Blending
+Regis Architecture v2.9.0
+
+Composites inpainted patches back into frames. Work is limited to the mask
+bounding box and written in place, using 8-bit fixed-point weights.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from masking import MaskPlan
+
+
+def blend_into(frame: np.ndarray, patch: np.ndarray, plan: MaskPlan) -> None:
+    """
+    Blend an inpainted patch into a frame, in place.
+
+    Args:
+        frame: BGR frame (H, W, 3) uint8, modified in place
+        patch: Inpainted BGR pixels (bh, bw, 3) uint8 covering plan.bbox
+        plan: Mask plan for the frame shape
+    """
+    if plan.empty:
+        return
+
+    x, y, w, h = plan.bbox
+    region = frame[y : y + h, x : x + w]
+    weights = plan.weights
+
+    if plan.binary:
+        # Hard mask: plain masked copy, no arithmetic
+        np.copyto(region, patch, where=plan.replace)
+        return
+
+    # out = (region * (255 - w) + patch * w) / 255 in uint16 fixed point
+    acc = np.multiply(region, 255 - weights, dtype=np.uint16)
+    acc += np.multiply(patch, weights, dtype=np.uint16)
+
+    # Exact rounded division by 255 without a divide
+    acc += 128
+    acc += acc >> 8
+    acc >>= 8
+    region[...] = acc
@@ -0,0 +1,184 @@
+"""
+Keira - Frame Store
+Regis Architecture v2.9.0
+
+Intermediate frame formats shared by the extractor, the worker and the
+encoder:
+
+  png  one file per frame, zlib at a tunable compression level
+  bmp  one uncompressed file per frame
+  raw  one bgr24 file per directory (frames.raw), memory-mapped and
+       indexed directly, with a frames.json sidecar holding its geometry
+
+Outputs mirror the input layout under the output directory, in the same
+format. Image outputs are written atomically and raw outputs carry a
+per-frame done marker (frames.done), so an interrupted job can tell which
+frames are finished.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+FRAME_FORMATS = ("png", "bmp", "raw")
+
+RAW_FILE = "frames.raw"
+RAW_SIDECAR = "frames.json"
+RAW_DONE = "frames.done"
+
+
+@dataclass(frozen=True)
+class FrameRef:
+    """One frame: an image file, or an index into a raw frame file."""
+
+    path: Path
+    index: int = -1
+
+    def __str__(self) -> str:
+        return f"{self.path}[{self.index}]" if self.index >= 0 else str(self.path)
+
+
+def read_sidecar(raw_path: Path) -> tuple[int, int, int]:
+    """(count, height, width) of a raw frame file."""
+    meta = json.loads((raw_path.parent / RAW_SIDECAR).read_text())
+    return int(meta["count"]), int(meta["height"]), int(meta["width"])
+
+
+def write_sidecar(raw_path: Path, count: int, height: int, width: int) -> None:
+    """Describe a raw frame file for readers."""
+    meta = {"count": count, "height": height, "width": width, "pix_fmt": "bgr24"}
+    (raw_path.parent / RAW_SIDECAR).write_text(json.dumps(meta))
+
+
+def list_frames(frames_dir: Path, fmt: str) -> list[FrameRef]:
+    """All frames under ``frames_dir`` in order, including subdirectories."""
+    if fmt != "raw":
+        return [FrameRef(p) for p in sorted(frames_dir.rglob(f"*.{fmt}"))]
+
+    refs = []
+    for raw_path in sorted(frames_dir.rglob(RAW_FILE)):
+        count = read_sidecar(raw_path)[0]
+        refs.extend(FrameRef(raw_path, i) for i in range(count))
+    return refs
+
+
+class FrameStore:
+    """
+    Loads input frames and saves processed ones for a job.
+
+    Safe to use from the reader and writer thread pools; raw files are
+    mapped once and shared.
+    """
+
+    def __init__(
+        self,
+        frames_dir: Path,
+        out_dir: Path,
+        fmt: str = "png",
+        png_compression: Optional[int] = None,
+    ):
+        self.frames_dir = Path(frames_dir)
+        self.out_dir = Path(out_dir)
+        self.fmt = fmt
+        self.write_params = []
+        if fmt == "png" and png_compression is not None:
+            self.write_params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        self._maps: dict[Path, np.memmap] = {}
+        self._lock = threading.Lock()
+
+    def output_path(self, ref: FrameRef) -> Path:
+        """Where the processed version of a frame (or raw file) goes."""
+        return self.out_dir / ref.path.relative_to(self.frames_dir)
+
+    def _map(self, path: Path, mode: str) -> np.memmap:
+        with self._lock:
+            mapped = self._maps.get(path)
+            if mapped is None:
+                count, height, width = read_sidecar(path)
+                shape = (count, height, width, 3)
+                if path.name == RAW_DONE:
+                    shape = (count,)
+                mapped = np.memmap(path, dtype=np.uint8, mode=mode, shape=shape)
+                self._maps[path] = mapped
+            return mapped
+
+    def prepare_outputs(
+        self, refs: list[FrameRef], keep_existing: bool = False
+    ) -> None:
+        """
+        Create output directories, and for raw, full-size output files.
+
+        Runs once before processing so shard processes can all open the
+        output files for writing without truncating each other. With
+        ``keep_existing`` raw outputs of the right size are left as they
+        are so finished frames survive a resume.
+        """
+        for parent in {ref.path.parent for ref in refs}:
+            out_parent = self.out_dir / parent.relative_to(self.frames_dir)
+            out_parent.mkdir(parents=True, exist_ok=True)
+            if self.fmt != "raw":
+                continue
+            count, height, width = read_sidecar(parent / RAW_FILE)
+            sizes = {
+                out_parent / RAW_FILE: count * height * width * 3,
+                out_parent / RAW_DONE: count,
+            }
+            for path, size in sizes.items():
+                if keep_existing and path.exists() and path.stat().st_size == size:
+                    continue
+                with open(path, "wb") as f:
+                    f.truncate(size)
+            write_sidecar(out_parent / RAW_FILE, count, height, width)
+
+    def is_done(self, ref: FrameRef) -> bool:
+        """Whether the processed frame is already fully written."""
+        out_path = self.output_path(ref)
+        if ref.index >= 0:
+            return bool(self._map(out_path.with_name(RAW_DONE), "r")[ref.index])
+        return out_path.exists()
+
+    def load(self, ref: FrameRef) -> Optional[np.ndarray]:
+        """Load a frame; raw frames are copied out of the mapping."""
+        try:
+            if ref.index >= 0:
+                return np.array(self._map(ref.path, "r")[ref.index])
+            return cv2.imread(str(ref.path))
+        except Exception:
+            return None
+
+    def save(self, ref: FrameRef, frame: np.ndarray) -> bool:
+        """Save a processed frame next to its mirrored input path."""
+        try:
+            out_path = self.output_path(ref)
+            if ref.index >= 0:
+                self._map(out_path, "r+")[ref.index] = frame
+                # Marked only after the pixels are in place
+                self._map(out_path.with_name(RAW_DONE), "r+")[ref.index] = 1
+                return True
+
+            ok, encoded = cv2.imencode(out_path.suffix, frame, self.write_params)
+            if not ok:
+                return False
+            # Never leave a partial file under the final name
+            tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+            tmp_path.write_bytes(encoded.tobytes())
+            os.replace(tmp_path, out_path)
+            return True
+        except Exception:
+            return False
+
+    def close(self) -> None:
+        """Flush raw output files and done markers to disk."""
+        with self._lock:
+            for mapped in self._maps.values():
+                if mapped.mode == "r+":
+                    mapped.flush()
+            self._maps.clear()
@@ -0,0 +1,134 @@
+"""
+Keira - Inpainting Service
+Regis Architecture v2.9.0
+
+Long-lived worker that keeps ONNX Runtime sessions loaded between jobs.
+Jobs arrive as JSON lines on stdin and take the same arguments as
+inpaint_worker.py, so a warm job behaves exactly like a cold one minus
+interpreter start-up and model load.
+
+Protocol (one line per message):
+    stdout  READY                      once, after start-up and preload
+    stdin   {"id": "...", "args": [...]}
+    stdout  {"event": ...}             model, progress and telemetry events
+                                       as printed by the worker (telemetry.py)
+    stdout  DONE:<id>:<processed>      job finished
+    stdout  FAILED:<id>:<message>      job failed, the service keeps running
+
+Usage:
+    python inpaint_service.py --preload models/lama_fp32.onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+from inpaint_worker import LamaInpainter, parse_args, run_job
+from session import DEFAULT_PROVIDERS, SessionConfig
+
+
+class InpainterCache:
+    """
+    LRU of loaded inpainters keyed by model file and session settings.
+
+    The model's mtime is part of the key, so replacing a model on disk
+    loads the new one on the next job.
+    """
+
+    def __init__(self, size: int = 2):
+        self.size = max(1, size)
+        self.loads = 0
+        self._entries: OrderedDict[tuple, LamaInpainter] = OrderedDict()
+
+    def get(self, model_path: str, config: SessionConfig) -> LamaInpainter:
+        """Return a loaded inpainter, loading and caching it on a miss."""
+        path = Path(model_path).resolve()
+        key = (str(path), path.stat().st_mtime_ns, config)
+
+        inpainter = self._entries.get(key)
+        if inpainter is not None:
+            self._entries.move_to_end(key)
+            return inpainter
+
+        inpainter = LamaInpainter(str(path), config)
+        self.loads += 1
+        self._entries[key] = inpainter
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return inpainter
+
+
+def parse_service_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Keira warm inpainting service")
+    parser.add_argument("--preload", help="Model to load before reporting READY")
+    parser.add_argument(
+        "--providers",
+        default=",".join(DEFAULT_PROVIDERS),
+        help="Execution providers for the preloaded model",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=2,
+        help="Loaded model/session combinations to keep",
+    )
+    return parser.parse_args(argv)
+
+
+def handle_job(line: str, cache: InpainterCache) -> str:
+    """
+    Run one job request and build its result line.
+
+    Args:
+        line: JSON job request
+        cache: Warm inpainters shared by all jobs
+
+    Returns:
+        DONE or FAILED line for the job
+    """
+    job_id = "?"
+    try:
+        request = json.loads(line)
+        job_id = str(request.get("id", "?"))
+        args = parse_args([str(a) for a in request["args"]])
+        processed = run_job(args, load_model=cache.get)
+    except SystemExit:
+        # argparse exits on bad arguments and has already printed why
+        return f"FAILED:{job_id}:Invalid worker arguments"
+    except Exception as e:
+        message = " ".join(str(e).split())
+        print(f"ERROR: {message}", file=sys.stderr)
+        return f"FAILED:{job_id}:{message}"
+    return f"DONE:{job_id}:{processed}"
+
+
+def main():
+    """Main entry point."""
+    args = parse_service_args()
+    cache = InpainterCache(args.cache_size)
+
+    if args.preload:
+        try:
+            config = SessionConfig(providers=tuple(args.providers.split(",")))
+            cache.get(args.preload, config)
+            print(f"Preloaded {args.preload}", file=sys.stderr)
+        except Exception as e:
+            # Not fatal, the first job loads the model instead
+            print(f"WARNING: Preload failed: {e}", file=sys.stderr)
+
+    print("READY", flush=True)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        print(handle_job(line, cache), flush=True)
+
+
+if __name__ == "__main__":
+    main()
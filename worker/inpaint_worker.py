@@ -9,49 +9,242 @@ Reads frames from input directory, applies inpainting mask, outputs processed fr
 from __future__ import annotations
 
 import argparse
+import multiprocessing
+import os
+import queue
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import cv2
 import numpy as np
-import onnxruntime as ort
-
-
-def parse_args() -> argparse.Namespace:
+from blending import blend_into
+from frame_store import FRAME_FORMATS, FrameRef, FrameStore, list_frames
+from masking import MaskPlan, MaskPlanCache
+from pipeline import FrameReader, FrameWriter, PipelineStats, batched
+from session import (
+    DEFAULT_PROVIDERS,
+    EXECUTION_MODES,
+    GRAPH_OPT_LEVELS,
+    SessionConfig,
+    create_session,
+)
+from telemetry import Telemetry, emit, merge_reports, rss_bytes, stage_report
+from temporal_cache import CacheEntry, TemporalCache
+from video_stream import (
+    FramePool,
+    StreamReader,
+    StreamWriter,
+    decoder_command,
+    encoder_command,
+)
+
+INFERENCE_MODES = ("crop", "resize")
+
+# (processed, temporal cache hits, temporal cache lookups)
+ProgressCallback = Callable[[int, int, int], None]
+
+# (pipeline stats, whether the job finished), after every batch and at the end
+StatsCallback = Callable[[PipelineStats, bool], None]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
         description="Inpaint video frames using LaMa model"
     )
-    parser.add_argument("--frames", required=True, help="Input frames directory")
-    parser.add_argument("--out", required=True, help="Output frames directory")
+    parser.add_argument("--frames", help="Input frames directory")
+    parser.add_argument("--out", help="Output frames directory")
     parser.add_argument("--roi", required=True, help="ROI as x,y,width,height")
     parser.add_argument("--model", required=True, help="Path to LaMa ONNX model")
     parser.add_argument("--mask", required=True, help="Path to mask image")
-    parser.add_argument("--ext", default=".png", help="Frame file extension")
+    parser.add_argument(
+        "--ext",
+        default=".png",
+        help="Intermediate frame format: .png, .bmp or .raw (memory-mapped)",
+    )
+    parser.add_argument(
+        "--png-compression",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="zlib level for PNG output frames (default: OpenCV default)",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Resume: leave frames already written to --out untouched",
+    )
+    parser.add_argument(
+        "--input-video",
+        help="Stream frames from this video through ffmpeg instead of --frames",
+    )
+    parser.add_argument(
+        "--output-video", help="Encode frames to this video instead of --out"
+    )
+    parser.add_argument("--size", help="Video frame size as WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=30.0, help="Output frame rate")
+    parser.add_argument(
+        "--total-frames",
+        type=int,
+        default=0,
+        help="Expected frame count of --input-video, for progress",
+    )
+    parser.add_argument(
+        "--audio", help="Audio source for --output-video (default: --input-video)"
+    )
+    parser.add_argument("--crf", type=int, default=18, help="x264 CRF")
+    parser.add_argument("--preset", default="medium", help="x264 preset")
     parser.add_argument(
         "--batch-size", type=int, default=8, help="Batch size for inference"
     )
     parser.add_argument(
         "--io-workers", type=int, default=4, help="Number of IO workers"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--decode-workers", type=int, default=2, help="Number of frame decoders"
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=16,
+        help="Maximum frames decoded ahead of inference",
+    )
+    parser.add_argument(
+        "--write-queue",
+        type=int,
+        default=16,
+        help="Maximum frames waiting to be written before inference blocks",
+    )
+    parser.add_argument(
+        "--inference-mode",
+        choices=INFERENCE_MODES,
+        default="crop",
+        help="crop: inpaint a window around the mask; resize: inpaint whole frame",
+    )
+    parser.add_argument(
+        "--crop-padding",
+        type=int,
+        default=64,
+        help="Context pixels kept around the mask bounding box in crop mode",
+    )
+    parser.add_argument(
+        "--dedup",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Reuse patches of frames whose context around the mask is unchanged",
+    )
+    parser.add_argument(
+        "--dedup-tolerance",
+        type=float,
+        default=0.0,
+        help="Mean absolute pixel difference still treated as unchanged (0 = exact)",
+    )
+    parser.add_argument(
+        "--dedup-cache",
+        type=int,
+        default=8,
+        help="Number of recent patches kept for reuse",
+    )
+    parser.add_argument(
+        "--feather",
+        type=int,
+        default=0,
+        help="Radius in pixels of a soft blend edge around the mask (0 = hard)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Split frames across this many processes, each with its own session",
+    )
+    parser.add_argument(
+        "--intra-op-threads",
+        type=int,
+        default=0,
+        help="Threads used inside an operator (0 = ONNX Runtime default)",
+    )
+    parser.add_argument(
+        "--inter-op-threads",
+        type=int,
+        default=0,
+        help="Threads used across operators in parallel mode (0 = default)",
+    )
+    parser.add_argument(
+        "--execution-mode", choices=list(EXECUTION_MODES), default="sequential"
+    )
+    parser.add_argument(
+        "--graph-opt-level", choices=list(GRAPH_OPT_LEVELS), default="all"
+    )
+    parser.add_argument(
+        "--mem-arena",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Use the CPU memory arena",
+    )
+    parser.add_argument(
+        "--mem-pattern",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Pre-plan memory allocations from the first run",
+    )
+    parser.add_argument(
+        "--providers",
+        default=",".join(DEFAULT_PROVIDERS),
+        help="Comma separated execution providers in priority order",
+    )
+    parser.add_argument(
+        "--optimized-cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Save the optimized graph next to the model and reuse it",
+    )
+    return parser.parse_args(argv)
+
+
+def session_config_from_args(args: argparse.Namespace) -> SessionConfig:
+    """Build the ONNX Runtime session config from CLI arguments."""
+    providers = tuple(p.strip() for p in args.providers.split(",") if p.strip())
+    return SessionConfig(
+        intra_op_threads=args.intra_op_threads,
+        inter_op_threads=args.inter_op_threads,
+        execution_mode=args.execution_mode,
+        graph_optimization=args.graph_opt_level,
+        mem_arena=args.mem_arena,
+        mem_pattern=args.mem_pattern,
+        providers=providers or DEFAULT_PROVIDERS,
+        cache_optimized=args.optimized_cache,
+    )
 
 
 class LamaInpainter:
     """LaMa inpainting model wrapper using ONNX Runtime."""
 
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, config: Optional[SessionConfig] = None):
         """Initialize the inpainter with ONNX model."""
-        # Use GPU if available, fallback to CPU
-        providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
-        self.session = ort.InferenceSession(model_path, providers=providers)
+        # Providers, threading and graph options come from the session config
+        self.session = create_session(model_path, config)
         self.input_name = self.session.get_inputs()[0].name
         self.mask_name = self.session.get_inputs()[1].name
         self.output_name = self.session.get_outputs()[0].name
 
+        input_shape = self.session.get_inputs()[0].shape
+
+        # LaMa exports usually expect 512x512 input
+        size_dim = input_shape[2] if len(input_shape) == 4 else None
+        self.input_size = (
+            size_dim if isinstance(size_dim, int) and size_dim > 0 else 512
+        )
+
+        # Models exported with a fixed batch dimension only accept exactly
+        # that many images per run; dynamic ones report a name or None.
+        batch_dim = input_shape[0]
+        self.fixed_batch: Optional[int] = (
+            batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+        )
+        self.loaded_at = time.monotonic()
+
     def inpaint(self, image: np.ndarray, mask: np.ndarray) -> np.ndarray:
         """
         Inpaint image using the mask.
@@ -63,203 +256,767 @@ class LamaInpainter:
         Returns:
             Inpainted BGR image (H, W, 3) uint8
         """
-        orig_h, orig_w = image.shape[:2]
+        return self.inpaint_batch([image], [mask])[0]
 
-        # LaMa expects 512x512 input
-        img_resized = cv2.resize(image, (512, 512))
-        mask_resized = cv2.resize(mask, (512, 512), interpolation=cv2.INTER_NEAREST)
+    def inpaint_batch(
+        self, images: list[np.ndarray], masks: list[np.ndarray]
+    ) -> list[np.ndarray]:
+        """
+        Inpaint several images with a single inference call.
 
-        # Normalize image to [0, 1] and convert to CHW format
-        img_norm = img_resized.astype(np.float32) / 255.0
-        img_chw = np.transpose(img_norm, (2, 0, 1))
-        img_batch = np.expand_dims(img_chw, axis=0)
+        Args:
+            images: BGR images (H, W, 3) uint8, sizes may differ
+            masks: Binary masks (H, W) uint8 matching each image
 
-        # Normalize mask to [0, 1] and add batch/channel dims
-        mask_norm = (mask_resized > 127).astype(np.float32)
-        mask_batch = np.expand_dims(np.expand_dims(mask_norm, axis=0), axis=0)
+        Returns:
+            Inpainted BGR images, each at its original size
+        """
+        if not images:
+            return []
+        output = self.run_batch(*self.prepare_batch(images, masks))
+        return self.restore_batch(images, output)
+
+    def prepare_batch(
+        self, images: list[np.ndarray], masks: list[np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Resize and normalize images and masks into NCHW model inputs."""
+        size = self.input_size
+        img_batch = np.empty((len(images), 3, size, size), dtype=np.float32)
+        mask_batch = np.empty((len(images), 1, size, size), dtype=np.float32)
+
+        for i, (image, mask) in enumerate(zip(images, masks)):
+            img_resized = cv2.resize(image, (size, size))
+            mask_resized = cv2.resize(
+                mask, (size, size), interpolation=cv2.INTER_NEAREST
+            )
 
-        # Run inference
-        result = self.session.run(
-            [self.output_name], {self.input_name: img_batch, self.mask_name: mask_batch}
-        )[0]
+            # Normalize image to [0, 1] and convert to CHW format
+            np.multiply(
+                img_resized.transpose(2, 0, 1),
+                np.float32(1.0 / 255.0),
+                out=img_batch[i],
+                casting="unsafe",
+            )
+            # Normalize mask to [0, 1]
+            np.greater(mask_resized, 127, out=mask_batch[i, 0], casting="unsafe")
+
+        return img_batch, mask_batch
+
+    def restore_batch(
+        self, images: list[np.ndarray], output: np.ndarray
+    ) -> list[np.ndarray]:
+        """Convert model outputs back to BGR images at each input's size."""
+        results = []
+        for image, result in zip(images, output):
+            # Convert output back to image format
+            result = np.transpose(result, (1, 2, 0))
+            result = np.clip(result * 255, 0, 255).astype(np.uint8)
+
+            # Resize back to original dimensions
+            orig_h, orig_w = image.shape[:2]
+            results.append(cv2.resize(result, (orig_w, orig_h)))
+
+        return results
+
+    def run_batch(self, img_batch: np.ndarray, mask_batch: np.ndarray) -> np.ndarray:
+        """Run the session over an NCHW batch, honoring a fixed batch size."""
+        count = len(img_batch)
+
+        if self.fixed_batch is None:
+            try:
+                return self.session.run(
+                    [self.output_name],
+                    {self.input_name: img_batch, self.mask_name: mask_batch},
+                )[0]
+            except Exception as e:
+                if count == 1:
+                    raise
+                # Some exports declare a symbolic batch dim but only
+                # support one image; remember that and fall back.
+                print(
+                    f"WARNING: Batched inference failed ({e}), "
+                    "falling back to batch size 1",
+                    file=sys.stderr,
+                )
+                self.fixed_batch = 1
+
+        step = self.fixed_batch
+        outputs = []
+        for start in range(0, count, step):
+            img_chunk = img_batch[start : start + step]
+            mask_chunk = mask_batch[start : start + step]
+            valid = len(img_chunk)
+
+            # Pad the last chunk by repeating its final image
+            if valid < step:
+                pad = step - valid
+                img_chunk = np.concatenate(
+                    [img_chunk, np.repeat(img_chunk[-1:], pad, axis=0)]
+                )
+                mask_chunk = np.concatenate(
+                    [mask_chunk, np.repeat(mask_chunk[-1:], pad, axis=0)]
+                )
+
+            result = self.session.run(
+                [self.output_name],
+                {self.input_name: img_chunk, self.mask_name: mask_chunk},
+            )[0]
+            outputs.append(result[:valid])
+
+        return np.concatenate(outputs)
+
+
+class WorkerError(Exception):
+    """Invalid job input or lost output, reported as ERROR without a traceback."""
+
+
+# Builds an inpainter from (model path, session config)
+ModelLoader = Callable[[str, SessionConfig], LamaInpainter]
+
+
+def frame_store_from_args(args: argparse.Namespace, out_dir: Path) -> FrameStore:
+    """Frame store for the job's input directory and frame format."""
+    return FrameStore(
+        Path(args.frames), out_dir, frame_format(args), args.png_compression
+    )
 
-        # Convert output back to image format
-        result = np.squeeze(result)
-        result = np.transpose(result, (1, 2, 0))
-        result = np.clip(result * 255, 0, 255).astype(np.uint8)
 
-        # Resize back to original dimensions
-        result = cv2.resize(result, (orig_w, orig_h))
+def frame_format(args: argparse.Namespace) -> str:
+    """Intermediate frame format from --ext, e.g. ".png" -> "png"."""
+    return args.ext.lstrip(".").lower()
 
-        return result
 
+def process_batch(
+    inpainter: LamaInpainter,
+    frames: list[np.ndarray],
+    plans: MaskPlanCache,
+    cache: Optional[TemporalCache] = None,
+    stats: Optional[PipelineStats] = None,
+) -> list[np.ndarray]:
+    """
+    Inpaint a batch of frames with one inference call.
 
-def load_frame(path: Path) -> Optional[np.ndarray]:
-    """Load a frame from disk."""
-    try:
-        return cv2.imread(str(path))
-    except Exception:
-        return None
+    Args:
+        inpainter: Loaded LaMa model
+        frames: BGR frames (H, W, 3) uint8, blended in place
+        plans: Mask plans for the job
+        cache: Optional temporal cache to reuse patches of unchanged frames
+        stats: Pipeline stats to add preprocess, infer and blend time to
+
+    Returns:
+        Processed frames, in input order
+    """
+    stats = stats or PipelineStats()
+    pending: list[tuple[int, MaskPlan, Optional[CacheEntry]]] = []
+    reused: list[tuple[int, MaskPlan, CacheEntry]] = []
+
+    with stats.preprocess.timing(len(frames)):
+        for i, frame in enumerate(frames):
+            # Frames without any masked pixels are passed through unchanged
+            plan = plans.get(frame.shape)
+            if plan.empty:
+                continue
+
+            if cache is None:
+                pending.append((i, plan, None))
+                continue
+
+            # Look up before any frame of the batch is blended in place
+            entry, hit = cache.match(frame, plan)
+            if hit:
+                reused.append((i, plan, entry))
+            else:
+                pending.append((i, plan, entry))
+
+        crops = []
+        crop_masks = []
+        for i, plan, _ in pending:
+            x1, y1, x2, y2 = plan.window
+            crops.append(frames[i][y1:y2, x1:x2])
+            crop_masks.append(plan.mask[y1:y2, x1:x2])
+
+        inputs = inpainter.prepare_batch(crops, crop_masks) if crops else None
+
+    with stats.infer.timing(len(frames)):
+        output = inpainter.run_batch(*inputs) if inputs else []
+
+    with stats.blend.timing(len(frames)):
+        inpainted = inpainter.restore_batch(crops, output)
+        for (i, plan, entry), result in zip(pending, inpainted):
+            x1, y1, _, _ = plan.window
+            bx, by, bw, bh = plan.bbox
+            # Offset of the bbox inside the inference window
+            rx, ry = bx - x1, by - y1
+            patch = result[ry : ry + bh, rx : rx + bw]
+            if entry is not None:
+                entry.patch = patch.copy()
+
+            # Blend: only replace masked pixels, inside the bbox
+            blend_into(frames[i], patch, plan)
+
+        for i, plan, entry in reused:
+            blend_into(frames[i], entry.patch, plan)
+
+    return frames
+
+
+def report_progress(
+    processed: int,
+    total_frames: int,
+    start_time: float,
+    hit_rate: float = 0.0,
+    resumed: int = 0,
+) -> None:
+    """
+    Emit a progress event for the API.
+
+    ``resumed`` frames were finished by an earlier run; they count towards
+    progress but not towards the frame rate.
+    """
+    elapsed = time.time() - start_time
+    fps = (processed - resumed) / elapsed if elapsed > 0 else 0
+    percent = int((processed / total_frames) * 100)
+    eta_seconds = int((total_frames - processed) / fps) if fps > 0 else 0
+    eta_str = f"{eta_seconds // 60:02d}:{eta_seconds % 60:02d}"
+
+    emit(
+        "progress",
+        percent=percent,
+        processed=processed,
+        total=total_frames,
+        fps=round(fps, 1),
+        eta=eta_str,
+        hitRate=round(hit_rate, 3),
+    )
+
+
+def stats_reporter(telemetry: Telemetry) -> StatsCallback:
+    """StatsCallback emitting throttled telemetry and a final report."""
+
+    def report(stats: PipelineStats, final: bool) -> None:
+        if final:
+            telemetry.report(stage_report(stats), final=True)
+        else:
+            telemetry.tick(stats)
 
+    return report
 
-def save_frame(path: Path, frame: np.ndarray) -> bool:
-    """Save a frame to disk."""
+
+def load_inpainter(
+    args: argparse.Namespace, load_model: ModelLoader, label: str = ""
+) -> LamaInpainter:
+    """Load the model for a job, logging time taken and providers."""
+    print(f"{label}Loading LaMa model...", file=sys.stderr)
+    load_start = time.monotonic()
     try:
-        cv2.imwrite(str(path), frame)
-        return True
-    except Exception:
-        return False
+        inpainter = load_model(args.model, session_config_from_args(args))
+    except Exception as e:
+        raise RuntimeError(f"Failed to load model: {e}") from e
+
+    load_time = time.monotonic() - load_start
+    # A warm service hands out sessions it loaded for an earlier job
+    emit(
+        "model",
+        load=round(load_time, 3),
+        cached=inpainter.loaded_at < load_start,
+    )
+    print(
+        f"{label}Model loaded in {load_time:.1f}s "
+        f"({', '.join(inpainter.session.get_providers())}), starting processing...",
+        file=sys.stderr,
+    )
+    return inpainter
+
+
+def build_job_state(
+    args: argparse.Namespace,
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    inpainter: LamaInpainter,
+) -> tuple[MaskPlanCache, Optional[TemporalCache]]:
+    """Mask plans and, if enabled, the temporal cache for a job."""
+    # Mask geometry is constant for the job, build it once per frame shape
+    plans = MaskPlanCache(
+        mask_img,
+        roi,
+        mode=args.inference_mode,
+        crop_padding=args.crop_padding,
+        min_size=inpainter.input_size,
+        feather=args.feather,
+    )
+    cache = (
+        TemporalCache(args.dedup_tolerance, args.dedup_cache) if args.dedup else None
+    )
+    return plans, cache
+
+
+def log_summary(
+    label: str,
+    processed: int,
+    total: int,
+    start_time: float,
+    stats: PipelineStats,
+    cache: Optional[TemporalCache],
+) -> None:
+    """Print the end of job summary to stderr."""
+    total_time = time.time() - start_time
+    print(
+        f"{label}Completed {processed}/{total} frames in {total_time:.1f}s",
+        file=sys.stderr,
+    )
+    print(f"{label}Pipeline: {stats.summary()}", file=sys.stderr)
+    if cache:
+        print(
+            f"{label}Temporal cache: {cache.hits}/{cache.lookups} frames reused "
+            f"({cache.hit_rate * 100:.1f}%)",
+            file=sys.stderr,
+        )
+
+
+def run_frames(
+    args: argparse.Namespace,
+    frame_files: list[FrameRef],
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    out_dir: Path,
+    on_progress: ProgressCallback,
+    label: str = "",
+    load_model: ModelLoader = LamaInpainter,
+    on_stats: Optional[StatsCallback] = None,
+) -> int:
+    """
+    Load the model and inpaint a list of frames.
+
+    Args:
+        args: Parsed worker arguments
+        frame_files: Frames to process, in order
+        mask_img: The mask image for the ROI region
+        roi: (x, y, width, height) of the ROI
+        out_dir: Output frames directory
+        on_progress: Called with (processed, cache hits, cache lookups)
+        label: Prefix for log lines, used by shards
+        load_model: Builds the inpainter from (model path, session config)
+        on_stats: Called with the pipeline stats after each batch and once
+            all frames are written
 
+    Returns:
+        Number of frames processed
 
-def create_roi_mask(
-    full_mask: np.ndarray, roi: tuple[int, int, int, int], frame_shape: tuple[int, int]
-) -> np.ndarray:
+    Raises:
+        WorkerError: If any output frame could not be saved
     """
-    Create a full-frame mask from ROI mask.
+    inpainter = load_inpainter(args, load_model, label)
+    plans, cache = build_job_state(args, mask_img, roi, inpainter)
+
+    # Process frames
+    start_time = time.time()
+    processed = 0
+
+    # Outputs mirror the input layout, e.g. per-segment subdirectories
+    store = frame_store_from_args(args, out_dir)
+    batch_size = max(1, args.batch_size)
+    stats = PipelineStats(prefetch=args.prefetch, write_queue=args.write_queue)
+    reader = FrameReader(
+        frame_files,
+        store.load,
+        stats,
+        workers=args.decode_workers,
+        depth=args.prefetch,
+    )
+
+    with FrameWriter(
+        store.save, stats, workers=args.io_workers, depth=args.write_queue
+    ) as writer:
+        for batch in batched(reader, batch_size):
+            results = process_batch(
+                inpainter, [frame for _, frame in batch], plans, cache, stats
+            )
+
+            for (ref, _), result in zip(batch, results):
+                # Save output, blocks while the write queue is full
+                writer.submit(ref, result)
+
+                processed += 1
+                on_progress(
+                    processed,
+                    cache.hits if cache else 0,
+                    cache.lookups if cache else 0,
+                )
+            if on_stats:
+                on_stats(stats, False)
+
+    store.close()
+    # A missing output frame would cut the encoded video short there
+    if writer.failed:
+        raise WorkerError(
+            f"{label}{writer.failed} of {processed} frames failed to save"
+        )
+    if on_stats:
+        on_stats(stats, True)
+    log_summary(label, processed, len(frame_files), start_time, stats, cache)
+    return processed
+
+
+def run_stream(
+    args: argparse.Namespace,
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    on_progress: ProgressCallback,
+    load_model: ModelLoader = LamaInpainter,
+    on_stats: Optional[StatsCallback] = None,
+) -> int:
+    """
+    Inpaint a video piped through ffmpeg, without frame files on disk.
 
     Args:
-        full_mask: The mask image for the ROI region
+        args: Parsed worker arguments, with --input-video and --output-video
+        mask_img: The mask image for the ROI region
         roi: (x, y, width, height) of the ROI
-        frame_shape: (height, width) of the full frame
+        on_progress: Called with (processed, cache hits, cache lookups)
+        load_model: Builds the inpainter from (model path, session config)
+        on_stats: Called with the pipeline stats after each batch and once
+            all frames are encoded
 
     Returns:
-        Full frame mask with ROI mask placed at correct position
+        Number of frames processed
+    """
+    width, height = map(int, args.size.lower().split("x"))
+    inpainter = load_inpainter(args, load_model)
+    plans, cache = build_job_state(args, mask_img, roi, inpainter)
+
+    start_time = time.time()
+    processed = 0
+
+    batch_size = max(1, args.batch_size)
+    stats = PipelineStats(prefetch=args.prefetch, write_queue=args.write_queue)
+    # Every buffer in flight: read-ahead, one batch, write queue, one per thread
+    pool = FramePool(
+        (height, width, 3), args.prefetch + batch_size + args.write_queue + 2
+    )
+    reader = StreamReader(
+        decoder_command(Path(args.input_video)), pool, stats, depth=args.prefetch
+    )
+    encoder = encoder_command(
+        Path(args.output_video),
+        (width, height),
+        args.fps,
+        Path(args.audio or args.input_video),
+        crf=args.crf,
+        preset=args.preset,
+    )
+
+    with StreamWriter(encoder, pool, stats, depth=args.write_queue) as writer:
+        for batch in batched(reader, batch_size):
+            results = process_batch(inpainter, batch, plans, cache, stats)
+
+            for result in results:
+                # Encode output, blocks while the write queue is full
+                writer.submit(result)
+
+                processed += 1
+                on_progress(
+                    processed,
+                    cache.hits if cache else 0,
+                    cache.lookups if cache else 0,
+                )
+            if on_stats:
+                on_stats(stats, False)
+
+    if on_stats:
+        on_stats(stats, True)
+    log_summary("", processed, processed, start_time, stats, cache)
+    return processed
+
+
+def split_ranges(count: int, shards: int) -> list[tuple[int, int]]:
+    """Split [0, count) into at most ``shards`` contiguous, near-equal ranges."""
+    shards = max(1, min(shards, count))
+    size, extra = divmod(count, shards)
+    ranges = []
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _run_shard(
+    args: argparse.Namespace,
+    frame_files: list[FrameRef],
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    out_dir: Path,
+    index: int,
+    events: multiprocessing.Queue,
+) -> None:
+    """Shard process entry point, reports through the events queue."""
+    telemetry = Telemetry()
+
+    def on_stats(stats: PipelineStats, final: bool) -> None:
+        if final or telemetry.due():
+            events.put(("telemetry", index, stage_report(stats), rss_bytes(), final))
+
+    try:
+        processed = run_frames(
+            args,
+            frame_files,
+            mask_img,
+            roi,
+            out_dir,
+            lambda done, hits, lookups: events.put(
+                ("progress", index, done, hits, lookups)
+            ),
+            label=f"[shard {index}] ",
+            on_stats=on_stats,
+        )
+        events.put(("done", index, processed))
+    except Exception as e:
+        events.put(("error", index, str(e)))
+
+
+def run_sharded(
+    args: argparse.Namespace,
+    frame_files: list[FrameRef],
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    out_dir: Path,
+    resumed: int = 0,
+) -> int:
     """
-    x, y, w, h = roi
-    frame_h, frame_w = frame_shape
+    Split frames into contiguous ranges and inpaint them in parallel processes.
 
-    # Create empty mask for full frame
-    result_mask = np.zeros((frame_h, frame_w), dtype=np.uint8)
+    Each shard loads its own session. Unless set explicitly, the intra-op
+    thread count is the CPU count divided by the number of shards so the
+    shards do not oversubscribe the machine. Progress and telemetry from
+    all shards are merged into the single event stream.
 
-    # Resize mask to ROI dimensions if needed
-    if full_mask.shape[:2] != (h, w):
-        full_mask = cv2.resize(full_mask, (w, h), interpolation=cv2.INTER_NEAREST)
+    Args:
+        resumed: Frames already finished by an earlier run, for progress
 
-    # Ensure mask is single channel
-    if len(full_mask.shape) == 3:
-        full_mask = cv2.cvtColor(full_mask, cv2.COLOR_BGR2GRAY)
+    Returns:
+        Number of frames processed, including resumed ones
+    """
+    total_frames = len(frame_files) + resumed
+    ranges = split_ranges(len(frame_files), args.shards)
+    shard_args = argparse.Namespace(**vars(args))
+    if shard_args.intra_op_threads <= 0:
+        shard_args.intra_op_threads = max(1, (os.cpu_count() or 1) // len(ranges))
 
-    # Place mask at ROI position (clamp to frame bounds)
-    x1, y1 = max(0, x), max(0, y)
-    x2, y2 = min(frame_w, x + w), min(frame_h, y + h)
+    print(
+        f"Running {len(ranges)} shards with {shard_args.intra_op_threads} threads each",
+        file=sys.stderr,
+    )
 
-    mask_x1 = x1 - x
-    mask_y1 = y1 - y
-    mask_x2 = mask_x1 + (x2 - x1)
-    mask_y2 = mask_y1 + (y2 - y1)
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_run_shard,
+            args=(
+                shard_args,
+                frame_files[start:end],
+                mask_img,
+                roi,
+                out_dir,
+                index,
+                events,
+            ),
+            daemon=True,
+        )
+        for index, (start, end) in enumerate(ranges)
+    ]
+    for process in processes:
+        process.start()
 
-    result_mask[y1:y2, x1:x2] = full_mask[mask_y1:mask_y2, mask_x1:mask_x2]
+    start_time = time.time()
+    telemetry = Telemetry()
+    progress = {index: (0, 0, 0) for index in range(len(processes))}
+    # Latest (stage report, rss, final) of each shard
+    reports: dict[int, tuple[dict, Optional[int], bool]] = {}
+    done: set[int] = set()
+    failure: Optional[str] = None
+
+    while len(done) < len(processes) and failure is None:
+        try:
+            kind, index, *payload = events.get(timeout=1.0)
+        except queue.Empty:
+            for index, process in enumerate(processes):
+                if index not in done and not process.is_alive():
+                    failure = f"Shard {index} exited with code {process.exitcode}"
+            continue
+
+        if kind == "progress":
+            progress[index] = tuple(payload)
+            processed = resumed + sum(p[0] for p in progress.values())
+            hits = sum(p[1] for p in progress.values())
+            lookups = sum(p[2] for p in progress.values())
+            report_progress(
+                processed,
+                total_frames,
+                start_time,
+                hits / lookups if lookups else 0.0,
+                resumed,
+            )
+        elif kind == "telemetry":
+            reports[index] = tuple(payload)
+            telemetry.report(
+                merge_reports([report for report, _, _ in reports.values()]),
+                rss=(rss_bytes() or 0)
+                + sum(rss or 0 for _, rss, _ in reports.values()),
+                final=len(reports) == len(processes)
+                and all(final for _, _, final in reports.values()),
+            )
+        elif kind == "done":
+            done.add(index)
+        else:
+            failure = f"Shard {index}: {payload[0]}"
 
-    return result_mask
+    if failure is not None:
+        for process in processes:
+            process.terminate()
+        raise RuntimeError(failure)
 
+    for process in processes:
+        process.join()
 
-def main():
-    """Main entry point."""
-    args = parse_args()
+    return resumed + sum(p[0] for p in progress.values())
 
-    frames_dir = Path(args.frames)
-    out_dir = Path(args.out)
+
+def run_job(args: argparse.Namespace, load_model: ModelLoader = LamaInpainter) -> int:
+    """
+    Validate inputs and inpaint every frame of a job.
+
+    Args:
+        args: Parsed worker arguments
+        load_model: Builds the inpainter, the service passes a warm cache
+
+    Returns:
+        Number of frames processed; with --skip-existing this includes
+        frames finished by an earlier run
+
+    Raises:
+        WorkerError: If the job inputs are invalid
+    """
     model_path = Path(args.model)
     mask_path = Path(args.mask)
 
     # Parse ROI
     roi = tuple(map(int, args.roi.split(",")))
     if len(roi) != 4:
-        print("ERROR: ROI must be x,y,width,height", file=sys.stderr)
-        sys.exit(1)
-
-    # Validate paths
-    if not frames_dir.exists():
-        print(f"ERROR: Frames directory not found: {frames_dir}", file=sys.stderr)
-        sys.exit(1)
+        raise WorkerError("ROI must be x,y,width,height")
+
+    streaming = bool(args.input_video)
+    if streaming:
+        if not args.output_video:
+            raise WorkerError("--input-video requires --output-video")
+        if not args.size or len(args.size.lower().split("x")) != 2:
+            raise WorkerError("--input-video requires --size WIDTHxHEIGHT")
+        if not Path(args.input_video).exists():
+            raise WorkerError(f"Input video not found: {args.input_video}")
+    elif not args.frames or not args.out:
+        raise WorkerError("Either --frames and --out or --input-video is required")
+    elif not Path(args.frames).exists():
+        raise WorkerError(f"Frames directory not found: {args.frames}")
 
     if not model_path.exists():
-        print(f"ERROR: Model not found: {model_path}", file=sys.stderr)
-        sys.exit(1)
+        raise WorkerError(f"Model not found: {model_path}")
 
     if not mask_path.exists():
-        print(f"ERROR: Mask not found: {mask_path}", file=sys.stderr)
-        sys.exit(1)
-
-    out_dir.mkdir(parents=True, exist_ok=True)
+        raise WorkerError(f"Mask not found: {mask_path}")
 
     # Load mask
     mask_img = cv2.imread(str(mask_path), cv2.IMREAD_GRAYSCALE)
     if mask_img is None:
-        print(f"ERROR: Failed to load mask: {mask_path}", file=sys.stderr)
-        sys.exit(1)
+        raise WorkerError(f"Failed to load mask: {mask_path}")
+
+    start_time = time.time()
+    on_stats = stats_reporter(Telemetry())
+    if streaming:
+        Path(args.output_video).parent.mkdir(parents=True, exist_ok=True)
+        # The frame count is only an estimate from the container metadata
+        return run_stream(
+            args,
+            mask_img,
+            roi,
+            lambda done, hits, lookups: report_progress(
+                done,
+                max(args.total_frames, done),
+                start_time,
+                hits / lookups if lookups else 0.0,
+            ),
+            load_model=load_model,
+            on_stats=on_stats,
+        )
+
+    frames_dir = Path(args.frames)
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
 
     # Get list of frames
-    frame_files = sorted(frames_dir.glob(f"*{args.ext}"))
+    if frame_format(args) not in FRAME_FORMATS:
+        raise WorkerError(f"Unsupported frame format: {args.ext}")
+
+    # Frames may be split into subdirectories, one per time segment
+    frame_files = list_frames(frames_dir, frame_format(args))
     if not frame_files:
-        print(f"ERROR: No frames found in {frames_dir}", file=sys.stderr)
-        sys.exit(1)
+        raise WorkerError(f"No frames found in {frames_dir}")
+    store = frame_store_from_args(args, out_dir)
+    store.prepare_outputs(frame_files, keep_existing=args.skip_existing)
 
     total_frames = len(frame_files)
+    resumed = 0
+    if args.skip_existing:
+        frame_files = [ref for ref in frame_files if not store.is_done(ref)]
+        resumed = total_frames - len(frame_files)
+    store.close()
     print(f"Found {total_frames} frames to process", file=sys.stderr)
+    if resumed:
+        print(f"Skipping {resumed} frames already done", file=sys.stderr)
+    if not frame_files:
+        report_progress(total_frames, total_frames, start_time, resumed=resumed)
+        return total_frames
+
+    if args.shards > 1:
+        processed = run_sharded(args, frame_files, mask_img, roi, out_dir, resumed)
+        print(
+            f"Completed {processed}/{total_frames} frames "
+            f"in {time.time() - start_time:.1f}s",
+            file=sys.stderr,
+        )
+        return processed
+
+    return (
+        run_frames(
+            args,
+            frame_files,
+            mask_img,
+            roi,
+            out_dir,
+            lambda done, hits, lookups: report_progress(
+                resumed + done,
+                total_frames,
+                start_time,
+                hits / lookups if lookups else 0.0,
+                resumed,
+            ),
+            load_model=load_model,
+            on_stats=on_stats,
+        )
+        + resumed
+    )
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
 
-    # Initialize model
-    print("Loading LaMa model...", file=sys.stderr)
     try:
-        inpainter = LamaInpainter(str(model_path))
+        run_job(args)
     except Exception as e:
-        print(f"ERROR: Failed to load model: {e}", file=sys.stderr)
+        print(f"ERROR: {e}", file=sys.stderr)
         sys.exit(1)
 
-    print("Model loaded, starting processing...", file=sys.stderr)
-
-    # Process frames
-    start_time = time.time()
-    processed = 0
-
-    with ThreadPoolExecutor(max_workers=args.io_workers) as io_executor:
-        for frame_path in frame_files:
-            # Load frame
-            frame = load_frame(frame_path)
-            if frame is None:
-                print(f"WARNING: Failed to load {frame_path}", file=sys.stderr)
-                continue
-
-            # Create full-frame mask positioned at ROI
-            frame_mask = create_roi_mask(mask_img, roi, frame.shape[:2])
-
-            # Check if mask has any non-zero pixels
-            if np.sum(frame_mask) == 0:
-                # No inpainting needed, just copy the frame
-                result = frame
-            else:
-                # Inpaint
-                result = inpainter.inpaint(frame, frame_mask)
-
-                # Blend: only replace masked areas
-                mask_3ch = cv2.cvtColor(frame_mask, cv2.COLOR_GRAY2BGR) / 255.0
-                result = (frame * (1 - mask_3ch) + result * mask_3ch).astype(np.uint8)
-
-            # Save output
-            out_path = out_dir / frame_path.name
-            io_executor.submit(save_frame, out_path, result)
-
-            processed += 1
-
-            # Report progress
-            elapsed = time.time() - start_time
-            fps = processed / elapsed if elapsed > 0 else 0
-            percent = int((processed / total_frames) * 100)
-            eta_seconds = int((total_frames - processed) / fps) if fps > 0 else 0
-            eta_str = f"{eta_seconds // 60:02d}:{eta_seconds % 60:02d}"
-
-            # Output progress in format expected by main.py
-            print(
-                f"PROGRESS:{percent}:{processed}:{total_frames}:{fps:.1f}:{eta_str}:",
-                flush=True,
-            )
-
-    total_time = time.time() - start_time
-    print(
-        f"Completed {processed}/{total_frames} frames in {total_time:.1f}s",
-        file=sys.stderr,
-    )
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,225 @@
+"""
+Keira - Mask Planning
+Regis Architecture v2.9.0
+
+Places the ROI mask in frame coordinates and precomputes everything that
+stays constant for a job: the full-frame mask, its bounding box, the
+inference window and fixed-point blend weights.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+def create_roi_mask(
+    full_mask: np.ndarray, roi: tuple[int, int, int, int], frame_shape: tuple[int, int]
+) -> np.ndarray:
+    """
+    Create a full-frame mask from ROI mask.
+
+    Args:
+        full_mask: The mask image for the ROI region
+        roi: (x, y, width, height) of the ROI
+        frame_shape: (height, width) of the full frame
+
+    Returns:
+        Full frame mask with ROI mask placed at correct position
+    """
+    x, y, w, h = roi
+    frame_h, frame_w = frame_shape
+
+    # Create empty mask for full frame
+    result_mask = np.zeros((frame_h, frame_w), dtype=np.uint8)
+
+    # Resize mask to ROI dimensions if needed
+    if full_mask.shape[:2] != (h, w):
+        full_mask = cv2.resize(full_mask, (w, h), interpolation=cv2.INTER_NEAREST)
+
+    # Ensure mask is single channel
+    if len(full_mask.shape) == 3:
+        full_mask = cv2.cvtColor(full_mask, cv2.COLOR_BGR2GRAY)
+
+    # Place mask at ROI position (clamp to frame bounds)
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(frame_w, x + w), min(frame_h, y + h)
+
+    mask_x1 = x1 - x
+    mask_y1 = y1 - y
+    mask_x2 = mask_x1 + (x2 - x1)
+    mask_y2 = mask_y1 + (y2 - y1)
+
+    result_mask[y1:y2, x1:x2] = full_mask[mask_y1:mask_y2, mask_x1:mask_x2]
+
+    return result_mask
+
+
+def mask_bbox(mask: np.ndarray) -> Optional[tuple[int, int, int, int]]:
+    """
+    Get the tight bounding box of the non-zero mask pixels.
+
+    Returns:
+        (x, y, width, height), or None if the mask is empty
+    """
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return None
+    return cv2.boundingRect(points)
+
+
+def compute_crop_window(
+    bbox: tuple[int, int, int, int],
+    frame_shape: tuple[int, int],
+    padding: int,
+    min_size: int,
+) -> tuple[int, int, int, int]:
+    """
+    Compute the inference window around a mask bounding box.
+
+    The box is padded with context, then grown to a square of at least
+    ``min_size`` so small masks run at the model's native scale. The window
+    is shifted to stay inside the frame and never exceeds it.
+
+    Args:
+        bbox: (x, y, width, height) of the mask
+        frame_shape: (height, width) of the full frame
+        padding: Context pixels to keep on each side of the box
+        min_size: Model input size
+
+    Returns:
+        (x1, y1, x2, y2) window in frame coordinates
+    """
+    x, y, w, h = bbox
+    frame_h, frame_w = frame_shape
+    padding = max(0, padding)
+
+    side = max(w + 2 * padding, h + 2 * padding, min_size)
+    win_w = min(side, frame_w)
+    win_h = min(side, frame_h)
+
+    # Center on the box, then shift back inside the frame
+    x1 = x + w // 2 - win_w // 2
+    y1 = y + h // 2 - win_h // 2
+    x1 = min(max(0, x1), frame_w - win_w)
+    y1 = min(max(0, y1), frame_h - win_h)
+
+    return x1, y1, x1 + win_w, y1 + win_h
+
+
+@dataclass(frozen=True)
+class MaskPlan:
+    """Mask geometry for one frame shape, shared by every frame of a job."""
+
+    frame_shape: tuple[int, int]
+    mask: np.ndarray
+    bbox: Optional[tuple[int, int, int, int]]
+    window: Optional[tuple[int, int, int, int]]
+    weights: Optional[np.ndarray]
+    binary: bool = True
+    # Pixels a binary plan replaces, the weights as bool for a masked copy
+    replace: Optional[np.ndarray] = None
+
+    @property
+    def empty(self) -> bool:
+        """True when no pixel of the frame needs inpainting."""
+        return self.bbox is None
+
+
+def build_mask_plan(
+    mask_img: np.ndarray,
+    roi: tuple[int, int, int, int],
+    frame_shape: tuple[int, int],
+    mode: str = "crop",
+    crop_padding: int = 64,
+    min_size: int = 512,
+    feather: int = 0,
+) -> MaskPlan:
+    """
+    Build the mask plan for frames of a given shape.
+
+    Args:
+        mask_img: The mask image for the ROI region
+        roi: (x, y, width, height) of the ROI
+        frame_shape: (height, width) of the frames
+        mode: "crop" for a window around the mask, "resize" for whole frame
+        crop_padding: Context pixels around the mask in crop mode
+        min_size: Model input size
+        feather: Radius in pixels of the soft blend edge outside the mask
+
+    Returns:
+        MaskPlan with the placed mask, the bbox of all pixels with a non-zero
+        blend weight, inference window (x1, y1, x2, y2) and uint8 blend
+        weights (bh, bw, 1) covering the bbox, with the same weights as a
+        bool mask when they are all 0 or 255
+    """
+    frame_mask = create_roi_mask(mask_img, roi, frame_shape)
+    frame_mask.setflags(write=False)
+
+    blend_mask = frame_mask
+    if feather > 0 and frame_mask.any():
+        # Fade out around the mask, the mask itself stays fully replaced
+        ksize = 2 * feather + 1
+        blurred = cv2.GaussianBlur(frame_mask, (ksize, ksize), 0)
+        blend_mask = np.maximum(blurred, frame_mask)
+
+    bbox = mask_bbox(blend_mask)
+    if bbox is None:
+        return MaskPlan(frame_shape, frame_mask, None, None, None)
+
+    if mode == "crop":
+        window = compute_crop_window(bbox, frame_shape, crop_padding, min_size)
+    else:
+        window = (0, 0, frame_shape[1], frame_shape[0])
+
+    x, y, w, h = bbox
+    weights = np.ascontiguousarray(blend_mask[y : y + h, x : x + w, np.newaxis])
+    weights.setflags(write=False)
+    binary = bool(np.all((weights == 0) | (weights == 255)))
+    replace = None
+    if binary:
+        replace = weights.astype(bool)
+        replace.setflags(write=False)
+
+    return MaskPlan(frame_shape, frame_mask, bbox, window, weights, binary, replace)
+
+
+class MaskPlanCache:
+    """Builds mask plans lazily, once per distinct frame shape."""
+
+    def __init__(
+        self,
+        mask_img: np.ndarray,
+        roi: tuple[int, int, int, int],
+        mode: str = "crop",
+        crop_padding: int = 64,
+        min_size: int = 512,
+        feather: int = 0,
+    ):
+        self.mask_img = mask_img
+        self.roi = roi
+        self.mode = mode
+        self.crop_padding = crop_padding
+        self.min_size = min_size
+        self.feather = feather
+        self._plans: dict[tuple[int, int], MaskPlan] = {}
+
+    def get(self, frame_shape: tuple[int, ...]) -> MaskPlan:
+        """Get the plan for frames of the given (height, width, ...) shape."""
+        key = (frame_shape[0], frame_shape[1])
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = build_mask_plan(
+                self.mask_img,
+                self.roi,
+                key,
+                self.mode,
+                self.crop_padding,
+                self.min_size,
+                self.feather,
+            )
+            self._plans[key] = plan
+        return plan
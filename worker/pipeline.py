@@ -0,0 +1,231 @@
+"""
+Keira - Frame Pipeline
+Regis Architecture v2.9.0
+
+Bounded read-ahead and write-behind stages around the inference loop.
+Decoders run ahead of inference up to a fixed depth, and writers block the
+inference thread once their queue is full, so memory stays flat no matter
+how long the video is.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageStats:
+    """
+    Timing and queue occupancy for one pipeline stage.
+
+    ``busy`` is time spent doing the stage's work (summed over its threads),
+    ``wait`` is time the inference thread spent blocked on the stage.
+    """
+
+    name: str
+    capacity: int = 0
+    items: int = 0
+    busy: float = 0.0
+    wait: float = 0.0
+    depth: int = 0
+    depth_max: int = 0
+    depth_total: int = 0
+    depth_samples: int = 0
+
+    def sample(self, depth: int) -> None:
+        """Record the current queue depth."""
+        self.depth = depth
+        self.depth_max = max(self.depth_max, depth)
+        self.depth_total += depth
+        self.depth_samples += 1
+
+    @contextmanager
+    def timing(self, items: int = 0) -> Iterator[None]:
+        """Add the time spent in the body, and ``items`` done, to the stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy += time.perf_counter() - start
+            self.items += items
+
+    @property
+    def occupancy(self) -> float:
+        """Mean queue fill ratio, 0.0 - 1.0."""
+        if not self.capacity or not self.depth_samples:
+            return 0.0
+        return self.depth_total / self.depth_samples / self.capacity
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        line = (
+            f"{self.name}: {self.items} frames, "
+            f"busy {self.busy:.1f}s, wait {self.wait:.1f}s"
+        )
+        if self.capacity:
+            line += (
+                f", queue {self.occupancy * 100:.0f}% "
+                f"(max {self.depth_max}/{self.capacity})"
+            )
+        return line
+
+
+class PipelineStats:
+    """
+    Stats for the read, preprocess, infer, blend and write stages.
+
+    Preprocess covers mask plans, temporal cache lookups, cropping and
+    building the model input; blend covers converting the model output
+    back and pasting it into the frame.
+    """
+
+    def __init__(self, prefetch: int = 0, write_queue: int = 0):
+        self.read = StageStats("read", capacity=prefetch)
+        self.preprocess = StageStats("preprocess")
+        self.infer = StageStats("infer")
+        self.blend = StageStats("blend")
+        self.write = StageStats("write", capacity=write_queue)
+        self.lock = threading.Lock()
+
+    @property
+    def stages(self) -> tuple[StageStats, ...]:
+        return (self.read, self.preprocess, self.infer, self.blend, self.write)
+
+    def summary(self) -> str:
+        return "; ".join(stage.summary() for stage in self.stages)
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Group items into lists of ``size``, the last one may be shorter."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class FrameReader:
+    """Decodes frames ahead of the consumer, at most ``depth`` in flight."""
+
+    def __init__(
+        self,
+        paths: list[T],
+        load: Callable[[T], Optional[np.ndarray]],
+        stats: PipelineStats,
+        workers: int = 2,
+        depth: int = 16,
+    ):
+        self.paths = paths
+        self.load = load
+        self.stats = stats
+        self.workers = max(1, workers)
+        self.depth = max(1, depth)
+
+    def _load(self, path: T) -> Optional[np.ndarray]:
+        start = time.perf_counter()
+        frame = self.load(path)
+        with self.stats.lock:
+            self.stats.read.busy += time.perf_counter() - start
+        return frame
+
+    def __iter__(self) -> Iterator[tuple[T, np.ndarray]]:
+        """Yield (path, frame) in order, skipping frames that fail to load."""
+        stats = self.stats
+        pending: deque[tuple[T, Future]] = deque()
+        paths = iter(self.paths)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for path in paths:
+                pending.append((path, executor.submit(self._load, path)))
+                if len(pending) >= self.depth:
+                    break
+
+            while pending:
+                stats.read.sample(sum(f.done() for _, f in pending))
+                path, future = pending.popleft()
+
+                # Time spent here is inference starved for input
+                start = time.perf_counter()
+                frame = future.result()
+                stats.read.wait += time.perf_counter() - start
+
+                # Keep the read-ahead window full
+                next_path = next(paths, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(self._load, next_path)))
+
+                if frame is None:
+                    print(f"WARNING: Failed to load {path}", file=sys.stderr)
+                    continue
+
+                stats.read.items += 1
+                yield path, frame
+
+
+class FrameWriter:
+    """Saves frames on a worker pool; submit blocks when ``depth`` are queued."""
+
+    def __init__(
+        self,
+        save: Callable[[T, np.ndarray], bool],
+        stats: PipelineStats,
+        workers: int = 4,
+        depth: int = 16,
+    ):
+        self.save = save
+        self.stats = stats
+        self.depth = max(1, depth)
+        self.failed = 0
+        self._slots = threading.BoundedSemaphore(self.depth)
+        self._queued = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def submit(self, path: T, frame: np.ndarray) -> None:
+        """Queue a frame for saving, waiting for a free slot if full."""
+        start = time.perf_counter()
+        self._slots.acquire()
+        self.stats.write.wait += time.perf_counter() - start
+
+        with self.stats.lock:
+            self._queued += 1
+            self.stats.write.sample(self._queued)
+        self._executor.submit(self._save, path, frame)
+
+    def _save(self, path: T, frame: np.ndarray) -> None:
+        start = time.perf_counter()
+        try:
+            ok = self.save(path, frame)
+        except Exception:
+            ok = False
+        finally:
+            self._slots.release()
+
+        with self.stats.lock:
+            self._queued -= 1
+            self.stats.write.busy += time.perf_counter() - start
+            if ok:
+                self.stats.write.items += 1
+            else:
+                self.failed += 1
+        if not ok:
+            print(f"WARNING: Failed to save {path}", file=sys.stderr)
+
+    def close(self) -> None:
+        """Wait for all queued frames to be written."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> FrameWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,146 @@
+"""
+Keira - Model Variant Builder
+Regis Architecture v2.9.0
+
+Offline tool that derives reduced-precision LaMa variants from the fp32
+export:
+
+  int8  dynamic quantization (int8 weights, activations quantized at run time)
+  fp16  fp16 weights cast back to fp32 at load, halves model size and memory
+
+Usage:
+    python worker/quantize_model.py --variant int8
+    python worker/quantize_model.py --variant fp16 --input models/lama_fp32.onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+# Variant names and file names are the API's, so the two cannot drift
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.config import MODEL_VARIANTS  # noqa: E402
+
+MODELS_DIR = Path(__file__).parent / "models"
+
+# The fp32 export every other variant is built from
+SOURCE_VARIANT = "fp32"
+VARIANTS = tuple(name for name in MODEL_VARIANTS if name != SOURCE_VARIANT)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Build quantized / reduced-precision LaMa model variants"
+    )
+    parser.add_argument("--variant", required=True, choices=VARIANTS)
+    parser.add_argument(
+        "--input",
+        default=str(MODELS_DIR / MODEL_VARIANTS[SOURCE_VARIANT]),
+        help="Source fp32 ONNX model",
+    )
+    parser.add_argument(
+        "--output",
+        help="Output path (default: the variant's model file next to the input)",
+    )
+    parser.add_argument(
+        "--per-channel",
+        action="store_true",
+        help="Quantize weights per output channel (int8 only)",
+    )
+    return parser.parse_args()
+
+
+def quantize_int8(src: Path, dst: Path, per_channel: bool = False) -> None:
+    """Dynamically quantize weights to int8."""
+    quantize_dynamic(
+        str(src),
+        str(dst),
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+    )
+
+
+def convert_weights_fp16(model: onnx.ModelProto) -> onnx.ModelProto:
+    """
+    Store float initializers as fp16 and cast them back to fp32 at load.
+
+    Compute stays in fp32, so the model runs on CPU providers unchanged.
+    """
+    graph = model.graph
+    graph_inputs = {i.name: i for i in graph.input}
+    casts = []
+
+    for init in list(graph.initializer):
+        if init.data_type != TensorProto.FLOAT:
+            continue
+
+        weights = numpy_helper.to_array(init)
+        half = numpy_helper.from_array(
+            weights.astype(np.float16), name=f"{init.name}_fp16"
+        )
+        graph.initializer.remove(init)
+        graph.initializer.append(half)
+
+        # Older IR versions list initializers as graph inputs too
+        if init.name in graph_inputs:
+            graph.input.remove(graph_inputs[init.name])
+
+        casts.append(
+            helper.make_node(
+                "Cast",
+                [half.name],
+                [init.name],
+                name=f"{init.name}_cast",
+                to=TensorProto.FLOAT,
+            )
+        )
+
+    nodes = casts + list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+    return model
+
+
+def convert_fp16(src: Path, dst: Path) -> None:
+    """Write an fp16-weight copy of the model."""
+    model = convert_weights_fp16(onnx.load(str(src)))
+    onnx.checker.check_model(model)
+    onnx.save(model, str(dst))
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+
+    src = Path(args.input)
+    if not src.exists():
+        print(f"ERROR: Model not found: {src}", file=sys.stderr)
+        sys.exit(1)
+
+    dst = Path(args.output or src.with_name(MODEL_VARIANTS[args.variant]))
+
+    print(f"Building {args.variant} variant of {src}...", file=sys.stderr)
+    if args.variant == "int8":
+        quantize_int8(src, dst, args.per_channel)
+    elif args.variant == "fp16":
+        convert_fp16(src, dst)
+    else:
+        print(f"ERROR: No builder for variant: {args.variant}", file=sys.stderr)
+        sys.exit(1)
+
+    src_mb = src.stat().st_size / 1e6
+    dst_mb = dst.stat().st_size / 1e6
+    print(f"Wrote {dst} ({src_mb:.1f} MB -> {dst_mb:.1f} MB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
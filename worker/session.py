@@ -0,0 +1,145 @@
+"""
+Keira - ONNX Runtime Session
+Regis Architecture v2.9.0
+
+Builds tuned ONNX Runtime sessions and caches the optimized graph next to
+the source model, so later jobs skip graph optimization.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import onnxruntime as ort
+
+DEFAULT_PROVIDERS = ("CUDAExecutionProvider", "CPUExecutionProvider")
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+GRAPH_OPT_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    """ONNX Runtime session settings. Thread counts of 0 let ORT decide."""
+
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    execution_mode: str = "sequential"
+    graph_optimization: str = "all"
+    mem_arena: bool = True
+    mem_pattern: bool = True
+    providers: tuple[str, ...] = DEFAULT_PROVIDERS
+    cache_optimized: bool = True
+
+
+def resolve_providers(requested: tuple[str, ...]) -> list[str]:
+    """Keep the requested providers this ORT build supports, CPU as last resort."""
+    available = set(ort.get_available_providers())
+    providers = [p for p in requested if p in available]
+    return providers or ["CPUExecutionProvider"]
+
+
+def optimized_model_path(
+    model_path: Path, config: SessionConfig, providers: list[str]
+) -> Path:
+    """
+    Path of the cached optimized graph for a model.
+
+    The optimized graph may contain provider specific kernels, so the name
+    is keyed on the ORT version, providers and optimization level.
+    """
+    key = "|".join([ort.__version__, config.graph_optimization, *providers])
+    tag = hashlib.sha1(key.encode()).hexdigest()[:10]
+    return model_path.with_name(f"{model_path.stem}.opt-{tag}.onnx")
+
+
+def build_session_options(config: SessionConfig) -> ort.SessionOptions:
+    """Translate a SessionConfig into ORT SessionOptions."""
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = max(0, config.intra_op_threads)
+    options.inter_op_num_threads = max(0, config.inter_op_threads)
+    options.execution_mode = EXECUTION_MODES[config.execution_mode]
+    options.graph_optimization_level = GRAPH_OPT_LEVELS[config.graph_optimization]
+    options.enable_cpu_mem_arena = config.mem_arena
+    options.enable_mem_pattern = config.mem_pattern
+    return options
+
+
+def create_session(
+    model_path: str | Path, config: Optional[SessionConfig] = None
+) -> ort.InferenceSession:
+    """
+    Create an inference session, reusing or writing the optimized graph cache.
+
+    Args:
+        model_path: Path to the ONNX model
+        config: Session settings, defaults to SessionConfig()
+
+    Returns:
+        Ready ORT InferenceSession
+    """
+    config = config or SessionConfig()
+    model_path = Path(model_path)
+    providers = resolve_providers(config.providers)
+    options = build_session_options(config)
+
+    use_cache = (
+        config.cache_optimized
+        and config.graph_optimization != "disable"
+        and model_path.exists()
+    )
+    if not use_cache:
+        return ort.InferenceSession(
+            str(model_path), sess_options=options, providers=providers
+        )
+
+    cached = optimized_model_path(model_path, config, providers)
+    if cached.exists() and cached.stat().st_mtime >= model_path.stat().st_mtime:
+        # Already optimized, skip graph transformations entirely
+        options.graph_optimization_level = GRAPH_OPT_LEVELS["disable"]
+        try:
+            return ort.InferenceSession(
+                str(cached), sess_options=options, providers=providers
+            )
+        except Exception as e:
+            print(f"WARNING: Ignoring optimized model cache: {e}", file=sys.stderr)
+            options = build_session_options(config)
+
+    # Write to a temp name first so concurrent jobs never load a partial file
+    tmp_path = cached.with_name(f"{cached.stem}.{os.getpid()}.tmp")
+    options.optimized_model_filepath = str(tmp_path)
+    try:
+        session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=providers
+        )
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        # The cache location may not be writable, load without it
+        print(f"WARNING: Optimized model cache disabled: {e}", file=sys.stderr)
+        return ort.InferenceSession(
+            str(model_path),
+            sess_options=build_session_options(config),
+            providers=providers,
+        )
+
+    try:
+        os.replace(tmp_path, cached)
+    except OSError as e:
+        print(f"WARNING: Could not cache optimized model: {e}", file=sys.stderr)
+        tmp_path.unlink(missing_ok=True)
+
+    return session
@@ -0,0 +1,120 @@
+"""
+Keira - Worker Telemetry
+Regis Architecture v2.9.0
+
+JSON-lines events on stdout, the worker's machine-readable channel; human
+readable logs go to stderr. Every line is one object with an ``event`` key:
+
+    {"event": "model", "load": 2.41, "cached": false}
+    {"event": "progress", "percent": 50, "processed": 120, "total": 240,
+     "fps": 12.5, "eta": "00:10", "hitRate": 0.25}
+    {"event": "telemetry", "elapsed": 9.6, "rss": 812345344,
+     "stages": {"read": {"items": 120, "busy": 1.2, "wait": 0.1,
+                         "queue": 3, "queueMax": 16, "queueCapacity": 16},
+                ...}}
+
+Telemetry carries per-stage timings (read, preprocess, infer, blend,
+write), write and read-ahead queue depths and the resident memory of the
+worker, at most once per interval plus a final one when the job ends.
+A model event follows every model load; ``cached`` is set when a warm
+service reused a session it loaded for an earlier job.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+from pipeline import PipelineStats
+
+# Seconds between telemetry events while a job runs
+TELEMETRY_INTERVAL = 1.0
+
+
+def emit(event: str, **fields) -> None:
+    """Write one event line to stdout."""
+    line = json.dumps({"event": event, **fields}, separators=(",", ":"))
+    print(line, flush=True)
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current, kB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def stage_report(stats: PipelineStats) -> dict:
+    """Timings and queue depths of every pipeline stage, JSON ready."""
+    report = {}
+    for stage in stats.stages:
+        entry = {
+            "items": stage.items,
+            "busy": round(stage.busy, 4),
+            "wait": round(stage.wait, 4),
+        }
+        if stage.capacity:
+            entry.update(
+                queue=stage.depth,
+                queueMax=stage.depth_max,
+                queueCapacity=stage.capacity,
+            )
+        report[stage.name] = entry
+    return report
+
+
+def merge_reports(reports: list[dict]) -> dict:
+    """Sum stage reports of parallel shards into one."""
+    merged: dict[str, dict] = {}
+    for report in reports:
+        for name, entry in report.items():
+            total = merged.setdefault(name, dict.fromkeys(entry, 0))
+            for key, value in entry.items():
+                total[key] = round(total.get(key, 0) + value, 4)
+    return merged
+
+
+class Telemetry:
+    """Emits telemetry events, at most one per ``interval`` seconds."""
+
+    def __init__(self, interval: float = TELEMETRY_INTERVAL):
+        self.interval = interval
+        self.start = time.monotonic()
+        self._last: Optional[float] = None
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if self._last is not None and now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
+
+    def report(
+        self, stages: dict, rss: Optional[int] = None, final: bool = False
+    ) -> None:
+        """Emit a telemetry event for the stage report."""
+        fields = {
+            "elapsed": round(time.monotonic() - self.start, 3),
+            "rss": rss if rss is not None else rss_bytes(),
+            "stages": stages,
+        }
+        if final:
+            fields["final"] = True
+        emit("telemetry", **fields)
+
+    def tick(self, stats: PipelineStats) -> None:
+        """Report the pipeline if the interval has passed."""
+        if self.due():
+            self.report(stage_report(stats))
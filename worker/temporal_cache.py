@@ -0,0 +1,103 @@
+"""
+Keira - Temporal Cache
+Regis Architecture v2.9.0
+
+Skips inference for frames whose pixels around the mask match an earlier
+frame. LaMa only sees the unmasked context of the inference window, so two
+frames with the same context produce the same patch and the earlier one
+can be reused.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+from masking import MaskPlan
+
+
+@dataclass
+class CacheEntry:
+    """Context signature and, once inferred, the inpainted bbox patch."""
+
+    frame_shape: tuple[int, int]
+    context: Optional[np.ndarray]
+    patch: Optional[np.ndarray] = None
+
+
+class TemporalCache:
+    """
+    LRU cache of inpainted patches keyed by the masked neighbourhood.
+
+    With ``tolerance`` 0 frames must match exactly and are looked up by hash.
+    Otherwise a frame matches an entry when the mean absolute difference of
+    the unmasked context pixels, per channel, is at most ``tolerance``.
+    """
+
+    def __init__(self, tolerance: float = 0.0, size: int = 8):
+        self.tolerance = max(0.0, tolerance)
+        self.size = max(1, size)
+        self.hits = 0
+        self.lookups = 0
+        self._entries: OrderedDict[object, CacheEntry] = OrderedDict()
+        self._context_masks: dict[tuple[int, int], np.ndarray] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def _context_mask(self, plan: MaskPlan) -> np.ndarray:
+        """255 for the unmasked pixels of the inference window."""
+        mask = self._context_masks.get(plan.frame_shape)
+        if mask is None:
+            x1, y1, x2, y2 = plan.window
+            mask = np.where(plan.mask[y1:y2, x1:x2] > 0, 0, 255).astype(np.uint8)
+            self._context_masks[plan.frame_shape] = mask
+        return mask
+
+    def match(self, frame: np.ndarray, plan: MaskPlan) -> tuple[CacheEntry, bool]:
+        """
+        Find the entry for a frame, or register a new pending one.
+
+        Must be called before the frame is blended in place.
+
+        Returns:
+            (entry, hit). On a miss the caller fills ``entry.patch`` after
+            inference; later frames in the same batch may already match it.
+        """
+        x1, y1, x2, y2 = plan.window
+        context_mask = self._context_mask(plan)
+        context = cv2.bitwise_and(
+            frame[y1:y2, x1:x2], frame[y1:y2, x1:x2], mask=context_mask
+        )
+        self.lookups += 1
+
+        if self.tolerance == 0:
+            key = (plan.frame_shape, hashlib.blake2b(context.data).digest())
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, True
+            entry = CacheEntry(plan.frame_shape, None)
+        else:
+            for key, entry in reversed(self._entries.items()):
+                if entry.frame_shape != plan.frame_shape:
+                    continue
+                diff = cv2.absdiff(context, entry.context)
+                if max(cv2.mean(diff, mask=context_mask)[:3]) <= self.tolerance:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry, True
+            key = object()
+            entry = CacheEntry(plan.frame_shape, context)
+
+        self._entries[key] = entry
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return entry, False
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# The worker is a standalone script directory, not a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import session  # noqa: E402
+
+
+class FakeSession:
+    """Stand-in for ort.InferenceSession with LaMa's input/output signature."""
+
+    def __init__(self, batch_dim=None, max_batch=None):
+        self.batch_dim = batch_dim
+        self.max_batch = max_batch
+        self.calls = []
+
+    def get_inputs(self):
+        return [
+            SimpleNamespace(name="image", shape=[self.batch_dim, 3, 512, 512]),
+            SimpleNamespace(name="mask", shape=[self.batch_dim, 1, 512, 512]),
+        ]
+
+    def get_outputs(self):
+        return [SimpleNamespace(name="output", shape=[self.batch_dim, 3, 512, 512])]
+
+    def run(self, output_names, feeds):
+        image = feeds["image"]
+        mask = feeds["mask"]
+        self.calls.append(len(image))
+        if self.max_batch is not None and len(image) > self.max_batch:
+            raise RuntimeError("Got invalid dimensions for input: image")
+        # Fill masked pixels with mid grey
+        return [image * (1 - mask) + 0.5 * mask]
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    """Patch ONNX Runtime so LamaInpainter loads a FakeSession."""
+    fake = FakeSession()
+
+    def factory(*args, **kwargs):
+        return fake
+
+    monkeypatch.setattr(session.ort, "InferenceSession", factory)
+    return fake
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def stub_model(tmp_path):
+    """A tiny real ONNX model with LaMa's input/output signature."""
+    import onnx
+    from onnx import TensorProto, helper
+
+    def tensor(name, channels):
+        return helper.make_tensor_value_info(
+            name, TensorProto.FLOAT, ["N", channels, 512, 512]
+        )
+
+    nodes = [
+        helper.make_node("Sub", ["one", "mask"], ["keep"]),
+        helper.make_node("Mul", ["image", "keep"], ["kept"]),
+        helper.make_node("Mul", ["mask", "half"], ["fill"]),
+        helper.make_node("Add", ["kept", "fill"], ["output"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "lama_stub",
+        [tensor("image", 3), tensor("mask", 1)],
+        [tensor("output", 3)],
+        [
+            helper.make_tensor("one", TensorProto.FLOAT, [], [1.0]),
+            helper.make_tensor("half", TensorProto.FLOAT, [], [0.5]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+
+    path = tmp_path / "lama_fp32.onnx"
+    onnx.save(model, str(path))
+    return path
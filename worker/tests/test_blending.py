@@ -0,0 +1,56 @@
+import numpy as np
+from blending import blend_into
+from masking import build_mask_plan
+
+
+def reference_blend(frame, result, mask):
+    """The original full-frame float64 composite."""
+    mask_3ch = np.repeat(mask[..., None], 3, axis=2) / 255.0
+    return (frame * (1 - mask_3ch) + result * mask_3ch).astype(np.uint8)
+
+
+def test_blend_into_hard_mask_in_place(frame):
+    """Binary masks copy the patch into the bbox without touching the rest."""
+    mask_img = np.zeros((30, 40), dtype=np.uint8)
+    mask_img[5:25, 10:30] = 255
+    plan = build_mask_plan(mask_img, (20, 30, 40, 30), frame.shape[:2])
+    result = np.full_like(frame, 200)
+    expected = reference_blend(frame, result, plan.mask)
+
+    x, y, w, h = plan.bbox
+    target = frame.copy()
+    blend_into(target, result[y : y + h, x : x + w], plan)
+
+    assert plan.binary
+    assert np.array_equal(target, expected)
+
+
+def test_blend_into_soft_mask_matches_float(frame):
+    """Fractional weights round like the float composite, within one level."""
+    mask_img = np.tile(np.arange(0, 250, 5, dtype=np.uint8), (20, 1))
+    plan = build_mask_plan(mask_img, (10, 10, 50, 20), frame.shape[:2])
+    result = np.full_like(frame, 250)
+    expected = np.rint(
+        frame * (1 - plan.mask[..., None] / 255.0)
+        + result * (plan.mask[..., None] / 255.0)
+    )
+
+    x, y, w, h = plan.bbox
+    target = frame.copy()
+    blend_into(target, result[y : y + h, x : x + w], plan)
+
+    assert not plan.binary and plan.replace is None
+    assert np.abs(target.astype(int) - expected).max() <= 1
+
+
+def test_feathered_plan_softens_edges(frame):
+    """Feathering grows the blend bbox and keeps the mask fully replaced."""
+    mask_img = np.full((20, 20), 255, dtype=np.uint8)
+    hard = build_mask_plan(mask_img, (60, 50, 20, 20), frame.shape[:2])
+    soft = build_mask_plan(mask_img, (60, 50, 20, 20), frame.shape[:2], feather=4)
+
+    assert not soft.binary
+    assert soft.bbox[2] > hard.bbox[2] and soft.bbox[3] > hard.bbox[3]
+    assert np.array_equal(soft.mask, hard.mask)
+    x, y, w, h = soft.bbox
+    assert (soft.weights[..., 0][soft.mask[y : y + h, x : x + w] > 0] == 255).all()
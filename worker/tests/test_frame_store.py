@@ -0,0 +1,160 @@
+import json
+
+import cv2
+import numpy as np
+from frame_store import FrameRef, FrameStore, list_frames, write_sidecar
+from inpaint_worker import parse_args, run_job
+
+
+def write_raw(directory, frames):
+    directory.mkdir(parents=True, exist_ok=True)
+    raw_path = directory / "frames.raw"
+    np.stack(frames).tofile(raw_path)
+    write_sidecar(raw_path, len(frames), *frames[0].shape[:2])
+    return raw_path
+
+
+def test_list_frames_images_in_order(tmp_path, frame):
+    for name in ("seg_001/000001.bmp", "seg_000/000002.bmp", "seg_000/000001.bmp"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        cv2.imwrite(str(tmp_path / name), frame)
+
+    refs = list_frames(tmp_path, "bmp")
+
+    assert [r.path.relative_to(tmp_path).as_posix() for r in refs] == [
+        "seg_000/000001.bmp",
+        "seg_000/000002.bmp",
+        "seg_001/000001.bmp",
+    ]
+    assert all(r.index == -1 for r in refs)
+
+
+def test_list_frames_indexes_raw_files(tmp_path, frame):
+    raw_path = write_raw(tmp_path, [frame, frame, frame])
+
+    assert list_frames(tmp_path, "raw") == [FrameRef(raw_path, i) for i in range(3)]
+
+
+def test_raw_store_round_trip(tmp_path, frame):
+    frames = [frame, 255 - frame]
+    raw_path = write_raw(tmp_path / "in", frames)
+    store = FrameStore(tmp_path / "in", tmp_path / "out", "raw")
+    refs = list_frames(tmp_path / "in", "raw")
+
+    store.prepare_outputs(refs)
+    for ref in refs:
+        loaded = store.load(ref)
+        # Loaded frames are writable copies, not views of the mapping
+        loaded[0, 0] = 7
+        assert store.save(ref, loaded)
+    store.close()
+
+    out = np.fromfile(tmp_path / "out" / "frames.raw", np.uint8).reshape(
+        2, *frame.shape
+    )
+    assert (out[1, 1:] == frames[1][1:]).all()
+    assert (out[:, 0, 0] == 7).all()
+    assert np.fromfile(raw_path, np.uint8)[0] == frame[0, 0, 0]
+    meta = json.loads((tmp_path / "out" / "frames.json").read_text())
+    assert meta["count"] == 2
+
+
+def test_png_compression_level_applies(tmp_path, frame):
+    (tmp_path / "in").mkdir()
+    ref = FrameRef(tmp_path / "in" / "000001.png")
+    fast = FrameStore(tmp_path / "in", tmp_path / "fast", "png", png_compression=0)
+    small = FrameStore(tmp_path / "in", tmp_path / "small", "png", png_compression=9)
+    smooth = np.zeros_like(frame)
+    smooth[:, :, 0] = np.arange(frame.shape[1], dtype=np.uint8)
+
+    for store in (fast, small):
+        store.prepare_outputs([ref])
+        assert store.save(ref, smooth)
+
+    fast_size = (tmp_path / "fast" / "000001.png").stat().st_size
+    small_size = (tmp_path / "small" / "000001.png").stat().st_size
+    assert small_size < fast_size
+    assert (cv2.imread(str(tmp_path / "small" / "000001.png")) == smooth).all()
+
+
+def test_run_job_on_raw_frames(stub_model, tmp_path, capsys):
+    frames = [np.zeros((40, 60, 3), dtype=np.uint8) for _ in range(3)]
+    write_raw(tmp_path / "frames", frames)
+    mask_path = tmp_path / "mask.png"
+    cv2.imwrite(str(mask_path), np.full((10, 10), 255, dtype=np.uint8))
+    args = parse_args(
+        [
+            "--frames", str(tmp_path / "frames"),
+            "--out", str(tmp_path / "out"),
+            "--ext", ".raw",
+            "--roi", "5,5,10,10",
+            "--model", str(stub_model),
+            "--mask", str(mask_path),
+            "--providers", "CPUExecutionProvider",
+        ]
+    )  # fmt: skip
+
+    assert run_job(args) == 3
+    out = np.fromfile(tmp_path / "out" / "frames.raw", np.uint8).reshape(3, 40, 60, 3)
+    assert (out[:, 5:15, 5:15] == 127).all()
+    assert (out[:, 20:] == 0).all()
+
+
+def test_raw_done_markers_survive_prepare(tmp_path, frame):
+    write_raw(tmp_path / "in", [frame, frame])
+    refs = list_frames(tmp_path / "in", "raw")
+    store = FrameStore(tmp_path / "in", tmp_path / "out", "raw")
+    store.prepare_outputs(refs)
+    assert store.save(refs[1], frame)
+    store.close()
+
+    store.prepare_outputs(refs, keep_existing=True)
+    assert [store.is_done(r) for r in refs] == [False, True]
+    store.close()
+    store.prepare_outputs(refs)
+    assert [store.is_done(r) for r in refs] == [False, False]
+
+
+def test_image_save_leaves_no_temp_file(tmp_path, frame):
+    (tmp_path / "in").mkdir()
+    ref = FrameRef(tmp_path / "in" / "000001.png")
+    store = FrameStore(tmp_path / "in", tmp_path / "out", "png")
+    store.prepare_outputs([ref])
+
+    assert not store.is_done(ref)
+    assert store.save(ref, frame)
+    assert store.is_done(ref)
+    assert [p.name for p in (tmp_path / "out").iterdir()] == ["000001.png"]
+
+
+def test_run_job_skip_existing_resumes(stub_model, tmp_path, capsys):
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for i in range(1, 5):
+        cv2.imwrite(str(frames_dir / f"{i:06d}.png"), np.zeros((40, 60, 3), np.uint8))
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    # Left by the interrupted run, must not be reprocessed
+    done = np.full((40, 60, 3), 9, dtype=np.uint8)
+    for i in (1, 2):
+        cv2.imwrite(str(out_dir / f"{i:06d}.png"), done)
+    mask_path = tmp_path / "mask.png"
+    cv2.imwrite(str(mask_path), np.full((10, 10), 255, dtype=np.uint8))
+    args = parse_args(
+        [
+            "--frames", str(frames_dir),
+            "--out", str(out_dir),
+            "--roi", "5,5,10,10",
+            "--model", str(stub_model),
+            "--mask", str(mask_path),
+            "--providers", "CPUExecutionProvider",
+            "--skip-existing",
+        ]
+    )  # fmt: skip
+
+    assert run_job(args) == 4
+    assert (cv2.imread(str(out_dir / "000001.png")) == 9).all()
+    assert (cv2.imread(str(out_dir / "000004.png"))[5:15, 5:15] == 127).all()
+    captured = capsys.readouterr()
+    assert "Skipping 2 frames" in captured.err
+    assert '"percent":100,"processed":4,"total":4,' in captured.out
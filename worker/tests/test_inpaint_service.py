@@ -0,0 +1,78 @@
+import json
+
+import cv2
+import numpy as np
+from inpaint_service import InpainterCache, handle_job
+from session import SessionConfig
+
+CPU = SessionConfig(providers=("CPUExecutionProvider",))
+
+
+def write_job(tmp_path, name="frames"):
+    frames_dir = tmp_path / name
+    frames_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(1, 4):
+        frame = rng.integers(0, 256, size=(90, 160, 3), dtype=np.uint8)
+        cv2.imwrite(str(frames_dir / f"{i:06d}.png"), frame)
+    mask_path = tmp_path / "mask.png"
+    cv2.imwrite(str(mask_path), np.full((20, 40), 255, dtype=np.uint8))
+    return frames_dir, mask_path
+
+
+def job_line(job_id, frames_dir, out_dir, model, mask_path):
+    args = [
+        "--frames", str(frames_dir),
+        "--out", str(out_dir),
+        "--roi", "10,10,40,20",
+        "--model", str(model),
+        "--mask", str(mask_path),
+        "--providers", "CPUExecutionProvider",
+    ]  # fmt: skip
+    return json.dumps({"id": job_id, "args": args})
+
+
+def test_cache_reuses_loaded_session(stub_model):
+    cache = InpainterCache()
+
+    first = cache.get(str(stub_model), CPU)
+    second = cache.get(str(stub_model), CPU)
+
+    assert first is second
+    assert cache.loads == 1
+
+
+def test_cache_evicts_least_recently_used(stub_model):
+    cache = InpainterCache(size=1)
+    cache.get(str(stub_model), CPU)
+    cache.get(str(stub_model), SessionConfig(providers=CPU.providers, mem_arena=False))
+
+    cache.get(str(stub_model), CPU)
+
+    assert cache.loads == 3
+
+
+def test_jobs_share_warm_session(stub_model, tmp_path, capsys):
+    frames_dir, mask_path = write_job(tmp_path)
+    cache = InpainterCache()
+
+    first = handle_job(
+        job_line("a", frames_dir, tmp_path / "out_a", stub_model, mask_path), cache
+    )
+    second = handle_job(
+        job_line("b", frames_dir, tmp_path / "out_b", stub_model, mask_path), cache
+    )
+
+    assert first == "DONE:a:3"
+    assert second == "DONE:b:3"
+    assert cache.loads == 1
+    assert '"percent":100,"processed":3,"total":3,' in capsys.readouterr().out
+
+
+def test_invalid_job_reports_failure(stub_model, tmp_path):
+    frames_dir, mask_path = write_job(tmp_path)
+    line = job_line("x", tmp_path / "missing", tmp_path / "out", stub_model, mask_path)
+
+    result = handle_job(line, InpainterCache())
+
+    assert result.startswith("FAILED:x:Frames directory not found")
@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+from inpaint_worker import LamaInpainter, parse_args, process_batch, run_job
+from masking import MaskPlanCache
+
+
+def test_inpaint_batch_single_run(fake_session, frame):
+    """A dynamic batch dimension runs all frames in one session call."""
+    inpainter = LamaInpainter("model.onnx")
+    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+    mask[10:40, 20:60] = 255
+
+    results = inpainter.inpaint_batch([frame] * 5, [mask] * 5)
+
+    assert fake_session.calls == [5]
+    assert len(results) == 5
+    assert all(r.shape == frame.shape and r.dtype == np.uint8 for r in results)
+
+
+def test_inpaint_batch_fixed_batch_dim(fake_session, frame):
+    """A fixed batch dimension is honored by chunking and padding."""
+    fake_session.batch_dim = 4
+    inpainter = LamaInpainter("model.onnx")
+    mask = np.full(frame.shape[:2], 255, dtype=np.uint8)
+
+    results = inpainter.inpaint_batch([frame] * 6, [mask] * 6)
+
+    assert inpainter.fixed_batch == 4
+    assert fake_session.calls == [4, 4]
+    assert len(results) == 6
+
+
+def test_inpaint_batch_falls_back_to_single(fake_session, frame):
+    """A model that rejects batches is retried one frame at a time."""
+    fake_session.max_batch = 1
+    inpainter = LamaInpainter("model.onnx")
+    mask = np.full(frame.shape[:2], 255, dtype=np.uint8)
+
+    results = inpainter.inpaint_batch([frame] * 3, [mask] * 3)
+
+    assert inpainter.fixed_batch == 1
+    assert fake_session.calls == [3, 1, 1, 1]
+    assert len(results) == 3
+
+
+def test_process_batch_skips_empty_mask(fake_session, frame):
+    """Frames whose ROI falls outside the frame are not sent to the model."""
+    inpainter = LamaInpainter("model.onnx")
+    mask_img = np.full((20, 20), 255, dtype=np.uint8)
+
+    plans = MaskPlanCache(mask_img, (500, 500, 20, 20))
+
+    results = process_batch(inpainter, [frame, frame], plans)
+
+    assert fake_session.calls == []
+    assert all(np.array_equal(r, frame) for r in results)
+
+
+def test_process_batch_only_changes_masked_area(fake_session, frame):
+    """Pixels outside the mask are kept from the source frame."""
+    inpainter = LamaInpainter("model.onnx")
+    mask_img = np.full((20, 30), 255, dtype=np.uint8)
+
+    plans = MaskPlanCache(mask_img, (10, 10, 30, 20))
+
+    (result,) = process_batch(inpainter, [frame], plans)
+
+    outside = np.ones(frame.shape[:2], dtype=bool)
+    outside[10:30, 10:40] = False
+    assert np.array_equal(result[outside], frame[outside])
+    assert fake_session.calls == [1]
+
+
+def test_process_batch_crop_mode_sends_window(fake_session, frame):
+    """Crop mode only sends the padded window around the mask to the model."""
+    big = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    inpainter = LamaInpainter("model.onnx")
+    mask_img = np.full((30, 80), 255, dtype=np.uint8)
+
+    plans = MaskPlanCache(mask_img, (1800, 40, 80, 30), crop_padding=16)
+
+    (result,) = process_batch(inpainter, [big], plans)
+
+    # Mask area is filled by the fake model, the rest of the frame untouched
+    assert result[50, 1850].tolist() == [127, 127, 127]
+    assert not result[:, :1400].any()
+
+
+def test_run_job_mirrors_segment_subdirectories(stub_model, tmp_path, capsys):
+    """Frames extracted per time segment keep their layout in the output."""
+    frames_dir = tmp_path / "frames"
+    for segment in ("seg_000", "seg_001"):
+        (frames_dir / segment).mkdir(parents=True)
+        for i in range(1, 3):
+            frame = np.zeros((40, 60, 3), dtype=np.uint8)
+            cv2.imwrite(str(frames_dir / segment / f"{i:06d}.png"), frame)
+    mask_path = tmp_path / "mask.png"
+    cv2.imwrite(str(mask_path), np.full((10, 10), 255, dtype=np.uint8))
+
+    args = parse_args(
+        [
+            "--frames", str(frames_dir),
+            "--out", str(tmp_path / "out"),
+            "--roi", "5,5,10,10",
+            "--model", str(stub_model),
+            "--mask", str(mask_path),
+            "--providers", "CPUExecutionProvider",
+        ]
+    )  # fmt: skip
+
+    assert run_job(args) == 4
+    outputs = sorted(
+        p.relative_to(tmp_path / "out").as_posix()
+        for p in (tmp_path / "out").rglob("*.png")
+    )
+    assert outputs == [
+        "seg_000/000001.png",
+        "seg_000/000002.png",
+        "seg_001/000001.png",
+        "seg_001/000002.png",
+    ]
@@ -0,0 +1,67 @@
+import numpy as np
+from masking import MaskPlanCache, build_mask_plan, compute_crop_window
+
+
+def test_compute_crop_window_native_scale():
+    """Small masks get a window of the model's input size around them."""
+    window = compute_crop_window((1800, 40, 80, 30), (1080, 1920), 32, 512)
+
+    x1, y1, x2, y2 = window
+    assert (x2 - x1, y2 - y1) == (512, 512)
+    # Window is shifted inside the frame and still covers the mask
+    assert x2 == 1920 and y1 == 0
+    assert x1 <= 1800 and x2 >= 1880 and y1 <= 40 and y2 >= 70
+
+
+def test_compute_crop_window_clamped_to_frame():
+    """Windows never exceed the frame size."""
+    window = compute_crop_window((0, 0, 300, 200), (240, 320), 64, 512)
+
+    assert window == (0, 0, 320, 240)
+
+
+def test_build_mask_plan():
+    """The plan holds the placed mask, its tight bbox and blend weights."""
+    mask_img = np.zeros((40, 60), dtype=np.uint8)
+    mask_img[10:20, 5:25] = 255
+
+    plan = build_mask_plan(
+        mask_img, (100, 50, 60, 40), (480, 640), crop_padding=16, min_size=128
+    )
+
+    assert not plan.empty
+    assert plan.bbox == (105, 60, 20, 10)
+    assert plan.weights.shape == (10, 20, 1)
+    assert plan.weights.dtype == np.uint8
+    assert plan.binary and plan.replace.dtype == bool
+    assert np.array_equal(plan.replace, plan.weights == 255)
+    assert int(plan.mask.sum()) == 255 * 200
+    x1, y1, x2, y2 = plan.window
+    assert (x2 - x1, y2 - y1) == (128, 128)
+
+
+def test_build_mask_plan_resize_mode_uses_whole_frame():
+    mask_img = np.full((10, 10), 255, dtype=np.uint8)
+
+    plan = build_mask_plan(mask_img, (0, 0, 10, 10), (90, 160), mode="resize")
+
+    assert plan.window == (0, 0, 160, 90)
+
+
+def test_mask_plan_outside_frame_is_empty():
+    mask_img = np.full((10, 10), 255, dtype=np.uint8)
+
+    plan = build_mask_plan(mask_img, (500, 500, 10, 10), (90, 160))
+
+    assert plan.empty
+    assert plan.window is None and plan.weights is None
+
+
+def test_mask_plan_cache_reuses_plan_per_shape():
+    """Plans are built once per frame shape and shared afterwards."""
+    cache = MaskPlanCache(np.full((10, 10), 255, dtype=np.uint8), (0, 0, 10, 10))
+
+    first = cache.get((90, 160, 3))
+
+    assert cache.get((90, 160, 3)) is first
+    assert cache.get((180, 320, 3)) is not first
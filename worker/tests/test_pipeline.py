@@ -0,0 +1,92 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from pipeline import FrameReader, FrameWriter, PipelineStats, batched
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_reader_keeps_order_and_skips_failures():
+    """Frames come back in order; unreadable ones are dropped."""
+    paths = [Path(f"{i:06d}.png") for i in range(20)]
+
+    def load(path):
+        if path.name == "000005.png":
+            return None
+        return np.full((2, 2, 3), int(path.stem), dtype=np.uint8)
+
+    stats = PipelineStats(prefetch=4)
+    frames = list(FrameReader(paths, load, stats, workers=3, depth=4))
+
+    assert [p.name for p, _ in frames] == [
+        p.name for p in paths if p.name != "000005.png"
+    ]
+    assert all(int(frame[0, 0, 0]) == int(p.stem) for p, frame in frames)
+    assert stats.read.items == 19
+
+
+def test_reader_bounds_read_ahead():
+    """No more than ``depth`` frames are decoded ahead of the consumer."""
+    paths = [Path(f"{i}.png") for i in range(30)]
+    loaded = []
+    consumed = []
+    ahead = []
+
+    def load(path):
+        loaded.append(path)
+        return np.zeros((1, 1, 3), dtype=np.uint8)
+
+    for path, _ in FrameReader(paths, load, PipelineStats(), workers=4, depth=5):
+        time.sleep(0.002)
+        consumed.append(path)
+        ahead.append(len(loaded) - len(consumed))
+
+    assert max(ahead) <= 5
+
+
+def test_writer_applies_backpressure():
+    """submit() blocks once ``depth`` frames are waiting to be saved."""
+    release = threading.Event()
+    saved = []
+
+    def save(path, frame):
+        release.wait()
+        saved.append(path)
+        return True
+
+    stats = PipelineStats(write_queue=2)
+    writer = FrameWriter(save, stats, workers=1, depth=2)
+    writer.submit(Path("a"), np.zeros(1))
+    writer.submit(Path("b"), np.zeros(1))
+
+    blocked = threading.Thread(target=writer.submit, args=(Path("c"), np.zeros(1)))
+    blocked.start()
+    blocked.join(timeout=0.1)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(timeout=2)
+    writer.close()
+
+    assert saved == [Path("a"), Path("b"), Path("c")]
+    assert stats.write.depth_max <= 2
+    assert stats.write.items == 3
+
+
+def test_writer_counts_failures():
+    def save(path, frame):
+        if path.name == "bad":
+            raise OSError("disk full")
+        return True
+
+    stats = PipelineStats(write_queue=4)
+    with FrameWriter(save, stats, workers=2, depth=4) as writer:
+        for name in ("ok1", "bad", "ok2"):
+            writer.submit(Path(name), np.zeros(1))
+
+    assert writer.failed == 1
+    assert stats.write.items == 2
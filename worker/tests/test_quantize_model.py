@@ -0,0 +1,46 @@
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnx import TensorProto
+from quantize_model import SOURCE_VARIANT, VARIANTS, convert_fp16, quantize_int8
+
+from api.config import MODEL_VARIANTS
+
+
+def run(path, image, mask):
+    session = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+    return session.run(None, {"image": image, "mask": mask})[0]
+
+
+def inputs():
+    rng = np.random.default_rng(0)
+    image = rng.random((1, 3, 512, 512), dtype=np.float32)
+    mask = np.zeros((1, 1, 512, 512), dtype=np.float32)
+    mask[..., 100:200, 100:200] = 1
+    return image, mask
+
+
+def test_convert_fp16_stores_half_weights(stub_model, tmp_path):
+    dst = tmp_path / "lama_fp16.onnx"
+
+    convert_fp16(stub_model, dst)
+
+    model = onnx.load(str(dst))
+    assert {i.data_type for i in model.graph.initializer} == {TensorProto.FLOAT16}
+    image, mask = inputs()
+    np.testing.assert_allclose(
+        run(dst, image, mask), run(stub_model, image, mask), atol=1e-3
+    )
+
+
+def test_quantize_int8_runs(stub_model, tmp_path):
+    dst = tmp_path / "lama_int8.onnx"
+
+    quantize_int8(stub_model, dst)
+
+    image, mask = inputs()
+    assert run(dst, image, mask).shape == (1, 3, 512, 512)
+
+
+def test_variants_follow_the_api_config():
+    assert (SOURCE_VARIANT, *VARIANTS) == tuple(MODEL_VARIANTS)
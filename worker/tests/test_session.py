@@ -0,0 +1,61 @@
+import onnxruntime as ort
+from session import (
+    SessionConfig,
+    build_session_options,
+    create_session,
+    optimized_model_path,
+    resolve_providers,
+)
+
+
+def test_build_session_options():
+    options = build_session_options(
+        SessionConfig(
+            intra_op_threads=3,
+            inter_op_threads=2,
+            execution_mode="parallel",
+            graph_optimization="basic",
+            mem_arena=False,
+            mem_pattern=False,
+        )
+    )
+
+    assert options.intra_op_num_threads == 3
+    assert options.inter_op_num_threads == 2
+    assert options.execution_mode == ort.ExecutionMode.ORT_PARALLEL
+    level = options.graph_optimization_level
+    assert level == ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    assert not options.enable_cpu_mem_arena
+    assert not options.enable_mem_pattern
+
+
+def test_resolve_providers_drops_unavailable():
+    providers = resolve_providers(("NoSuchExecutionProvider", "CPUExecutionProvider"))
+
+    assert providers == ["CPUExecutionProvider"]
+    assert resolve_providers(("NoSuchExecutionProvider",)) == ["CPUExecutionProvider"]
+
+
+def test_optimized_model_is_cached_and_reused(stub_model):
+    """The first session writes the optimized graph, the next one loads it."""
+    config = SessionConfig(providers=("CPUExecutionProvider",))
+    cached = optimized_model_path(stub_model, config, ["CPUExecutionProvider"])
+
+    create_session(stub_model, config)
+    assert cached.exists()
+    mtime = cached.stat().st_mtime_ns
+
+    session = create_session(stub_model, config)
+    assert cached.stat().st_mtime_ns == mtime
+    assert [i.name for i in session.get_inputs()] == ["image", "mask"]
+    assert not list(stub_model.parent.glob("*.tmp"))
+
+
+def test_optimized_cache_can_be_disabled(stub_model):
+    config = SessionConfig(providers=("CPUExecutionProvider",), cache_optimized=False)
+
+    create_session(stub_model, config)
+
+    assert not optimized_model_path(
+        stub_model, config, ["CPUExecutionProvider"]
+    ).exists()
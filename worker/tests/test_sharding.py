@@ -0,0 +1,98 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+from frame_store import FrameStore, list_frames
+from inpaint_worker import (
+    WorkerError,
+    parse_args,
+    run_frames,
+    run_sharded,
+    split_ranges,
+)
+
+
+def test_split_ranges_contiguous():
+    assert split_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert split_ranges(2, 4) == [(0, 1), (1, 2)]
+    assert split_ranges(5, 1) == [(0, 5)]
+
+
+def test_run_sharded_processes_every_frame(stub_model, tmp_path, capsys):
+    """Shards cover all frames and merge progress into one stream."""
+    frames_dir = tmp_path / "frames"
+    out_dir = tmp_path / "out"
+    frames_dir.mkdir()
+    out_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(1, 7):
+        frame = rng.integers(0, 256, size=(90, 160, 3), dtype=np.uint8)
+        cv2.imwrite(str(frames_dir / f"{i:06d}.png"), frame)
+    mask_img = np.full((20, 40), 255, dtype=np.uint8)
+    frame_files = list_frames(frames_dir, "png")
+
+    args = parse_args(
+        [
+            "--frames", str(frames_dir),
+            "--out", str(out_dir),
+            "--roi", "10,10,40,20",
+            "--model", str(stub_model),
+            "--mask", "mask.png",
+            "--providers", "CPUExecutionProvider",
+            "--shards", "2",
+        ]
+    )  # fmt: skip
+    processed = run_sharded(args, frame_files, mask_img, (10, 10, 40, 20), out_dir)
+
+    assert processed == 6
+    assert sorted(p.name for p in out_dir.glob("*.png")) == [
+        ref.path.name for ref in frame_files
+    ]
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    progress = [e for e in events if e["event"] == "progress"]
+    assert len(progress) == 6
+    assert (progress[-1]["percent"], progress[-1]["processed"]) == (100, 6)
+
+    # Both shards' stage timings are merged into one final report
+    telemetry = [e for e in events if e["event"] == "telemetry"]
+    assert telemetry[-1]["final"]
+    assert telemetry[-1]["stages"]["infer"]["items"] == 6
+    assert telemetry[-1]["stages"]["write"]["items"] == 6
+
+
+def test_run_frames_fails_when_a_frame_is_not_saved(stub_model, tmp_path, monkeypatch):
+    """A gap in the output frames must fail the job, not shorten the video."""
+    frames_dir = tmp_path / "frames"
+    out_dir = tmp_path / "out"
+    frames_dir.mkdir()
+    out_dir.mkdir()
+    for i in range(1, 4):
+        cv2.imwrite(str(frames_dir / f"{i:06d}.png"), np.zeros((90, 160, 3)))
+    save = FrameStore.save
+
+    def flaky_save(self, ref, frame):
+        return ref.path.name != "000002.png" and save(self, ref, frame)
+
+    monkeypatch.setattr(FrameStore, "save", flaky_save)
+    args = parse_args(
+        [
+            "--frames", str(frames_dir),
+            "--out", str(out_dir),
+            "--roi", "10,10,40,20",
+            "--model", str(stub_model),
+            "--mask", "mask.png",
+            "--providers", "CPUExecutionProvider",
+        ]
+    )  # fmt: skip
+    mask_img = np.full((20, 40), 255, dtype=np.uint8)
+
+    with pytest.raises(WorkerError, match="1 of 3 frames failed to save"):
+        run_frames(
+            args,
+            list_frames(frames_dir, "png"),
+            mask_img,
+            (10, 10, 40, 20),
+            out_dir,
+            lambda *_: None,
+        )
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+from inpaint_worker import LamaInpainter, load_inpainter, parse_args, process_batch
+from masking import MaskPlanCache
+from pipeline import PipelineStats
+from session import SessionConfig
+from telemetry import Telemetry, merge_reports, rss_bytes, stage_report
+
+
+def events(capsys) -> list[dict]:
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_stage_report_has_timings_and_queue_depths():
+    stats = PipelineStats(prefetch=8, write_queue=4)
+    stats.read.sample(3)
+    stats.write.sample(4)
+    stats.write.sample(1)
+    with stats.infer.timing(items=2):
+        pass
+
+    report = stage_report(stats)
+
+    assert list(report) == ["read", "preprocess", "infer", "blend", "write"]
+    assert report["infer"]["items"] == 2
+    assert report["infer"]["busy"] >= 0
+    assert "queue" not in report["infer"]
+    assert report["write"] | {"busy": 0} == {
+        "items": 0,
+        "busy": 0,
+        "wait": 0.0,
+        "queue": 1,
+        "queueMax": 4,
+        "queueCapacity": 4,
+    }
+
+
+def test_merge_reports_sums_shards():
+    first = {"infer": {"items": 2, "busy": 1.5, "wait": 0.0}}
+    second = {"infer": {"items": 3, "busy": 0.25, "wait": 0.5}}
+
+    assert merge_reports([first, second]) == {
+        "infer": {"items": 5, "busy": 1.75, "wait": 0.5}
+    }
+
+
+def test_telemetry_is_throttled(capsys):
+    telemetry = Telemetry(interval=3600)
+    stats = PipelineStats()
+
+    for _ in range(10):
+        telemetry.tick(stats)
+    telemetry.report(stage_report(stats), final=True)
+
+    emitted = events(capsys)
+    assert [e.get("final", False) for e in emitted] == [False, True]
+    assert set(emitted[0]) == {"event", "elapsed", "rss", "stages"}
+    assert emitted[0]["event"] == "telemetry"
+
+
+def test_rss_is_reported():
+    assert rss_bytes() > 0
+
+
+def test_process_batch_times_each_stage(stub_model, frame):
+    inpainter = LamaInpainter(
+        str(stub_model), SessionConfig(providers=("CPUExecutionProvider",))
+    )
+    mask = np.zeros((20, 40), dtype=np.uint8)
+    mask[5:15, 10:30] = 255
+    plans = MaskPlanCache(mask, (10, 10, 40, 20))
+    stats = PipelineStats()
+
+    process_batch(inpainter, [frame.copy(), frame.copy()], plans, stats=stats)
+
+    for stage in (stats.preprocess, stats.infer, stats.blend):
+        assert stage.items == 2
+        assert stage.busy > 0
+
+
+def test_model_load_is_reported(stub_model, capsys):
+    args = parse_args(
+        ["--roi", "0,0,1,1", "--mask", "mask.png", "--model", str(stub_model)]
+    )
+    loaded = LamaInpainter(str(stub_model), SessionConfig())
+
+    load_inpainter(args, LamaInpainter)
+    load_inpainter(args, lambda path, config: loaded)
+
+    fresh, cached = events(capsys)
+    assert fresh["event"] == "model" and fresh["cached"] is False
+    assert fresh["load"] >= 0
+    assert cached["cached"] is True
@@ -0,0 +1,74 @@
+import numpy as np
+from inpaint_worker import LamaInpainter, process_batch
+from masking import MaskPlanCache, build_mask_plan
+from temporal_cache import TemporalCache
+
+MASK = np.full((20, 40), 255, dtype=np.uint8)
+ROI = (60, 40, 40, 20)
+
+
+def test_exact_match_ignores_masked_pixels(frame):
+    """Only the context matters; an animated watermark still hits."""
+    plan = build_mask_plan(MASK, ROI, frame.shape[:2], min_size=64)
+    cache = TemporalCache()
+
+    entry, hit = cache.match(frame, plan)
+    assert not hit
+    entry.patch = np.zeros((20, 40, 3), dtype=np.uint8)
+
+    changed = frame.copy()
+    changed[40:60, 60:100] = 0
+    again, hit = cache.match(changed, plan)
+
+    assert hit and again is entry
+    assert cache.hit_rate == 0.5
+
+
+def test_context_change_misses(frame):
+    plan = build_mask_plan(MASK, ROI, frame.shape[:2], min_size=64)
+    cache = TemporalCache()
+    cache.match(frame, plan)
+
+    changed = frame.copy()
+    changed[38, 70] ^= 0xFF
+    _, hit = cache.match(changed, plan)
+
+    assert not hit
+
+
+def test_tolerance_allows_small_noise(frame):
+    plan = build_mask_plan(MASK, ROI, frame.shape[:2], min_size=64)
+    cache = TemporalCache(tolerance=2.0)
+    cache.match(frame, plan)
+
+    noisy = np.clip(frame.astype(int) + 1, 0, 255).astype(np.uint8)
+    _, hit = cache.match(noisy, plan)
+    assert hit
+
+    shifted = np.clip(frame.astype(int) + 40, 0, 255).astype(np.uint8)
+    _, hit = cache.match(shifted, plan)
+    assert not hit
+
+
+def test_cache_is_bounded(frame):
+    plan = build_mask_plan(MASK, ROI, frame.shape[:2], min_size=64)
+    cache = TemporalCache(size=2)
+
+    for value in range(5):
+        cache.match(np.full_like(frame, value), plan)
+
+    assert len(cache._entries) == 2
+
+
+def test_process_batch_reuses_within_batch(fake_session, frame):
+    """Identical frames in one batch are inferred once."""
+    inpainter = LamaInpainter("model.onnx")
+    plans = MaskPlanCache(MASK, ROI)
+    cache = TemporalCache()
+
+    results = process_batch(inpainter, [frame.copy() for _ in range(4)], plans, cache)
+    process_batch(inpainter, [frame.copy() for _ in range(4)], plans, cache)
+
+    assert fake_session.calls == [1]
+    assert cache.hits == 7
+    assert all(np.array_equal(r, results[0]) for r in results)
@@ -0,0 +1,138 @@
+import sys
+
+import numpy as np
+import pytest
+from inpaint_worker import parse_args, run_stream
+from pipeline import PipelineStats
+from video_stream import (
+    FramePool,
+    StreamReader,
+    StreamWriter,
+    decoder_command,
+    encoder_command,
+)
+
+SHAPE = (6, 8, 3)
+FRAME_BYTES = 6 * 8 * 3
+
+
+def python_command(code: str) -> list[str]:
+    """Stand-in for ffmpeg, the tests do not need it installed."""
+    return [sys.executable, "-c", code]
+
+
+def emit_frames(count: int, extra: int = 0) -> list[str]:
+    return python_command(
+        "import sys\n"
+        f"for i in range({count}):\n"
+        f"    sys.stdout.buffer.write(bytes([i]) * {FRAME_BYTES})\n"
+        f"sys.stdout.buffer.write(b'x' * {extra})\n"
+    )
+
+
+def copy_to(path) -> list[str]:
+    return python_command(
+        f"import shutil, sys\n"
+        f"shutil.copyfileobj(sys.stdin.buffer, open({str(path)!r}, 'wb'))\n"
+    )
+
+
+def test_commands_use_bgr24_pipes():
+    assert decoder_command("in.mp4")[-5:] == [
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"
+    ]  # fmt: skip
+    cmd = encoder_command("out.mp4", (640, 360), 25.0, "in.mp4", crf=23)
+    assert cmd[cmd.index("-s") + 1] == "640x360"
+    assert cmd[cmd.index("-crf") + 1] == "23"
+    assert "1:a?" in cmd
+
+
+def test_reader_fills_pool_buffers():
+    pool = FramePool(SHAPE, 4)
+    reader = StreamReader(emit_frames(5), pool, PipelineStats(2, 2), depth=2)
+
+    values = []
+    for frame in reader:
+        values.append(int(frame[0, 0, 0]))
+        assert frame.shape == SHAPE
+        pool.release(frame)
+
+    assert values == [0, 1, 2, 3, 4]
+
+
+def test_reader_drops_truncated_tail(capsys):
+    pool = FramePool(SHAPE, 4)
+    reader = StreamReader(emit_frames(2, extra=10), pool, PipelineStats(2, 2))
+
+    frames = []
+    for frame in reader:
+        frames.append(frame)
+        pool.release(frame)
+
+    assert len(frames) == 2
+    assert "Truncated frame" in capsys.readouterr().err
+
+
+def test_writer_encodes_and_recycles(tmp_path):
+    out = tmp_path / "raw.bin"
+    pool = FramePool(SHAPE, 2)
+    stats = PipelineStats(2, 2)
+
+    with StreamWriter(copy_to(out), pool, stats, depth=1) as writer:
+        for i in range(5):
+            frame = pool.acquire()
+            frame[:] = i
+            writer.submit(frame)
+
+    data = out.read_bytes()
+    assert len(data) == 5 * FRAME_BYTES
+    assert data[4 * FRAME_BYTES] == 4
+    assert stats.write.items == 5
+    # Every buffer went back to the pool
+    assert [pool.acquire() is not None for _ in range(2)] == [True, True]
+
+
+def test_writer_reports_encoder_failure():
+    pool = FramePool(SHAPE, 2)
+    writer = StreamWriter(
+        python_command("import sys; sys.exit(1)"), pool, PipelineStats(2, 2)
+    )
+    frame = pool.acquire()
+    writer.submit(frame)
+
+    with pytest.raises(RuntimeError, match="encoder failed"):
+        writer.close()
+
+
+def test_run_stream_inpaints_piped_frames(stub_model, tmp_path, monkeypatch):
+    """Frames flow decoder -> model -> encoder without touching disk."""
+    out = tmp_path / "raw.bin"
+    monkeypatch.setattr("inpaint_worker.decoder_command", lambda _: emit_frames(3))
+    monkeypatch.setattr("inpaint_worker.encoder_command", lambda *a, **kw: copy_to(out))
+    args = parse_args(
+        [
+            "--input-video", "in.mp4",
+            "--output-video", "out.mp4",
+            "--size", "8x6",
+            "--roi", "2,2,4,2",
+            "--model", str(stub_model),
+            "--mask", "mask.png",
+            "--providers", "CPUExecutionProvider",
+            "--batch-size", "2",
+            "--no-dedup",
+        ]
+    )  # fmt: skip
+    progress = []
+    mask_img = np.full((2, 4), 255, dtype=np.uint8)
+
+    processed = run_stream(
+        args, mask_img, (2, 2, 4, 2), lambda done, *_: progress.append(done)
+    )
+
+    frames = np.frombuffer(out.read_bytes(), np.uint8).reshape(3, *SHAPE)
+    assert processed == 3
+    assert progress == [1, 2, 3]
+    # The stub model fills masked pixels with 0.5 gray, the rest is untouched
+    assert (frames[:, 2:4, 2:6] == 127).all()
+    assert (frames[1, :2] == 1).all()
+    assert (frames[2, 4:] == 2).all()
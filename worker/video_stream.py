@@ -0,0 +1,273 @@
+"""
+Keira - Video Stream
+Regis Architecture v2.9.0
+
+Streams frames through ffmpeg pipes instead of PNG files on disk. A decoder
+process writes rawvideo bgr24 to its stdout, frames are read straight into
+a fixed pool of preallocated buffers, and processed frames are written to
+an encoder process's stdin. Buffers go back to the pool once written, so
+memory is bounded by the pool size for any video length.
+"""
+
+from __future__ import annotations
+
+import queue
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+from pipeline import PipelineStats
+
+CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+
+def decoder_command(video_path: Path, ffmpeg: str = "ffmpeg") -> list[str]:
+    """ffmpeg command decoding the first video stream to rawvideo on stdout."""
+    return [
+        ffmpeg,
+        "-v",
+        "error",
+        "-i",
+        str(video_path),
+        "-map",
+        "0:v:0",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "bgr24",
+        "pipe:1",
+    ]
+
+
+def encoder_command(
+    output: Path,
+    size: tuple[int, int],
+    fps: float,
+    audio_source: Optional[Path] = None,
+    crf: int = 18,
+    preset: str = "medium",
+    ffmpeg: str = "ffmpeg",
+) -> list[str]:
+    """ffmpeg command encoding rawvideo bgr24 frames from stdin."""
+    width, height = size
+    cmd = [
+        ffmpeg,
+        "-v",
+        "error",
+        "-y",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "bgr24",
+        "-s",
+        f"{width}x{height}",
+        "-framerate",
+        str(fps),
+        "-i",
+        "pipe:0",
+    ]
+    if audio_source is not None:
+        cmd += ["-i", str(audio_source), "-map", "0:v:0", "-map", "1:a?"]
+    cmd += [
+        "-c:v",
+        "libx264",
+        "-crf",
+        str(crf),
+        "-preset",
+        preset,
+        "-pix_fmt",
+        "yuv420p",
+    ]
+    if audio_source is not None:
+        cmd += ["-c:a", "copy"]
+    cmd.append(str(output))
+    return cmd
+
+
+class FramePool:
+    """Fixed set of preallocated frame buffers, acquire blocks when empty."""
+
+    def __init__(self, shape: tuple[int, int, int], count: int):
+        self.shape = shape
+        self.count = max(1, count)
+        self._free: queue.Queue[np.ndarray] = queue.Queue()
+        for _ in range(self.count):
+            self._free.put(np.empty(shape, dtype=np.uint8))
+
+    def acquire(self) -> np.ndarray:
+        return self._free.get()
+
+    def release(self, frame: np.ndarray) -> None:
+        self._free.put(frame)
+
+
+def read_exact(stream: BinaryIO, frame: np.ndarray) -> bool:
+    """Fill a frame buffer from the stream, False on end of stream."""
+    view = memoryview(frame).cast("B")
+    filled = 0
+    while filled < len(view):
+        n = stream.readinto(view[filled:])
+        if not n:
+            if filled:
+                print(
+                    f"WARNING: Truncated frame ({filled}/{len(view)} bytes)",
+                    file=sys.stderr,
+                )
+            return False
+        filled += n
+    return True
+
+
+class StreamReader:
+    """
+    Decodes a video through ffmpeg, at most ``depth`` frames read ahead.
+
+    Yields pool buffers; the consumer hands each one to a StreamWriter,
+    which returns it to the pool after encoding.
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        pool: FramePool,
+        stats: PipelineStats,
+        depth: int = 16,
+    ):
+        self.command = command
+        self.pool = pool
+        self.stats = stats
+        self.depth = max(1, depth)
+        self.process: Optional[subprocess.Popen] = None
+
+    def _decode(self, frames: queue.Queue) -> None:
+        try:
+            while True:
+                frame = self.pool.acquire()
+                start = time.perf_counter()
+                ok = read_exact(self.process.stdout, frame)
+                with self.stats.lock:
+                    self.stats.read.busy += time.perf_counter() - start
+                if not ok:
+                    self.pool.release(frame)
+                    break
+                frames.put(frame)
+        finally:
+            frames.put(None)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        stats = self.stats
+        self.process = subprocess.Popen(
+            self.command,
+            stdout=subprocess.PIPE,
+            creationflags=CREATION_FLAGS,
+        )
+        frames: queue.Queue[Optional[np.ndarray]] = queue.Queue(maxsize=self.depth)
+        thread = threading.Thread(target=self._decode, args=(frames,), daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                stats.read.sample(frames.qsize())
+                # Time spent here is inference starved for input
+                start = time.perf_counter()
+                frame = frames.get()
+                stats.read.wait += time.perf_counter() - start
+                if frame is None:
+                    break
+                stats.read.items += 1
+                yield frame
+        finally:
+            if self.process.poll() is None and thread.is_alive():
+                # Consumer stopped early, do not leave ffmpeg running
+                self.process.kill()
+            # The decode thread may be parked on a full pool, it is a daemon
+            thread.join(timeout=1.0)
+            self.process.stdout.close()
+            returncode = self.process.wait()
+
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg decoder failed (code {returncode})")
+
+
+class StreamWriter:
+    """Encodes frames through ffmpeg; submit blocks when ``depth`` are queued."""
+
+    def __init__(
+        self,
+        command: list[str],
+        pool: FramePool,
+        stats: PipelineStats,
+        depth: int = 16,
+    ):
+        self.pool = pool
+        self.stats = stats
+        self.error: Optional[Exception] = None
+        self._frames: queue.Queue[Optional[np.ndarray]] = queue.Queue(
+            maxsize=max(1, depth)
+        )
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            creationflags=CREATION_FLAGS,
+        )
+        self._thread = threading.Thread(target=self._encode, daemon=True)
+        self._thread.start()
+
+    def _encode(self) -> None:
+        while (frame := self._frames.get()) is not None:
+            start = time.perf_counter()
+            try:
+                if self.error is None:
+                    self.process.stdin.write(memoryview(frame).cast("B"))
+                    with self.stats.lock:
+                        self.stats.write.items += 1
+            except OSError as e:
+                self.error = e
+            finally:
+                self.pool.release(frame)
+            with self.stats.lock:
+                self.stats.write.busy += time.perf_counter() - start
+
+    def submit(self, frame: np.ndarray) -> None:
+        """Queue a pool buffer for encoding, waiting if the queue is full."""
+        if self.error is not None:
+            raise RuntimeError(f"ffmpeg encoder failed: {self.error}")
+
+        start = time.perf_counter()
+        self._frames.put(frame)
+        self.stats.write.wait += time.perf_counter() - start
+        self.stats.write.sample(self._frames.qsize())
+
+    def close(self) -> None:
+        """Flush queued frames and wait for the encoder to finish the file."""
+        self._frames.put(None)
+        self._thread.join()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        returncode = self.process.wait()
+        if self.error is not None or returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg encoder failed (code {returncode}): {self.error or ''}"
+            )
+
+    def abort(self) -> None:
+        """Stop the encoder without finishing the file."""
+        self.process.kill()
+        self._frames.put(None)
+        self._thread.join()
+        self.process.wait()
+
+    def __enter__(self) -> StreamWriter:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()